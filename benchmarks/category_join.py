@@ -0,0 +1,111 @@
+"""
+Compare the time and memory it takes to join the category tables of a team
+with eight outer merges in a row and with
+:meth:`FbrefScraper.join_category_dataframes`.
+
+The tables are read off the crawled pages once and then repeated, so that a
+team has as many matches as a team with a long history.
+
+Run from the root of the repository:
+
+    python -m benchmarks.category_join [html_folder_path] [--matches N]
+"""
+import argparse
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+import pandas as pd
+
+from settings import TEST_DATA_DIR
+from src.data.fbref import categories
+from src.data.fbref_scraper import FbrefScraper
+from src.data.html_table_extractor import HtmlTableExtractor
+
+
+def merge_category_dataframes(
+    team_df: pd.DataFrame, category_dfs: list[pd.DataFrame]
+) -> pd.DataFrame:
+    """Join the category dataframes the way the scraper used to."""
+    for category_df in category_dfs:
+        team_df = team_df.merge(category_df, on=['Date', 'Time'], how='outer')
+    return team_df
+
+
+def measure(
+    join: Callable, team_df: pd.DataFrame, category_dfs: list[pd.DataFrame]
+) -> tuple[pd.DataFrame, float, int]:
+    """Measure the seconds and the peak bytes allocated by the join."""
+    tracemalloc.start()
+    start = perf_counter()
+    joined_df = join(team_df, category_dfs)
+    seconds = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return joined_df, seconds, peak
+
+
+def repeat_matches(df: pd.DataFrame, matches: int) -> pd.DataFrame:
+    """Repeat the matches with made up dates, so they stay unique."""
+    df = pd.concat([df] * (matches // len(df) + 1), ignore_index=True)
+    df = df.head(matches).copy()
+    df['Date'] = [f'{1900 + i // 365}-{i % 365:03d}' for i in range(matches)]
+    return df
+
+
+def main(html_folder_path: Path, matches: int) -> None:
+    """Time both joins and check they are identical."""
+    scraper = FbrefScraper(
+        html_folder_path=html_folder_path,
+        raw_data_folder_path=Path(html_folder_path),
+        competition='Benchmark',
+    )
+    team_stats_page_file = scraper.get_teams_stats_pages_files()[0]
+    team_df = HtmlTableExtractor.read_table(
+        scraper.page_store.read(team_stats_page_file),
+        match='Scores & Fixtures',
+    )
+    team_df['Team'] = scraper.get_team_name(team_stats_page_file)
+    category_dfs = [
+        scraper.get_category_dataframe(
+            team_stats_page_file, category_href, category_caption
+        )
+        for category_href, category_caption in categories.items()
+    ]
+    team_df = repeat_matches(team_df, matches)
+    category_dfs = [repeat_matches(df, matches) for df in category_dfs]
+
+    merged_df, merge_seconds, merge_peak = measure(
+        merge_category_dataframes, team_df, category_dfs
+    )
+    joined_df, join_seconds, join_peak = measure(
+        FbrefScraper.join_category_dataframes, team_df, category_dfs
+    )
+    pd.testing.assert_frame_equal(joined_df, merged_df)
+
+    print(f'Joined {len(category_dfs)} categories of {matches} matches.')
+    print(
+        f'Sequential merges: {merge_seconds * 1000:.1f} ms, '
+        f'peak {merge_peak / 2**20:.1f} MiB'
+    )
+    print(
+        f'Single join:       {join_seconds * 1000:.1f} ms, '
+        f'peak {join_peak / 2**20:.1f} MiB'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'html_folder_path',
+        type=Path,
+        nargs='?',
+        default=Path(TEST_DATA_DIR, 'test_fbref_scraper'),
+        help='The folder with the crawled pages.',
+    )
+    parser.add_argument(
+        '--matches', type=int, default=400, help='The number of matches of the team.'
+    )
+    args = parser.parse_args()
+    main(args.html_folder_path, args.matches)
@@ -0,0 +1,75 @@
+"""
+Compare the time it takes to find the equal columns of a wide dataframe by
+comparing every pair of columns and with
+:meth:`FbrefCleaner.get_list_of_equal_columns`.
+
+The dataframe is made up and shaped like the scraped matches: mostly numeric
+columns, some string columns and a few columns that are copies of others.
+
+Run from the root of the repository:
+
+    python -m benchmarks.equal_columns [--columns N] [--rows N]
+"""
+import argparse
+from itertools import combinations
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.data.fbref_cleaner import FbrefCleaner
+
+
+def compare_all_pairs(df: pd.DataFrame) -> list[tuple[str, str]]:
+    """Find the equal columns the way the cleaner used to."""
+    return [(i, j) for i, j in combinations(df, 2) if df[i].equals(df[j])]
+
+
+def make_wide_dataframe(columns: int, rows: int) -> pd.DataFrame:
+    """Make a dataframe where every tenth column is a copy of another one."""
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(columns):
+        if i % 10 == 9:
+            data[f'copy_{i}'] = data[f'column_{i - 9}'].copy()
+        elif i % 10 == 8:
+            data[f'column_{i}'] = rng.choice(['W', 'D', 'L'], rows)
+        else:
+            values = rng.integers(0, 10, rows).astype(float)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f'column_{i}'] = values
+    return pd.DataFrame(data)
+
+
+def main(columns: int, rows: int) -> None:
+    """Time both ways of finding the equal columns and check they agree."""
+    df = make_wide_dataframe(columns, rows)
+
+    start = perf_counter()
+    expected_equal_cols = compare_all_pairs(df)
+    pairs_seconds = perf_counter() - start
+
+    start = perf_counter()
+    equal_cols = FbrefCleaner.get_list_of_equal_columns(df)
+    hash_seconds = perf_counter() - start
+
+    assert equal_cols == expected_equal_cols
+    print(
+        f'Found {len(equal_cols)} pairs of equal columns among {columns} '
+        f'columns of {rows} rows.'
+    )
+    print(f'All pairs:       {pairs_seconds * 1000:.1f} ms')
+    print(f'Hashed columns:  {hash_seconds * 1000:.1f} ms')
+    print(f'Speedup:         {pairs_seconds / hash_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--columns', type=int, default=300, help='The number of columns.'
+    )
+    parser.add_argument(
+        '--rows', type=int, default=5000, help='The number of rows.'
+    )
+    args = parser.parse_args()
+    main(args.columns, args.rows)
@@ -0,0 +1,140 @@
+"""
+Compare the time it takes to build the match ids of made up FBref matches
+row by row with df.apply and with :class:`MatchKeyBuilder`, and to join two
+dataframes on the match ids and on the integer match keys.
+
+Run from the root of the repository:
+
+    python -m benchmarks.match_ids [--matches N] [--repeat N]
+"""
+import argparse
+from collections.abc import Callable
+from time import perf_counter
+from typing import TypeVar
+
+import numpy as np
+import pandas as pd
+
+from src.data.match_key import MatchKeyBuilder
+
+# The result of a timed function.
+T = TypeVar('T')
+
+
+def make_matches(matches: int) -> pd.DataFrame:
+    """Make up matches of 40 teams, each match seen from both teams."""
+    rng = np.random.default_rng(0)
+    teams = [f'Team {i:02d}' for i in range(40)]
+    home_teams = rng.choice(teams, matches)
+    away_teams = np.array(
+        [f'{team} II' for team in rng.choice(teams, matches)], dtype=object
+    )
+    dates = pd.Timestamp('2000-01-01') + pd.to_timedelta(
+        np.sort(rng.integers(0, 365 * 20, matches)), unit='D'
+    )
+    home_df = pd.DataFrame(
+        {
+            'date': dates.strftime('%Y-%m-%d'),
+            'team': home_teams,
+            'opponent': away_teams,
+            'venue': 'Home',
+        }
+    )
+    away_df = home_df.assign(
+        team=home_df['opponent'], opponent=home_df['team'], venue='Away'
+    )
+    return pd.concat([home_df, away_df], ignore_index=True)
+
+
+def get_match_ids_row_by_row(df: pd.DataFrame) -> pd.Series:
+    """Build the match ids the way the processors used to."""
+    dates = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+    return df.assign(date=dates).apply(
+        lambda row: f'{row["date"]}_{row["team"]}_{row["opponent"]}'
+        if row['venue'] == 'Home'
+        else f'{row["date"]}_{row["opponent"]}_{row["team"]}',
+        axis=1,
+    )
+
+
+def time(
+    function: Callable[..., T], *args: object, repeat: int
+) -> tuple[T, float]:
+    """Run the function and return its result and mean seconds."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return result, (perf_counter() - start) / repeat
+
+
+def main(matches: int, repeat: int) -> None:
+    """Time the match ids and the joins and check they are identical."""
+    df = make_matches(matches)
+    odds_df = df[df['venue'] == 'Home'].drop(columns='venue').sample(
+        frac=1, random_state=0
+    )
+
+    expected_match_ids, apply_seconds = time(
+        get_match_ids_row_by_row, df, repeat=repeat
+    )
+    match_ids, builder_seconds = time(
+        MatchKeyBuilder.get_match_ids, df, repeat=repeat
+    )
+    pd.testing.assert_series_equal(match_ids, expected_match_ids)
+
+    team_ids, team_ids_seconds = time(
+        MatchKeyBuilder.create_team_ids,
+        df['team'],
+        odds_df['team'],
+        repeat=repeat,
+    )
+    match_keys, keys_seconds = time(
+        MatchKeyBuilder.get_match_keys, df, team_ids, repeat=repeat
+    )
+    odds_match_keys = MatchKeyBuilder.get_match_keys(odds_df, team_ids)
+    odds_match_ids = MatchKeyBuilder.get_match_ids(odds_df)
+
+    left_df = pd.DataFrame({'match_id': match_ids, 'match_key': match_keys})
+    right_df = pd.DataFrame(
+        {
+            'match_id': odds_match_ids,
+            'match_key': odds_match_keys,
+            'odds': np.arange(len(odds_df)),
+        }
+    )
+    id_join_df, id_join_seconds = time(
+        pd.merge,
+        left_df,
+        right_df.drop(columns='match_key'),
+        repeat=repeat,
+    )
+    key_join_df, key_join_seconds = time(
+        pd.merge,
+        left_df,
+        right_df.drop(columns='match_id'),
+        repeat=repeat,
+    )
+    assert (id_join_df['odds'] == key_join_df['odds']).all()
+
+    print(f'{len(df)} rows, {len(odds_df)} odds rows.')
+    print(f'match ids with df.apply:     {apply_seconds * 1000:8.1f} ms')
+    print(f'match ids with the builder:  {builder_seconds * 1000:8.1f} ms')
+    print(f'team ids:                    {team_ids_seconds * 1000:8.1f} ms')
+    print(f'match keys:                  {keys_seconds * 1000:8.1f} ms')
+    print(f'join on match ids:           {id_join_seconds * 1000:8.1f} ms')
+    print(f'join on match keys:          {key_join_seconds * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--matches',
+        type=int,
+        default=50_000,
+        help='How many matches to make up, each is two rows.',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3, help='How many times each is run.'
+    )
+    args = parser.parse_args()
+    main(args.matches, args.repeat)
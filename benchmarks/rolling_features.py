@@ -0,0 +1,110 @@
+"""
+Compare the time it takes to create the rolling average columns with a
+groupby-apply over the teams and with
+:meth:`FbrefProcessor.create_form_feature_columns`, and time a feature spec
+with more windows.
+
+The matches are made up and shaped like the cleaned matches of a league:
+many numeric stats columns, some of them missing now and then. The default
+size is 10 times the Bundesliga seasons that FBref has stats for.
+
+Run from the root of the repository:
+
+    python -m benchmarks.rolling_features [--scale N] [--columns N]
+"""
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.data.fbref_processor import FbrefProcessor
+from src.data.features import FeatureSpec
+
+# The size of a league: 18 teams with 34 matches per season for 8 seasons.
+teams = 18
+matches_per_team = 34 * 8
+
+
+def create_rolling_average_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Create the rolling average columns the way the processor used to."""
+    numeric_columns = df.select_dtypes(include='number').columns.tolist()
+    rolling_avg_columns = [
+        f'feat_{col}_rolling_avg' for col in numeric_columns
+    ]
+
+    def calculate_rolling_averages(group: pd.DataFrame) -> pd.DataFrame:
+        group = group.sort_values('date')
+        rolling_stats = group[numeric_columns].rolling(3, closed='left').mean()
+        rolling_stats.columns = rolling_avg_columns
+        group = pd.concat([group, rolling_stats], axis=1)
+        return group.dropna(subset=rolling_avg_columns, how='all')
+
+    df = df.groupby('team').apply(calculate_rolling_averages)
+    return df.droplevel(0).reset_index(drop=True)
+
+
+def make_matches(scale: int, columns: int) -> pd.DataFrame:
+    """Make up the matches of `scale` leagues, in the order of a season."""
+    rng = np.random.default_rng(0)
+    rows = teams * matches_per_team * scale
+    team_names = [f'Team {i}' for i in range(teams * scale)]
+    dates = pd.date_range('1990-01-01', periods=matches_per_team, freq='W')
+    df = pd.DataFrame(
+        {
+            'date': np.tile(dates, teams * scale).astype(str),
+            'team': np.repeat(team_names, matches_per_team),
+            'gf': rng.integers(0, 5, rows),
+        }
+    )
+    stats = rng.random((rows, columns)) * 10
+    stats[rng.random((rows, columns)) < 0.02] = np.nan
+    stats_df = pd.DataFrame(
+        stats, columns=[f'stat_{i}' for i in range(columns)]
+    )
+    df = pd.concat([df, stats_df], axis=1)
+    # Matches are scraped per team, but cleaned rows aren't in date order.
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def main(scale: int, columns: int) -> None:
+    """Time both ways of creating the columns and check they are identical."""
+    df = make_matches(scale, columns)
+
+    start = perf_counter()
+    expected_df = create_rolling_average_columns(df)
+    apply_seconds = perf_counter() - start
+
+    start = perf_counter()
+    rolling_df = FbrefProcessor.create_form_feature_columns(df)
+    rolling_seconds = perf_counter() - start
+
+    pd.testing.assert_frame_equal(rolling_df, expected_df, check_exact=True)
+
+    feature_spec = FeatureSpec(windows=(3, 5, 10), halflives=(2, 5))
+    start = perf_counter()
+    features_df = FbrefProcessor.create_form_feature_columns(df, feature_spec)
+    spec_seconds = perf_counter() - start
+
+    print(f'Created {columns + 1} rolling averages of {len(df)} matches.')
+    print(f'Groupby-apply:   {apply_seconds * 1000:.0f} ms')
+    print(f'Indexed windows: {rolling_seconds * 1000:.0f} ms')
+    print(f'Speedup:         {apply_seconds / rolling_seconds:.1f}x')
+    print(
+        f'{features_df.shape[1] - df.shape[1]} features of {feature_spec}: '
+        f'{spec_seconds * 1000:.0f} ms'
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--scale',
+        type=int,
+        default=10,
+        help='How many times the size of a league the data is.',
+    )
+    parser.add_argument(
+        '--columns', type=int, default=250, help='The number of stats columns.'
+    )
+    args = parser.parse_args()
+    main(args.scale, args.columns)
@@ -0,0 +1,78 @@
+"""
+Compare the time it takes to read the stats tables off crawled FBref pages
+with pd.read_html and with :class:`HtmlTableExtractor`.
+
+Run from the root of the repository:
+
+    python -m benchmarks.table_extraction [html_folder_path] [--repeat N]
+"""
+import argparse
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+
+import pandas as pd
+
+from settings import TEST_DATA_DIR
+from src.data.fbref import categories
+from src.data.html_table_extractor import HtmlTableExtractor
+from src.data.page_store import open_page_store
+
+captions = ['Scores & Fixtures', *categories.values()]
+
+
+def main(html_folder_path: Path, repeat: int) -> None:
+    """Time both ways of reading the tables and check they are identical."""
+    page_store = open_page_store(html_folder_path)
+    pages = []
+    for name in page_store.list_pages():
+        if not name.endswith('.html'):
+            continue
+        html = page_store.read(name)
+        caption = next(
+            (
+                caption
+                for caption in captions
+                if HtmlTableExtractor.find_table(html, match=caption)
+                is not None
+            ),
+            None,
+        )
+        if caption is not None:
+            pages.append((html, caption))
+
+    read_html_seconds = 0.0
+    extractor_seconds = 0.0
+    for html, caption in pages:
+        for _ in range(repeat):
+            start = perf_counter()
+            expected_df = pd.read_html(StringIO(html), match=caption)[0]
+            read_html_seconds += perf_counter() - start
+
+            start = perf_counter()
+            df = HtmlTableExtractor.read_table(html, match=caption)
+            extractor_seconds += perf_counter() - start
+
+        pd.testing.assert_frame_equal(df, expected_df)
+
+    runs = len(pages) * repeat
+    print(f'Read {len(pages)} pages {repeat} times each.')
+    print(f'pd.read_html:        {read_html_seconds / runs * 1000:.2f} ms/page')
+    print(f'HtmlTableExtractor:  {extractor_seconds / runs * 1000:.2f} ms/page')
+    print(f'Speedup:             {read_html_seconds / extractor_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'html_folder_path',
+        type=Path,
+        nargs='?',
+        default=Path(TEST_DATA_DIR, 'test_fbref_scraper'),
+        help='The folder with the crawled pages.',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5, help='How many times each page is read.'
+    )
+    args = parser.parse_args()
+    main(args.html_folder_path, args.repeat)
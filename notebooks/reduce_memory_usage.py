@@ -1,64 +1,40 @@
-import numpy as np
+from pathlib import Path
 
+from settings import PROCESSED_DATA_DIR
+from src.data.dtype_schema import DtypeSchema
 
-def reduce_memory_usage(df):
+
+def reduce_memory_usage(
+    df,
+    dataset='bundesliga_matches',
+    schema_file_path=Path(PROCESSED_DATA_DIR, DtypeSchema.file_name),
+):
     """
-    Reduce memory usage of a dataframe by downcasting the data types of the columns.
+    Reduce memory usage of a processed dataframe by applying the dtypes that
+    were saved for its dataset, see :class:`DtypeSchema`, so that the dataset
+    has the same dtypes every time it is loaded. If the schema has no dtypes
+    of the dataset, e.g. because it was saved before the dataset was
+    processed, the dtypes are inferred from the dataframe.
 
-    Borrowed from https://www.kaggle.com/code/oldwine357/removing-highly-correlated-features
+    To load a processed dataset with its dtypes right away, use
+    :func:`src.data.dtype_schema.load_processed_dataframe` instead.
 
     :param df: the dataframe to reduce memory usage
+    :param dataset: the name of the processed dataset file without the
+        extension
+    :param schema_file_path: the JSON file of the dtype schema
     :return: df: the dataframe with reduced memory usage
     """
-    start_memory = df.memory_usage().sum() / 1024**2
-    print(f'Memory usage of dataframe is {start_memory} MB')
-
-    for col in df.columns:
-        col_type = df[col].dtype
-
-        if col_type != 'object':
-            c_min = df[col].min()
-            c_max = df[col].max()
-
-            if str(col_type)[:3] == 'int':
-                if (
-                    c_min > np.iinfo(np.int8).min
-                    and c_max < np.iinfo(np.int8).max
-                ):
-                    df[col] = df[col].astype(np.int8)
-                elif (
-                    c_min > np.iinfo(np.int16).min
-                    and c_max < np.iinfo(np.int16).max
-                ):
-                    df[col] = df[col].astype(np.int16)
-                elif (
-                    c_min > np.iinfo(np.int32).min
-                    and c_max < np.iinfo(np.int32).max
-                ):
-                    df[col] = df[col].astype(np.int32)
-                elif (
-                    c_min > np.iinfo(np.int64).min
-                    and c_max < np.iinfo(np.int64).max
-                ):
-                    df[col] = df[col].astype(np.int64)
-
-            else:
-                if (
-                    c_min > np.finfo(np.float16).min
-                    and c_max < np.finfo(np.float16).max
-                ):
-                    df[col] = df[col].astype(np.float16)
-                elif (
-                    c_min > np.finfo(np.float32).min
-                    and c_max < np.finfo(np.float32).max
-                ):
-                    df[col] = df[col].astype(np.float32)
-                else:
-                    pass
-        else:
-            df[col] = df[col].astype('category')
-
-    end_memory = df.memory_usage().sum() / 1024**2
-    print(f'Memory usage of dataframe after reduction {end_memory} MB')
-    print(f'Reduced by {100 * (start_memory - end_memory) / start_memory} % ')
-    return df
+    dtypes = DtypeSchema(schema_file_path).get_dtypes(dataset)
+    if dtypes is None:
+        print(f'No dtypes of {dataset} in {schema_file_path}, inferring them')
+        dtypes = DtypeSchema.infer_dtypes(df)
+    reduced_df = DtypeSchema.apply_dtypes(df, dtypes)
+    report = DtypeSchema.get_memory_report('dataframe', df, reduced_df)
+    print(f'Memory usage of dataframe is {report.mib_before} MB')
+    print(f'Memory usage of dataframe after reduction {report.mib_after} MB')
+    print(
+        'Reduced by '
+        f'{100 * (report.mib_before - report.mib_after) / report.mib_before} % '
+    )
+    return reduced_df
@@ -9,7 +9,14 @@ RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')
 INTERIM_DATA_DIR = os.path.join(DATA_DIR, 'interim')
 TEST_DATA_DIR = os.path.join(DATA_DIR, 'test')
 PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+# Bookkeeping of the tasks, e.g. crawl progress. Can be deleted at any time.
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
 LOGS_DIR = os.path.join(ROOT_DIR, 'logs')
+# The canonical names of the teams of each league and their other names.
+TEAM_REGISTRY_FILE = os.path.join(DATA_DIR, 'team_registry.json')
+# The format the data is saved in between the stages of the pipeline, one of
+# src.data.data_format.data_formats.
+DATA_FORMAT = 'csv'
 
 REQUEST_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/119.0',
@@ -4,16 +4,24 @@ from typing import Annotated
 
 import typer
 from rich.progress import Progress, SpinnerColumn, TextColumn
+from src.data.features import FeatureSpec
 from src.data.fbref_processor import FbrefProcessor
 from src.data.fbref_scraper import FbrefScraper
 from src.data.fbref_cleaner import FbrefCleaner
 from settings import (
+    CACHE_DIR,
+    DATA_FORMAT,
     RAW_DATA_DIR,
     REQUEST_HEADERS,
     INTERIM_DATA_DIR,
     PROCESSED_DATA_DIR,
+    TEAM_REGISTRY_FILE,
 )
 from src.data.fbref_crawler import FbrefCrawler
+from src.data.data_format import find_data_file
+from src.data.dtype_schema import DtypeSchema
+from src.data.page_store import open_page_store
+from src.data.team_registry import TeamRegistry
 
 fbref_app = typer.Typer()
 
@@ -50,13 +58,61 @@ def crawl(
             prompt_required=True,
         ),
     ] = 1,
+    workers: Annotated[
+        int,
+        typer.Option(
+            help='The number of pages to fetch in parallel. The requests are '
+            'still limited to one every 5 seconds across all workers.',
+            show_default=True,
+        ),
+    ] = 1,
+    skip_saved_pages: Annotated[
+        bool,
+        typer.Option(
+            help='Read pages that have already been saved successfully from '
+            'disk instead of requesting them again. Useful to crawl more '
+            'seasons on top of a previous crawl.',
+            show_default=True,
+        ),
+    ] = False,
+    past_seasons_max_age_days: Annotated[
+        float,
+        typer.Option(
+            help='The number of days for which saved pages of past seasons '
+            'are considered up to date and are not requested again.',
+            show_default=True,
+        ),
+    ] = 30,
+    compress_pages: Annotated[
+        bool,
+        typer.Option(
+            help='Save the pages compressed and deduplicated. Only applies '
+            'to competitions that have not been crawled yet, the pages of '
+            'earlier crawls keep their format.',
+            show_default=True,
+        ),
+    ] = False,
 ):
+    html_folder_path = Path(RAW_DATA_DIR, 'fbref_pages', competition_name)
     fbref_crawler = FbrefCrawler(
         competition_stats_href=competition_stats_href,
-        html_folder_path=Path(RAW_DATA_DIR, 'fbref_pages', competition_name),
+        html_folder_path=html_folder_path,
         seasons_to_crawl=seasons_to_crawl,
         seconds_to_sleep_between_requests=5,
         request_headers=REQUEST_HEADERS,
+        max_workers=workers,
+        frontier_file_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'frontier.json'
+        ),
+        skip_saved_pages=skip_saved_pages,
+        http_cache_file_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'http_cache.json'
+        ),
+        past_seasons_max_age=past_seasons_max_age_days * 24 * 60 * 60,
+        manifest_file_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'manifest.json'
+        ),
+        page_store=open_page_store(html_folder_path, compress=compress_pages),
     )
     with Progress(
         SpinnerColumn(),
@@ -85,6 +141,12 @@ def recrawl(
         seasons_to_crawl=0,
         seconds_to_sleep_between_requests=5,
         request_headers=REQUEST_HEADERS,
+        http_cache_file_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'http_cache.json'
+        ),
+        manifest_file_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'manifest.json'
+        ),
     )
     with Progress(
         SpinnerColumn(),
@@ -106,11 +168,36 @@ def scrape(
             prompt_required=True,
         ),
     ] = 'Bundesliga',
+    workers: Annotated[
+        int,
+        typer.Option(
+            help='The number of processes that scrape the pages.',
+            show_default=True,
+        ),
+    ] = 1,
+    full_rebuild: Annotated[
+        bool,
+        typer.Option(
+            help='Scrape all pages, even the ones that have not changed '
+            'since the last scrape.',
+            show_default=True,
+        ),
+    ] = False,
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the scraped data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
 ):
     fbref_scraper = FbrefScraper(
         html_folder_path=Path(RAW_DATA_DIR, 'fbref_pages', competition_name),
         raw_data_folder_path=Path(RAW_DATA_DIR),
         competition=competition_name,
+        max_workers=workers,
+        cache_folder_path=Path(CACHE_DIR, 'fbref', competition_name, 'scrape'),
+        data_format=data_format,
     )
     with Progress(
         SpinnerColumn(),
@@ -118,7 +205,7 @@ def scrape(
         transient=True,
     ) as progress:
         progress.add_task(description='Scraping...', total=None)
-        fbref_scraper.scrape()
+        fbref_scraper.scrape(full_rebuild=full_rebuild)
 
 
 @fbref_app.command(help='Clean scraped football data.')
@@ -132,14 +219,33 @@ def clean(
             prompt_required=True,
         ),
     ] = 'Bundesliga',
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the cleaned data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
+    chunk_size: Annotated[
+        int,
+        typer.Option(
+            help='Clean the scraped data in chunks of this many rows, so '
+            'that it does not have to fit into memory. By default, it is '
+            'cleaned all at once.',
+            show_default=True,
+        ),
+    ] = None,
 ):
     fbref_cleaner = FbrefCleaner(
-        raw_data_file_path=Path(
-            RAW_DATA_DIR,
-            f'{competition_name.lower().replace(' ', '_')}_matches.csv',
+        raw_data_file_path=find_data_file(
+            Path(RAW_DATA_DIR),
+            f'{competition_name.lower().replace(" ", "_")}_matches',
         ),
         cleaned_data_folder_path=INTERIM_DATA_DIR,
         competition='Bundesliga',
+        data_format=data_format,
+        chunk_size=chunk_size,
+        team_registry=TeamRegistry(Path(TEAM_REGISTRY_FILE)),
     )
     with Progress(
         SpinnerColumn(),
@@ -161,13 +267,73 @@ def process(
             prompt_required=True,
         ),
     ] = 'Bundesliga',
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the processed data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
+    windows: Annotated[
+        list[int],
+        typer.Option(
+            '--window',
+            help='The number of previous matches to compute rolling averages '
+            'over. Can be given multiple times.',
+        ),
+    ] = None,
+    halflives: Annotated[
+        list[float],
+        typer.Option(
+            '--halflife',
+            help='The half-life, in matches, of exponentially weighted '
+            'averages. Can be given multiple times.',
+        ),
+    ] = None,
+    min_periods: Annotated[
+        int,
+        typer.Option(
+            help='The number of previous matches with a value an average '
+            'needs. By default, a rolling average needs a full window.',
+        ),
+    ] = None,
+    families: Annotated[
+        list[str],
+        typer.Option(
+            '--family',
+            help='The stats to create averages of: match or one of the '
+            'categories, e.g. shooting. Can be given multiple times. By '
+            'default, all stats are used.',
+        ),
+    ] = None,
+    full_rebuild: Annotated[
+        bool,
+        typer.Option(
+            help='Create the features of all matches, instead of only the '
+            'ones of matches that were played since the last run.',
+        ),
+    ] = False,
 ):
+    feature_spec = FeatureSpec(
+        windows=tuple(windows) if windows else FeatureSpec().windows,
+        halflives=tuple(halflives or ()),
+        min_periods=min_periods,
+        families=tuple(families) if families else None,
+    )
     processor = FbrefProcessor(
-        cleaned_data_file_path=Path(
-            INTERIM_DATA_DIR,
-            f'{competition_name.lower().replace(' ', '_')}_matches.csv',
+        cleaned_data_file_path=find_data_file(
+            Path(INTERIM_DATA_DIR),
+            f'{competition_name.lower().replace(" ", "_")}_matches',
         ),
         processed_data_folder_path=PROCESSED_DATA_DIR,
+        data_format=data_format,
+        feature_spec=feature_spec,
+        state_folder_path=Path(
+            CACHE_DIR, 'fbref', competition_name, 'form_features'
+        ),
+        dtype_schema=DtypeSchema(
+            Path(PROCESSED_DATA_DIR, DtypeSchema.file_name)
+        ),
     )
     with Progress(
         SpinnerColumn(),
@@ -175,4 +341,4 @@ def process(
         transient=True,
     ) as progress:
         progress.add_task(description='Processing...', total=None)
-        processor.process()
+        processor.process(full_rebuild=full_rebuild)
@@ -5,54 +5,109 @@ from typing import Annotated
 import typer
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from src.data.data_format import find_data_file
+from src.data.dtype_schema import DtypeSchema
 from src.data.football_data_co_uk_cleaner import FootballDataCoUkCleaner
 from src.data.football_data_co_uk_processor import FootballDataCoUkProcessor
 from settings import (
+    CACHE_DIR,
+    DATA_FORMAT,
     RAW_DATA_DIR,
     REQUEST_HEADERS,
     INTERIM_DATA_DIR,
     PROCESSED_DATA_DIR,
+    TEAM_REGISTRY_FILE,
 )
 from src.data.football_data_co_uk_scraper import FootballDataCoUkScraper
+from src.data.http_client import create_session
+from src.data.rate_limiter import RateLimiter
+from src.data.team_registry import TeamRegistry
 
 football_data_co_uk_app = typer.Typer()
 
 
 @football_data_co_uk_app.command(help='Scrape football data.')
 def scrape(
-    odds_href: Annotated[
-        str,
+    odds_hrefs: Annotated[
+        list[str],
         typer.Option(
-            help='The href of the odds data page to scrape.',
-            prompt='Odds href',
-            show_default=True,
-            prompt_required=True,
+            '--odds-href',
+            help='The href of the odds data page to scrape, e.g. '
+            '/englandm.php. Can be given multiple times, once per '
+            '--competition-name.',
+            show_default='/germanym.php',
         ),
-    ] = '/germanym.php',
-    competition_name: Annotated[
-        str,
+    ] = None,
+    competition_names: Annotated[
+        list[str],
         typer.Option(
+            '--competition-name',
             help='The name of the competition to scrape. This is the string'
-            'that is used next to the csv file name on the website.',
-            prompt='Competition name',
+            'that is used next to the csv file name on the website. Can be '
+            'given multiple times, once per --odds-href.',
+            show_default='Bundesliga 1',
+        ),
+    ] = None,
+    past_seasons_max_age_days: Annotated[
+        float,
+        typer.Option(
+            help='The number of days for which saved csv files of past '
+            'seasons are considered up to date and are not requested again.',
             show_default=True,
-            prompt_required=True,
         ),
-    ] = 'Bundesliga 1',
+    ] = 30,
+    workers: Annotated[
+        int,
+        typer.Option(
+            help='The number of csv files to fetch in parallel. The requests '
+            'are still limited to one every 4 seconds across all workers and '
+            'competitions.',
+            show_default=True,
+        ),
+    ] = 1,
 ):
-    scraper = FootballDataCoUkScraper(
-        odds_href=odds_href,
-        competition=competition_name,
-        raw_data_folder_path=Path(RAW_DATA_DIR),
-        request_headers=REQUEST_HEADERS,
+    odds_hrefs = odds_hrefs or ['/germanym.php']
+    competition_names = competition_names or ['Bundesliga 1']
+    if len(odds_hrefs) != len(competition_names):
+        msg = (
+            f'Got {len(odds_hrefs)} odds hrefs and {len(competition_names)} '
+            f'competition names, give one competition name per odds href.'
+        )
+        raise typer.BadParameter(msg)
+
+    seconds_to_sleep_between_requests = 4
+    # The competitions are scraped one after another, but share the session
+    # and the rate budget.
+    session = create_session(request_headers=REQUEST_HEADERS, pool_size=workers)
+    rate_limiter = RateLimiter(
+        requests_per_second=1 / seconds_to_sleep_between_requests
     )
-    with Progress(
-        SpinnerColumn(),
-        TextColumn('[progress.description]{task.description}'),
-        transient=True,
-    ) as progress:
-        progress.add_task(description='Scraping...', total=None)
-        scraper.scrape()
+    for odds_href, competition_name in zip(odds_hrefs, competition_names):
+        scraper = FootballDataCoUkScraper(
+            odds_href=odds_href,
+            competition=competition_name,
+            raw_data_folder_path=Path(RAW_DATA_DIR),
+            seconds_to_sleep_between_requests=(
+                seconds_to_sleep_between_requests
+            ),
+            request_headers=REQUEST_HEADERS,
+            session=session,
+            http_cache_file_path=Path(
+                CACHE_DIR, 'football_data_co_uk', 'http_cache.json'
+            ),
+            past_seasons_max_age=past_seasons_max_age_days * 24 * 60 * 60,
+            max_workers=workers,
+            rate_limiter=rate_limiter,
+        )
+        with Progress(
+            SpinnerColumn(),
+            TextColumn('[progress.description]{task.description}'),
+            transient=True,
+        ) as progress:
+            progress.add_task(
+                description=f'Scraping {competition_name}...', total=None
+            )
+            scraper.scrape()
 
 
 @football_data_co_uk_app.command(help='Clean scraped football data.')
@@ -66,11 +121,20 @@ def clean(
             prompt_required=True,
         ),
     ] = 'Bundesliga 1',
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the cleaned data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
 ):
     cleaner = FootballDataCoUkCleaner(
         raw_data_folder_path=Path(RAW_DATA_DIR),
         cleaned_data_folder_path=Path(INTERIM_DATA_DIR),
         competition=competition_name,
+        data_format=data_format,
+        team_registry=TeamRegistry(Path(TEAM_REGISTRY_FILE)),
     )
     with Progress(
         SpinnerColumn(),
@@ -82,10 +146,24 @@ def clean(
 
 
 @football_data_co_uk_app.command(help='Process cleaned football data.')
-def process():
+def process(
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the processed data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
+):
     processor = FootballDataCoUkProcessor(
-        cleaned_data_file_path=Path(INTERIM_DATA_DIR, 'bundesliga_1_odds.csv'),
+        cleaned_data_file_path=find_data_file(
+            Path(INTERIM_DATA_DIR), 'bundesliga_1_odds'
+        ),
         processed_data_folder_path=Path(PROCESSED_DATA_DIR),
+        data_format=data_format,
+        dtype_schema=DtypeSchema(
+            Path(PROCESSED_DATA_DIR, DtypeSchema.file_name)
+        ),
     )
     with Progress(
         SpinnerColumn(),
@@ -4,6 +4,7 @@ import typer
 
 from src.cli.football_data_co_uk import football_data_co_uk_app
 from src.cli.fbref import fbref_app
+from src.cli.processed_data import processed_data_app
 
 app = typer.Typer()
 
@@ -13,6 +14,11 @@ app.add_typer(
     name='football_data_co_uk',
     help='Manage football-data.co.uk data.',
 )
+app.add_typer(
+    processed_data_app,
+    name='processed_data',
+    help='Manage the processed data.',
+)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,95 @@
+"""Command line interface for tasks on the processed data."""
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from rich.progress import Progress, SpinnerColumn, TextColumn
+
+from settings import (
+    DATA_FORMAT,
+    PROCESSED_DATA_DIR,
+    TEAM_REGISTRY_FILE,
+)
+from src.data.data_format import find_data_file
+from src.data.dtype_schema import DtypeSchema, create_dtype_schema
+from src.data.stats_odds_joiner import StatsOddsJoiner
+from src.data.team_registry import TeamRegistry
+
+processed_data_app = typer.Typer()
+
+
+@processed_data_app.command(
+    help='Infer the smallest dtypes of the processed data and save them as '
+    'the schema that the processors and loaders apply.'
+)
+def schema():
+    with Progress(
+        SpinnerColumn(),
+        TextColumn('[progress.description]{task.description}'),
+        transient=True,
+    ) as progress:
+        progress.add_task(description='Inferring dtypes...', total=None)
+        reports = create_dtype_schema(
+            processed_data_folder_path=Path(PROCESSED_DATA_DIR),
+            schema_file_path=Path(PROCESSED_DATA_DIR, DtypeSchema.file_name),
+        )
+    typer.echo(DtypeSchema.format_memory_reports(reports))
+
+
+@processed_data_app.command(
+    help='Join the processed odds onto the processed FBref matches and report '
+    'the matches that are only in one of them.'
+)
+def join(
+    competition_name: Annotated[
+        str,
+        typer.Option(
+            help='The name of the FBref competition that was used during '
+            'crawling.',
+            show_default=True,
+        ),
+    ] = 'Bundesliga',
+    odds_competition_name: Annotated[
+        str,
+        typer.Option(
+            help='The name of the football-data.co.uk competition that was '
+            'used during scraping.',
+            show_default=True,
+        ),
+    ] = 'Bundesliga 1',
+    data_format: Annotated[
+        str,
+        typer.Option(
+            help='The format to save the joined data in: csv or parquet.',
+            show_default=True,
+        ),
+    ] = DATA_FORMAT,
+):
+    matches_name = f'{competition_name.lower().replace(" ", "_")}_matches'
+    odds_name = f'{odds_competition_name.lower().replace(" ", "_")}_odds'
+    joiner = StatsOddsJoiner(
+        matches_file_path=find_data_file(
+            Path(PROCESSED_DATA_DIR), matches_name
+        ),
+        odds_file_path=find_data_file(Path(PROCESSED_DATA_DIR), odds_name),
+        joined_data_folder_path=Path(PROCESSED_DATA_DIR),
+        # In a subfolder, so that the schema doesn't treat it as a dataset.
+        mismatch_report_file_path=Path(
+            PROCESSED_DATA_DIR,
+            'reports',
+            f'{matches_name}_odds_mismatches.csv',
+        ),
+        data_format=data_format,
+        dtype_schema=DtypeSchema(
+            Path(PROCESSED_DATA_DIR, DtypeSchema.file_name)
+        ),
+        team_registry=TeamRegistry(Path(TEAM_REGISTRY_FILE)),
+    )
+    with Progress(
+        SpinnerColumn(),
+        TextColumn('[progress.description]{task.description}'),
+        transient=True,
+    ) as progress:
+        progress.add_task(description='Joining...', total=None)
+        mismatches_df = joiner.join()
+    typer.echo(StatsOddsJoiner.format_mismatch_summary(mismatches_df))
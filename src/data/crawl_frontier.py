@@ -0,0 +1,153 @@
+"""Contains the class that keeps track of the progress of a crawl."""
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from src.data.save_schedule import SaveSchedule
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class CrawlTask(NamedTuple):
+
+    """A page that is waiting to be crawled."""
+
+    # One of 'season', 'team' or 'category'. Determines what is done with the
+    # page after it has been saved.
+    kind: str
+    href: str
+    # How many seasons back from the first crawled season the page belongs to.
+    season: int = 0
+
+
+class CrawlFrontier:
+
+    """
+    Keeps track of the pages that are waiting to be crawled and the pages that
+    have already been crawled. The state is saved to a file every few
+    completed tasks and by :meth:`save`, so an interrupted crawl can be
+    resumed. Pages that were saved after the last checkpoint are crawled
+    again on resume, but not requested again.
+    """
+
+    def __init__(
+        self, file_path: Path = None, save_schedule: SaveSchedule = None
+    ) -> None:
+        """
+        Initialize the frontier. If the file exists, the state is loaded from
+        it.
+
+        :param file_path: The path to the file to save the state to. If None,
+            the state is kept in memory only.
+        :param save_schedule: When to save the state while tasks are
+            completed. If None, it is saved every 100 tasks or 30 seconds.
+        """
+        self.file_path = file_path
+        self.save_schedule = save_schedule or SaveSchedule()
+        self.start_href = None
+        # The pending tasks by their href, in the order they were added.
+        self.pending: dict[str, CrawlTask] = {}
+        self.completed: set[str] = set()
+        # The hrefs to the stats pages of the seasons, by how many seasons
+        # back they are.
+        self.seasons: dict[int, str] = {}
+
+        if self.file_path and self.file_path.is_file():
+            self.load()
+
+    def start(self, start_href: str, tasks: list[CrawlTask]) -> None:
+        """
+        Start a new crawl. Forget the state of the previous crawl.
+
+        :param start_href: The href the crawl starts from.
+        :param tasks: The tasks to start with.
+        """
+        self.start_href = start_href
+        self.pending = {}
+        self.completed = set()
+        self.seasons = {}
+        self.add(tasks)
+        self.save()
+
+    def is_unfinished(self, start_href: str) -> bool:
+        """
+        Check whether a crawl from the given href was interrupted.
+
+        :param start_href: The href the crawl starts from.
+        :return: True if there are pending tasks left from a crawl from the
+            same href.
+        """
+        return self.start_href == start_href and len(self.pending) > 0
+
+    def add(self, tasks: list[CrawlTask]) -> list[CrawlTask]:
+        """
+        Add tasks to the pending tasks. Tasks for pages that are already
+        pending or completed are ignored.
+
+        :param tasks: The tasks to add.
+        :return: The tasks that were added.
+        """
+        added_tasks = []
+        for task in tasks:
+            if task.href in self.completed or task.href in self.pending:
+                continue
+            self.pending[task.href] = task
+            added_tasks.append(task)
+            if task.kind == 'season':
+                self.seasons[task.season] = task.href
+        return added_tasks
+
+    def complete(
+        self, task: CrawlTask, new_tasks: list[CrawlTask]
+    ) -> list[CrawlTask]:
+        """
+        Mark the task as completed and add the tasks that were discovered
+        while crawling it. The state is saved when the save schedule says so.
+
+        :param task: The completed task.
+        :param new_tasks: The tasks discovered on the page of the task.
+        :return: The discovered tasks that still have to be crawled.
+        """
+        del self.pending[task.href]
+        self.completed.add(task.href)
+        added_tasks = self.add(new_tasks)
+        if self.save_schedule.add_change():
+            self.save()
+        return added_tasks
+
+    def save(self) -> None:
+        """Save the state to the file."""
+        if not self.file_path:
+            return
+        if not self.file_path.parent.exists():
+            self.file_path.parent.mkdir(parents=True)
+
+        state = {
+            'start_href': self.start_href,
+            'pending': [list(task) for task in self.pending.values()],
+            'completed': sorted(self.completed),
+            'seasons': self.seasons,
+        }
+        # Write to a temporary file first, so that the state isn't corrupted
+        # if the crawl is interrupted while writing.
+        tmp_file_path = self.file_path.with_suffix('.tmp')
+        tmp_file_path.write_text(json.dumps(state, indent=2))
+        tmp_file_path.replace(self.file_path)
+        self.save_schedule.reset()
+
+    def load(self) -> None:
+        """Load the state from the file."""
+        state = json.loads(self.file_path.read_text())
+        self.start_href = state['start_href']
+        self.pending = {
+            task[1]: CrawlTask(*task) for task in state['pending']
+        }
+        self.completed = set(state['completed'])
+        self.seasons = {
+            int(season): href for season, href in state['seasons'].items()
+        }
+        logger.info(
+            f'Loaded crawl frontier with {len(self.pending)} pending and '
+            f'{len(self.completed)} completed pages from {self.file_path}'
+        )
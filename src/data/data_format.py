@@ -0,0 +1,475 @@
+"""Contains the formats the dataframes of the pipeline can be saved in."""
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+import pandas as pd
+
+from src.data.pipeline import copy_frame
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class DataFormat(ABC):
+
+    """
+    A format to save dataframes in between the stages of the pipeline
+    (scraping, cleaning and processing).
+    """
+
+    # The name used to select the format, for example on the command line.
+    name: str
+    extension: str
+
+    @classmethod
+    @abstractmethod
+    def save(cls, df: pd.DataFrame, file_path: Path) -> None:
+        """
+        Save the dataframe. The index is not saved.
+
+        :param df: The dataframe to save.
+        :param file_path: The path to the file.
+        """
+
+    @classmethod
+    @abstractmethod
+    def load(cls, file_path: Path, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Load a dataframe.
+
+        :param file_path: The path to the file.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :return: The dataframe.
+        """
+
+    @classmethod
+    def get_dtypes(cls, file_path: Path) -> dict[str, str] | None:
+        """
+        Get the dtypes of the columns without loading the data.
+
+        :param file_path: The path to the file.
+        :return: The dtypes by column or None if the format doesn't store
+            them.
+        """
+        return None
+
+    @classmethod
+    @abstractmethod
+    def read_chunks(
+        cls,
+        file_path: Path,
+        chunk_size: int,
+        columns: list[str] = None,
+        dtypes: dict[str, str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a dataframe in chunks of rows, so that the whole dataframe
+        doesn't have to fit into memory.
+
+        :param file_path: The path to the file.
+        :param chunk_size: The number of rows per chunk.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :param dtypes: The dtypes by column, for formats that don't store
+            them. If None, they are inferred for each chunk.
+        :return: The chunks.
+        """
+
+    @classmethod
+    @abstractmethod
+    def open_writer(cls, file_path: Path) -> 'ChunkWriter':
+        """
+        Open a writer that saves a dataframe chunk by chunk.
+
+        :param file_path: The path to the file.
+        :return: The writer.
+        """
+
+
+class ChunkWriter(ABC):
+
+    """
+    Saves a dataframe chunk by chunk. Use it as a context manager, the file
+    is complete once the writer is closed.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        """
+        Initialize the writer.
+
+        :param file_path: The path to the file.
+        """
+        self.file_path = file_path
+        self.chunks = 0
+        self.rows = 0
+
+    def __enter__(self) -> Self:
+        """
+        Start writing.
+
+        :return: The writer.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Close the writer, also if writing a chunk failed.
+
+        :param exc_type: The type of the raised exception, if any.
+        :param exc_value: The raised exception, if any.
+        :param traceback: The traceback of the exception, if any.
+        """
+        self.close()
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append the chunk to the file. The index is not saved.
+
+        :param df: The chunk.
+        """
+
+    def close(self) -> None:
+        """Finish the file."""
+
+
+class CsvFormat(DataFormat):
+
+    """
+    Saves dataframes as csv files. The dtypes are inferred again when the
+    file is loaded.
+    """
+
+    name = 'csv'
+    extension = '.csv'
+
+    @classmethod
+    def save(cls, df: pd.DataFrame, file_path: Path) -> None:
+        """
+        Save the dataframe. The index is not saved.
+
+        :param df: The dataframe to save.
+        :param file_path: The path to the file.
+        """
+        df.to_csv(file_path, index=False)
+
+    @classmethod
+    def load(cls, file_path: Path, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Load a dataframe.
+
+        :param file_path: The path to the file.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :return: The dataframe.
+        """
+        # low_memory=False is needed because some columns contain a mix of
+        # types.
+        return pd.read_csv(file_path, usecols=columns, low_memory=False)
+
+    @classmethod
+    def read_chunks(
+        cls,
+        file_path: Path,
+        chunk_size: int,
+        columns: list[str] = None,
+        dtypes: dict[str, str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a dataframe in chunks of rows, so that the whole dataframe
+        doesn't have to fit into memory.
+
+        :param file_path: The path to the file.
+        :param chunk_size: The number of rows per chunk.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :param dtypes: The dtypes by column. If None, they are inferred for
+            each chunk, so a column can have different dtypes in different
+            chunks.
+        :return: The chunks.
+        """
+        with pd.read_csv(
+            file_path,
+            chunksize=chunk_size,
+            usecols=columns,
+            dtype=dtypes,
+            low_memory=False,
+        ) as reader:
+            yield from reader
+
+    @classmethod
+    def open_writer(cls, file_path: Path) -> 'CsvChunkWriter':
+        """
+        Open a writer that saves a dataframe chunk by chunk.
+
+        :param file_path: The path to the file.
+        :return: The writer.
+        """
+        return CsvChunkWriter(file_path)
+
+
+class CsvChunkWriter(ChunkWriter):
+
+    """Saves a dataframe chunk by chunk to a csv file."""
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append the chunk to the file. The index is not saved. The header is
+        written with the first chunk.
+
+        :param df: The chunk.
+        """
+        is_first_chunk = self.chunks == 0
+        df.to_csv(
+            self.file_path,
+            mode='w' if is_first_chunk else 'a',
+            header=is_first_chunk,
+            index=False,
+        )
+        self.chunks += 1
+        self.rows += len(df)
+
+
+class ParquetFormat(DataFormat):
+
+    """
+    Saves dataframes as parquet files. The dtypes are stored in the file, and
+    columns can be loaded without reading the others.
+    """
+
+    name = 'parquet'
+    extension = '.parquet'
+
+    @classmethod
+    def save(cls, df: pd.DataFrame, file_path: Path) -> None:
+        """
+        Save the dataframe. The index is not saved.
+
+        :param df: The dataframe to save.
+        :param file_path: The path to the file.
+        """
+        cls.convert_mixed_columns(df).to_parquet(file_path, index=False)
+
+    @classmethod
+    def load(cls, file_path: Path, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Load a dataframe.
+
+        :param file_path: The path to the file.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :return: The dataframe.
+        """
+        return pd.read_parquet(file_path, columns=columns)
+
+    @classmethod
+    def get_dtypes(cls, file_path: Path) -> dict[str, str]:
+        """
+        Get the dtypes of the columns without loading the data.
+
+        :param file_path: The path to the file.
+        :return: The dtypes by column.
+        """
+        import pyarrow.parquet
+
+        schema = pyarrow.parquet.read_schema(file_path)
+        return {
+            field.name: str(field.type.to_pandas_dtype()) for field in schema
+        }
+
+    @classmethod
+    def read_chunks(
+        cls,
+        file_path: Path,
+        chunk_size: int,
+        columns: list[str] = None,
+        dtypes: dict[str, str] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a dataframe in chunks of rows, so that the whole dataframe
+        doesn't have to fit into memory.
+
+        :param file_path: The path to the file.
+        :param chunk_size: The number of rows per chunk.
+        :param columns: The columns to load. If None, all columns are loaded.
+        :param dtypes: Ignored, the dtypes are stored in the file.
+        :return: The chunks.
+        """
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(
+            batch_size=chunk_size, columns=columns
+        ):
+            yield batch.to_pandas()
+
+    @classmethod
+    def open_writer(cls, file_path: Path) -> 'ParquetChunkWriter':
+        """
+        Open a writer that saves a dataframe chunk by chunk.
+
+        :param file_path: The path to the file.
+        :return: The writer.
+        """
+        return ParquetChunkWriter(file_path)
+
+    @staticmethod
+    def convert_mixed_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the columns that contain a mix of strings and numbers, which
+        parquet can't store. They are converted the way a csv file would
+        convert them: to numbers if all values are numbers written as strings,
+        otherwise to strings.
+
+        :param df: The dataframe.
+        :return: The dataframe without mixed columns.
+        """
+        mixed_columns = [
+            column
+            for column in df.select_dtypes(include='object').columns
+            if pd.api.types.infer_dtype(df[column], skipna=True)
+            in ('mixed', 'mixed-integer')
+        ]
+        if not mixed_columns:
+            return df
+
+        df = copy_frame(df)
+        for column in mixed_columns:
+            values = df[column]
+            strings = values.where(values.isna(), values.astype(str))
+            try:
+                df[column] = pd.to_numeric(strings)
+            except (ValueError, TypeError):
+                df[column] = strings
+        logger.info(f'Converted mixed columns {mixed_columns}.')
+        return df
+
+
+class ParquetChunkWriter(ChunkWriter):
+
+    """
+    Saves a dataframe chunk by chunk to a parquet file, one row group per
+    chunk. All chunks are saved with the schema of the first chunk.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        """
+        Initialize the writer.
+
+        :param file_path: The path to the file.
+        """
+        super().__init__(file_path)
+        self.writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append the chunk to the file. The index is not saved.
+
+        :param df: The chunk.
+        """
+        import pyarrow
+        import pyarrow.parquet
+
+        df = ParquetFormat.convert_mixed_columns(df)
+        if self.writer is None:
+            schema = pyarrow.Schema.from_pandas(df, preserve_index=False)
+            # Columns without any values in the first chunk can only be
+            # strings, numeric columns have NaNs instead.
+            fields = [
+                field.with_type(pyarrow.string())
+                if pyarrow.types.is_null(field.type)
+                else field
+                for field in schema
+            ]
+            schema = pyarrow.schema(fields, metadata=schema.metadata)
+            self.writer = pyarrow.parquet.ParquetWriter(self.file_path, schema)
+
+        df = copy_frame(df)
+        for field in self.writer.schema_arrow:
+            if pyarrow.types.is_string(field.type):
+                # A string column can contain numbers in another chunk, e.g.
+                # the placeholders of future matches.
+                values = df[field.name].astype(object)
+                df[field.name] = values.where(
+                    values.isna(), values.astype(str)
+                )
+        table = pyarrow.Table.from_pandas(
+            df, schema=self.writer.schema_arrow, preserve_index=False
+        )
+        self.writer.write_table(table)
+        self.chunks += 1
+        self.rows += len(df)
+
+    def close(self) -> None:
+        """Finish the file."""
+        if self.writer is not None:
+            self.writer.close()
+
+
+data_formats: dict[str, type[DataFormat]] = {
+    data_format.name: data_format for data_format in (CsvFormat, ParquetFormat)
+}
+
+
+def get_data_format(name: str) -> type[DataFormat]:
+    """
+    Get the data format with the given name.
+
+    :param name: The name of the format, for example 'parquet'.
+    :return: The data format.
+    """
+    if name not in data_formats:
+        msg = f'Unknown data format {name}. Use one of {list(data_formats)}.'
+        raise ValueError(msg)
+    return data_formats[name]
+
+
+def get_data_format_of_file(file_path: Path) -> type[DataFormat]:
+    """
+    Get the data format of a file by its extension.
+
+    :param file_path: The path to the file.
+    :return: The data format.
+    """
+    for data_format in data_formats.values():
+        if file_path.suffix == data_format.extension:
+            return data_format
+    msg = f'Unknown data format of {file_path}.'
+    raise ValueError(msg)
+
+
+def load_dataframe(file_path: Path, columns: list[str] = None) -> pd.DataFrame:
+    """
+    Load a dataframe saved in any of the data formats.
+
+    :param file_path: The path to the file.
+    :param columns: The columns to load. If None, all columns are loaded.
+    :return: The dataframe.
+    """
+    return get_data_format_of_file(file_path).load(file_path, columns)
+
+
+def find_data_file(folder_path: Path, name: str) -> Path:
+    """
+    Find the file a dataframe was saved to, in whichever data format it was
+    saved. If it was saved in multiple formats, the latest file is used.
+
+    :param folder_path: The folder the dataframe was saved to.
+    :param name: The name of the file without the extension.
+    :return: The path to the file.
+    """
+    file_paths = [
+        Path(folder_path, f'{name}{data_format.extension}')
+        for data_format in data_formats.values()
+    ]
+    existing_file_paths = [
+        file_path for file_path in file_paths if file_path.is_file()
+    ]
+    if not existing_file_paths:
+        msg = f'No data file {name} in {folder_path}.'
+        raise FileNotFoundError(msg)
+    return max(existing_file_paths, key=lambda path: path.stat().st_mtime)
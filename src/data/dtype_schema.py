@@ -0,0 +1,354 @@
+"""
+Contains the schema of the smallest dtypes the columns of the processed data
+can be stored in.
+"""
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.data_format import data_formats, load_dataframe
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class MemoryReport(NamedTuple):
+
+    """The memory of a dataset before and after applying its dtypes."""
+
+    dataset: str
+    rows: int
+    columns: int
+    mib_before: float
+    mib_after: float
+    # The largest relative change of a numeric value.
+    max_relative_drift: float
+
+
+class DtypeSchema:
+
+    """
+    The dtypes of the columns of each processed dataset, by the name of the
+    dataset file without the extension. The dtypes are inferred once from the
+    processed data with :meth:`infer_dtypes`, saved as JSON and then applied
+    when the processors save the data and when it is loaded, see
+    :func:`load_processed_dataframe`.
+
+    The dtypes are inferred like this:
+
+    - Team, opponent and venue columns become categories.
+    - Integer columns, like the category codes, become the smallest integer
+      dtype that holds their values.
+    - Float columns become float32 if no value changes by more than
+      :attr:`float_rtol`. Unlike float16, float32 keeps the odds exact to
+      their two decimals.
+
+    Other columns keep their dtype.
+    """
+
+    # The name of the schema file in the folder of the processed data.
+    file_name = 'dtype_schema.json'
+    # The columns that become categories, also with the info_ prefix of the
+    # processed FBref data.
+    category_columns = ('team', 'opponent', 'venue')
+    integer_dtypes = ('int8', 'int16', 'int32', 'int64')
+    # The largest relative change of a value that float32 may cause.
+    float_rtol = 1e-6
+
+    def __init__(self, file_path: Path) -> None:
+        """
+        Initialize the schema. If the file exists, the dtypes are loaded from
+        it.
+
+        :param file_path: The JSON file of the schema.
+        """
+        self.file_path = file_path
+        self.dtypes: dict[str, dict[str, str]] = {}
+        if self.file_path.is_file():
+            self.dtypes = json.loads(self.file_path.read_text())
+
+    def save(self) -> None:
+        """Save the schema to its file."""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file_path.write_text(json.dumps(self.dtypes, indent=2))
+        logger.info(
+            f'Saved the dtypes of {len(self.dtypes)} datasets to '
+            f'{self.file_path}.'
+        )
+
+    def get_dtypes(self, dataset: str) -> dict[str, str] | None:
+        """
+        Get the dtypes of a dataset.
+
+        :param dataset: The name of the dataset file without the extension.
+        :return: The dtypes by column or None if the dataset is not in the
+            schema.
+        """
+        return self.dtypes.get(dataset)
+
+    def set_dtypes(self, dataset: str, dtypes: dict[str, str]) -> None:
+        """
+        Set the dtypes of a dataset. Call :meth:`save` to save them.
+
+        :param dataset: The name of the dataset file without the extension.
+        :param dtypes: The dtypes by column.
+        """
+        self.dtypes[dataset] = dtypes
+
+    def apply(self, df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+        """
+        Apply the dtypes of a dataset, see :meth:`apply_dtypes`. If the
+        dataset is not in the schema, a warning is logged and the dataframe
+        is returned as is.
+
+        :param df: The dataframe of the dataset.
+        :param dataset: The name of the dataset file without the extension.
+        :return: The dataframe with the dtypes of the schema.
+        """
+        dtypes = self.get_dtypes(dataset)
+        if dtypes is None:
+            logger.warning(f'No dtypes of {dataset} in {self.file_path}.')
+            return df
+        return self.apply_dtypes(df, dtypes)
+
+    @staticmethod
+    def infer_dtypes(df: pd.DataFrame) -> dict[str, str]:
+        """
+        Infer the smallest dtype of each column that keeps its values, see
+        :class:`DtypeSchema`.
+
+        :param df: The dataframe.
+        :return: The dtypes by column.
+        """
+        dtypes = {}
+        for column in df.columns:
+            values = df[column]
+            name = column.removeprefix('info_')
+            if name in DtypeSchema.category_columns and (
+                pd.api.types.is_object_dtype(values)
+                or isinstance(values.dtype, pd.CategoricalDtype)
+            ):
+                dtypes[column] = 'category'
+            elif pd.api.types.is_bool_dtype(values):
+                dtypes[column] = str(values.dtype)
+            elif pd.api.types.is_integer_dtype(values):
+                dtypes[column] = DtypeSchema.get_integer_dtype(
+                    values.min(), values.max()
+                )
+            elif pd.api.types.is_float_dtype(values):
+                is_float32_close = DtypeSchema.get_relative_drift(
+                    values, values.astype('float32')
+                ) <= DtypeSchema.float_rtol
+                dtypes[column] = (
+                    'float32' if is_float32_close else str(values.dtype)
+                )
+            else:
+                dtypes[column] = str(values.dtype)
+        return dtypes
+
+    @staticmethod
+    def apply_dtypes(df: pd.DataFrame, dtypes: dict[str, str]) -> pd.DataFrame:
+        """
+        Convert the columns to the categories, integers and floats of the
+        dtypes. The other dtypes of the schema are not applied, e.g. dates
+        stay datetimes even if the schema was inferred from a csv file, where
+        they are strings. Columns that are not in the dtypes keep their dtype,
+        and so do integer columns whose values don't fit anymore, for example
+        because a newer season has larger values.
+
+        :param df: The dataframe.
+        :param dtypes: The dtypes by column.
+        :return: The dataframe with the dtypes.
+        """
+        conversions = {}
+        for column, dtype in dtypes.items():
+            if column not in df.columns or str(df[column].dtype) == dtype:
+                continue
+            values = df[column]
+            if dtype == 'category':
+                conversions[column] = dtype
+            elif dtype in DtypeSchema.integer_dtypes:
+                if not pd.api.types.is_integer_dtype(values):
+                    logger.warning(
+                        f'Kept {column} as {values.dtype}, it is not an '
+                        f'integer column like in the schema.'
+                    )
+                    continue
+                fitting_dtype = DtypeSchema.get_integer_dtype(
+                    values.min(), values.max()
+                )
+                if np.dtype(fitting_dtype).itemsize > np.dtype(dtype).itemsize:
+                    logger.warning(
+                        f'Kept {column} as {values.dtype}, its values do not '
+                        f'fit into {dtype}.'
+                    )
+                    continue
+                conversions[column] = dtype
+            elif dtype == 'float32' and pd.api.types.is_float_dtype(values):
+                conversions[column] = dtype
+        if not conversions:
+            return df
+        df = df.astype(conversions)
+        logger.info(f'Converted {len(conversions)} columns to smaller dtypes.')
+        return df
+
+    @staticmethod
+    def get_integer_dtype(min_value: int, max_value: int) -> str:
+        """
+        Get the smallest integer dtype that holds the values.
+
+        :param min_value: The smallest value.
+        :param max_value: The largest value.
+        :return: The dtype, int64 if there are no values.
+        """
+        if pd.isna(min_value) or pd.isna(max_value):
+            return 'int64'
+        for dtype in DtypeSchema.integer_dtypes:
+            info = np.iinfo(dtype)
+            if info.min <= min_value and max_value <= info.max:
+                return dtype
+        return 'int64'
+
+    @staticmethod
+    def get_relative_drift(values: pd.Series, converted: pd.Series) -> float:
+        """
+        Get the largest relative change of the values by a conversion.
+
+        :param values: The values.
+        :param converted: The converted values.
+        :return: The largest relative change, infinite if a value became or
+            stopped being NaN or infinite, 0 if there are no values.
+        """
+        before = values.to_numpy(dtype='float64')
+        after = converted.to_numpy(dtype='float64')
+        is_finite = np.isfinite(before)
+        if not np.array_equal(is_finite, np.isfinite(after)):
+            return np.inf
+        before = before[is_finite]
+        after = after[is_finite]
+        if len(before) == 0:
+            return 0.0
+        # Zeros stay zeros in every float dtype.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drifts = np.abs(after - before) / np.abs(before)
+        drifts[before == 0] = np.abs(after[before == 0])
+        return float(drifts.max())
+
+    @staticmethod
+    def get_memory_report(
+        dataset: str, df: pd.DataFrame, converted_df: pd.DataFrame
+    ) -> MemoryReport:
+        """
+        Compare the memory of a dataset before and after applying its dtypes.
+
+        :param dataset: The name of the dataset.
+        :param df: The dataframe before.
+        :param converted_df: The dataframe after.
+        :return: The report.
+        """
+        numeric_columns = [
+            column
+            for column in df.columns
+            if pd.api.types.is_numeric_dtype(df[column])
+            and not pd.api.types.is_bool_dtype(df[column])
+        ]
+        return MemoryReport(
+            dataset=dataset,
+            rows=len(df),
+            columns=len(df.columns),
+            mib_before=df.memory_usage(deep=True).sum() / 2**20,
+            mib_after=converted_df.memory_usage(deep=True).sum() / 2**20,
+            max_relative_drift=max(
+                (
+                    DtypeSchema.get_relative_drift(
+                        df[column], converted_df[column]
+                    )
+                    for column in numeric_columns
+                ),
+                default=0.0,
+            ),
+        )
+
+    @staticmethod
+    def format_memory_reports(reports: list[MemoryReport]) -> str:
+        """
+        Format the memory reports as a table.
+
+        :param reports: The reports.
+        :return: The table.
+        """
+        width = max([len('Dataset'), *(len(r.dataset) for r in reports)])
+        lines = [
+            (
+                f'{"Dataset":<{width}}     Rows  Cols  MiB before  MiB after  '
+                f'Reduction  Max drift'
+            )
+        ]
+        for report in reports:
+            reduction = 1 - report.mib_after / report.mib_before
+            lines.append(
+                f'{report.dataset:<{width}}  {report.rows:>7}  '
+                f'{report.columns:>4}  {report.mib_before:>10.2f}  '
+                f'{report.mib_after:>9.2f}  {reduction:>9.0%}  '
+                f'{report.max_relative_drift:>9.1e}'
+            )
+        return '\n'.join(lines)
+
+
+def create_dtype_schema(
+    processed_data_folder_path: Path, schema_file_path: Path
+) -> list[MemoryReport]:
+    """
+    Infer the dtypes of all the processed datasets in a folder and save them
+    as a schema.
+
+    :param processed_data_folder_path: The folder of the processed data.
+    :param schema_file_path: The JSON file to save the schema to. The
+        datasets that are not in the folder anymore are kept in it.
+    :return: The memory report of each dataset.
+    """
+    extensions = [
+        data_format.extension for data_format in data_formats.values()
+    ]
+    schema = DtypeSchema(schema_file_path)
+    reports = []
+    for file_path in sorted(processed_data_folder_path.iterdir()):
+        if file_path.suffix not in extensions:
+            continue
+        df = load_dataframe(file_path)
+        dataset = file_path.stem
+        dtypes = DtypeSchema.infer_dtypes(df)
+        schema.set_dtypes(dataset, dtypes)
+        reports.append(
+            DtypeSchema.get_memory_report(
+                dataset, df, DtypeSchema.apply_dtypes(df, dtypes)
+            )
+        )
+    schema.save()
+    if reports:
+        logger.info(
+            f'Memory of the processed datasets:\n'
+            f'{DtypeSchema.format_memory_reports(reports)}'
+        )
+    return reports
+
+
+def load_processed_dataframe(
+    file_path: Path, columns: list[str] = None, schema_file_path: Path = None
+) -> pd.DataFrame:
+    """
+    Load a processed dataset in any of the data formats and apply its dtypes.
+
+    :param file_path: The path to the file.
+    :param columns: The columns to load. If None, all columns are loaded.
+    :param schema_file_path: The JSON file of the schema. If None, the schema
+        in the folder of the file is used.
+    :return: The dataframe.
+    """
+    if schema_file_path is None:
+        schema_file_path = Path(file_path.parent, DtypeSchema.file_name)
+    schema = DtypeSchema(schema_file_path)
+    return schema.apply(load_dataframe(file_path, columns), file_path.stem)
@@ -2,14 +2,31 @@
 Contains the class that is responsible for cleaning the scraped data
 from FBref.
 """
+from collections import defaultdict
+from collections.abc import Iterable
 from itertools import combinations
 from pathlib import Path
+import numpy as np
 import pandas as pd
+from settings import TEAM_REGISTRY_FILE
+from src.data.data_format import (
+    get_data_format,
+    get_data_format_of_file,
+    load_dataframe,
+)
+from src.data.pipeline import Pipeline, copy_frame
+from src.data.team_registry import TeamRegistry
 from src.log import get_logger
 
 
 logger = get_logger(__name__)
 
+# Matches the goals like '1', '1.0' or '1 (3)', where 3 is the number of
+# penalties scored in a penalty shootout.
+goals_pattern = (
+    r'^\s*(?P<goals>-?\d+)(?:\.0*)?(?:\s*\((?P<penalties>\d+)\))?\s*$'
+)
+
 
 class FbrefCleaner:
 
@@ -20,6 +37,9 @@ class FbrefCleaner:
         raw_data_file_path: Path,
         cleaned_data_folder_path: Path,
         competition: str = None,
+        data_format: str = 'csv',
+        chunk_size: int = None,
+        team_registry: TeamRegistry = None,
     ) -> None:
         """
         Initialize the cleaner.
@@ -30,50 +50,254 @@ class FbrefCleaner:
             cleaned data.
         :param competition: The competition to narrow down to. If None, all
             competitions will be kept.
+        :param data_format: The format to save the cleaned data in, one of
+            :data:`data_formats`. The raw data can be in any format.
+        :param chunk_size: The number of rows of the raw data to clean at
+            once. If None, the raw data is loaded and cleaned all at once.
+        :param team_registry: The registry to normalize the team names with.
+            If None, the registry in TEAM_REGISTRY_FILE is loaded.
         """
         self.raw_data_file_path = raw_data_file_path
         self.cleaned_data_folder_path = cleaned_data_folder_path
         self.competition = competition
+        self.data_format = get_data_format(data_format)
+        self.chunk_size = chunk_size
+        if team_registry is None:
+            team_registry = TeamRegistry(Path(TEAM_REGISTRY_FILE))
+        self.team_registry = team_registry
 
     def clean(self) -> None:
-        """Clean the data."""
-        # low_memory=False is needed because some columns contain a mix of
-        # types.
-        matches_df = pd.read_csv(self.raw_data_file_path, low_memory=False)
-
-        # Column operations.
-        matches_df = self.normalize_column_names(matches_df)
-        matches_df = self.drop_equal_columns(matches_df)
-        matches_df = self.drop_irrelevant_columns(matches_df)
-        matches_df = self.create_penalties_columns_from_goals_columns(
-            matches_df
-        )
+        """Clean the data, in chunks if a chunk size was given."""
+        if self.chunk_size is not None:
+            self.clean_in_chunks()
+            return
+
+        with Pipeline('FbrefCleaner.clean') as pipeline:
+            matches_df = pipeline.run_step(
+                load_dataframe, self.raw_data_file_path
+            )
 
-        # Row operations.
-        matches_df = self.narrow_down_to_single_competition(
-            matches_df, self.competition
-        )
-        matches_df = self.normalize_team_names(matches_df)
-        matches_df = self.remove_rows_with_lots_of_missing_values(
-            matches_df, threshold=10
-        )
+            # Column operations.
+            matches_df = pipeline.run_step(
+                self.normalize_column_names, matches_df
+            )
+            matches_df = pipeline.run_step(self.drop_equal_columns, matches_df)
+            matches_df = pipeline.run_step(
+                self.drop_irrelevant_columns, matches_df
+            )
+            matches_df = pipeline.run_step(self.parse_goals_columns, matches_df)
 
-        # Convert goals columns to int. It's a column operation, but it has to
-        # be done after the row operations because the goals columns contain
-        # NaNs.
-        matches_df = self.convert_goals_columns_to_int(matches_df)
+            # Row operations.
+            matches_df = pipeline.run_step(
+                self.narrow_down_to_single_competition,
+                matches_df,
+                self.competition,
+            )
+            matches_df = pipeline.run_step(
+                self.normalize_team_names, matches_df, self.team_registry
+            )
+            matches_df = pipeline.run_step(
+                self.remove_rows_with_lots_of_missing_values,
+                matches_df,
+                threshold=10,
+            )
 
-        # Save.
-        save_path = Path(
-            self.cleaned_data_folder_path, self.raw_data_file_path.name
-        )
-        matches_df.to_csv(save_path, index=False)
+            # Save.
+            save_path = self.get_save_path()
+            pipeline.run_step(self.data_format.save, matches_df, save_path)
         logger.info(
             f'Saved {matches_df.shape[0]} rows and {matches_df.shape[1]} cols '
             f'of data to {save_path}.'
         )
         logger.info('DONE')
 
+    def clean_in_chunks(self) -> None:
+        """
+        Clean the data chunk by chunk, so that only a chunk of the raw data
+        has to fit into memory. The result is the same as the one of
+        :meth:`clean`. The raw data is read up to three times: to infer the
+        dtypes of the columns if the format doesn't store them, to find the
+        columns to keep and to clean the rows.
+        """
+        raw_data_format = get_data_format_of_file(self.raw_data_file_path)
+        with Pipeline('FbrefCleaner.clean_in_chunks') as pipeline:
+            dtypes = raw_data_format.get_dtypes(self.raw_data_file_path)
+            if dtypes is None:
+                dtypes = pipeline.run_step(
+                    self.infer_dtypes,
+                    raw_data_format.read_chunks(
+                        self.raw_data_file_path, self.chunk_size
+                    ),
+                )
+            columns = pipeline.run_step(
+                self.get_column_plan,
+                raw_data_format.read_chunks(
+                    self.raw_data_file_path, self.chunk_size, dtypes=dtypes
+                ),
+            )
+            logger.info(f'Keeping {len(columns)} of {len(dtypes)} columns.')
+
+            # Write to a temporary file first, so that there is no incomplete
+            # file if cleaning fails.
+            save_path = self.get_save_path()
+            tmp_save_path = save_path.with_name(f'{save_path.name}.tmp')
+            teams = set()
+            opponents = set()
+            future_matches_dfs = []
+            try:
+                with self.data_format.open_writer(tmp_save_path) as writer:
+                    for matches_df in raw_data_format.read_chunks(
+                        self.raw_data_file_path,
+                        self.chunk_size,
+                        columns=list(columns),
+                        dtypes=dtypes,
+                    ):
+                        matches_df = self.clean_chunk(
+                            pipeline, matches_df.rename(columns=columns)
+                        )
+                        teams.update(matches_df['team'].dropna())
+                        opponents.update(matches_df['opponent'].dropna())
+                        matches_df, future_matches_df = pipeline.run_step(
+                            self.split_future_matches, matches_df
+                        )
+                        matches_df = pipeline.run_step(
+                            self.drop_rows_with_lots_of_missing_values,
+                            matches_df,
+                            threshold=10,
+                        )
+                        pipeline.run_step(writer.write, matches_df)
+                        future_matches_dfs.append(future_matches_df)
+
+                    # The teams can only be checked once all rows were seen.
+                    self.check_team_names(sorted(teams), sorted(opponents))
+                    future_matches_df = pipeline.run_step(
+                        self.get_next_matches, pd.concat(future_matches_dfs)
+                    )
+                    # Grouping moved the team column to the front.
+                    writer.write(future_matches_df[matches_df.columns])
+                    logger.info(
+                        f'Added {future_matches_df.shape[0]} rows of future '
+                        'matches back.'
+                    )
+            except BaseException:
+                tmp_save_path.unlink(missing_ok=True)
+                raise
+            tmp_save_path.replace(save_path)
+        logger.info(
+            f'Saved {writer.rows} rows and {len(matches_df.columns)} cols of '
+            f'data to {save_path}.'
+        )
+        logger.info('DONE')
+
+    def clean_chunk(
+        self, pipeline: Pipeline, matches_df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Run the steps of :meth:`clean` on a chunk that only depend on the
+        rows of the chunk.
+
+        :param pipeline: The pipeline to run the steps in.
+        :param matches_df: The chunk, with the columns of the column plan.
+        :return: The cleaned chunk, with past and future matches.
+        """
+        matches_df = pipeline.run_step(self.parse_goals_columns, matches_df)
+        matches_df = pipeline.run_step(
+            self.narrow_down_to_single_competition,
+            matches_df,
+            self.competition,
+        )
+        return pipeline.run_step(
+            self.normalize_team_names,
+            matches_df,
+            self.team_registry,
+            check_teams=False,
+        )
+
+    def get_save_path(self) -> Path:
+        """
+        Get the path to save the cleaned data to.
+
+        :return: The path.
+        """
+        return Path(
+            self.cleaned_data_folder_path,
+            f'{self.raw_data_file_path.stem}{self.data_format.extension}',
+        )
+
+    @staticmethod
+    def infer_dtypes(chunks: Iterable[pd.DataFrame]) -> dict[str, str]:
+        """
+        Infer the dtypes the columns get when the whole csv file is loaded
+        at once. When it is loaded in chunks, the dtypes are inferred for
+        each chunk, so a column can be int in one chunk and float or object
+        in another.
+
+        :param chunks: The chunks of the csv file, with inferred dtypes.
+        :return: The dtypes by column.
+        """
+        dtypes_of_chunks = defaultdict(set)
+        for chunk in chunks:
+            for column, dtype in chunk.dtypes.items():
+                dtypes_of_chunks[column].add(str(dtype))
+
+        dtypes = {}
+        for column, chunk_dtypes in dtypes_of_chunks.items():
+            if len(chunk_dtypes) == 1:
+                dtypes[column] = chunk_dtypes.pop()
+            elif chunk_dtypes <= {'int64', 'float64'}:
+                # Integers with missing values become floats.
+                dtypes[column] = 'float64'
+            else:
+                dtypes[column] = 'object'
+        return dtypes
+
+    @staticmethod
+    def get_column_plan(chunks: Iterable[pd.DataFrame]) -> dict[str, str]:
+        """
+        Get the columns that the column operations of :meth:`clean` keep.
+        Columns are only dropped as equal columns if they are equal in all
+        chunks, a sample of the rows isn't enough. For example, some stats
+        are missing in all matches of the early seasons.
+
+        :param chunks: The chunks of the raw data.
+        :return: The normalized names of the kept columns by their names in
+            the raw data, in the order of the raw data. Empty if there are no
+            chunks.
+        """
+        raw_columns = None
+        equal_cols = None
+        for chunk in chunks:
+            raw_columns = chunk.columns
+            if chunk.empty:
+                # E.g. the only chunk of a file with just a header. Columns
+                # without values would all count as equal.
+                continue
+            chunk = FbrefCleaner.normalize_column_names(chunk)
+            chunk_equal_cols = set(
+                FbrefCleaner.get_list_of_equal_columns(chunk)
+            )
+            if equal_cols is None:
+                equal_cols = chunk_equal_cols
+            else:
+                equal_cols &= chunk_equal_cols
+        if raw_columns is None:
+            return {}
+        if equal_cols is None:
+            equal_cols = set()
+
+        # Run the column operations on an empty dataframe with the columns.
+        df = FbrefCleaner.normalize_column_names(
+            pd.DataFrame(columns=raw_columns)
+        )
+        raw_columns_by_name = dict(zip(df.columns, raw_columns))
+        positions = {column: i for i, column in enumerate(df.columns)}
+        list_of_equal_cols = sorted(
+            equal_cols, key=lambda cols: [positions[col] for col in cols]
+        )
+        df = FbrefCleaner.drop_equal_columns(df, list_of_equal_cols)
+        df = FbrefCleaner.drop_irrelevant_columns(df)
+        return {raw_columns_by_name[column]: column for column in df.columns}
+
     @staticmethod
     def normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -84,7 +308,7 @@ class FbrefCleaner:
         :param df: DataFrame to normalize the column names of.
         :return: DataFrame with normalized column names.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df.columns = df.columns.str.strip()
         df.columns = df.columns.str.replace(r'\s+', ' ', regex=True)
         df.columns = df.columns.str.lower()
@@ -98,15 +322,21 @@ class FbrefCleaner:
         return df
 
     @staticmethod
-    def drop_equal_columns(df: pd.DataFrame) -> pd.DataFrame:
+    def drop_equal_columns(
+        df: pd.DataFrame, list_of_equal_cols: list[tuple[str, str]] = None
+    ) -> pd.DataFrame:
         """
         Drop columns that are equal (have the same values).
 
         :param df: DataFrame to drop equal columns from.
+        :param list_of_equal_cols: List of equal columns, as returned by
+            :meth:`get_list_of_equal_columns`. If None, it is determined from
+            the DataFrame.
         :return: DataFrame with equal columns dropped.
         """
-        df = df.copy()
-        list_of_equal_cols = FbrefCleaner.get_list_of_equal_columns(df)
+        df = copy_frame(df)
+        if list_of_equal_cols is None:
+            list_of_equal_cols = FbrefCleaner.get_list_of_equal_columns(df)
         cols_to_drop = [j for i, j in list_of_equal_cols]
         df.drop(columns=cols_to_drop, inplace=True)
         logger.info(f'Dropped equal columns {cols_to_drop}.')
@@ -131,13 +361,57 @@ class FbrefCleaner:
     def get_list_of_equal_columns(df: pd.DataFrame) -> list[tuple[str, str]]:
         """
         Get a list of equal columns. Columns are considered equal if they have
-        the same values. Borrowed from:
-        https://stackoverflow.com/a/58002867/9553927.
+        the same values, as determined by Series.equals. Instead of comparing
+        every pair of columns, the columns are grouped by the hash of their
+        values and only the columns within a group are compared.
 
         :param df: DataFrame to get the list of equal columns from.
-        :return: List of equal columns.
+        :return: List of equal columns, ordered like the pairs of
+            itertools.combinations.
         """
-        return [(i, j) for i, j in combinations(df, 2) if df[i].equals(df[j])]
+        columns_by_hash = defaultdict(list)
+        for position, (_, column) in enumerate(df.items()):
+            column_hash = FbrefCleaner.get_column_hash(column)
+            columns_by_hash[column_hash].append(position)
+
+        equal_positions = [
+            (i, j)
+            for positions in columns_by_hash.values()
+            for i, j in combinations(positions, 2)
+            if df.iloc[:, i].equals(df.iloc[:, j])
+        ]
+        return [
+            (df.columns[i], df.columns[j]) for i, j in sorted(equal_positions)
+        ]
+
+    @staticmethod
+    def get_column_hash(column: pd.Series) -> int:
+        """
+        Hash the values of a column. Columns that Series.equals considers
+        equal have the same hash, columns with the same hash are not
+        necessarily equal.
+
+        :param column: The column to hash.
+        :return: The hash.
+        """
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'biufmM':
+            values = column.to_numpy()
+            if column.dtype.kind == 'f':
+                # Equal floats can have different bits, like 0.0 and -0.0 or
+                # NaNs with different payloads.
+                values = np.where(np.isnan(values), np.nan, values) + 0.0
+            return hash(values.tobytes())
+
+        # Series.equals considers values like 1 and 1.0 or None and NaN equal
+        # in object columns. Python's hash is equal for equal values.
+        values = column.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        try:
+            return hash(tuple(values))
+        except TypeError:
+            # Unhashable values, the column has to be compared with all
+            # columns with unhashable values.
+            return 0
 
     @staticmethod
     def drop_irrelevant_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -147,7 +421,7 @@ class FbrefCleaner:
         :param df: DataFrame to drop irrelevant columns from.
         :return: DataFrame with irrelevant columns dropped.
         """
-        df = df.copy()
+        df = copy_frame(df)
         regex = '.*(notes|match_report).*'
         cols_to_drop = df.filter(regex=regex).columns
         df.drop(cols_to_drop, axis=1, inplace=True)
@@ -155,55 +429,31 @@ class FbrefCleaner:
         return df
 
     @staticmethod
-    def create_penalties_columns_from_goals_columns(
-        df: pd.DataFrame,
-    ) -> pd.DataFrame:
+    def parse_goals_columns(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Split the goals columns into goals and penalties columns. Some goal rows
-        are described as '1 (3)' which means that the team scored 1 goal and 3
-        penalties. We want to split these into two columns: 'gf' and 'pen_gf'.
-        Same for 'ga' and 'pen_ga'. If there are no penalties, the value will be
-        -1.
-
-        :param df: DataFrame to split the goals columns of.
-        :return: DataFrame with goals columns split into goals and penalties
+        Parse the goals columns 'gf' and 'ga' into goals and penalties
+        columns. Some goal rows are described as '1 (3)' which means that the
+        team scored 1 goal and 3 penalties, others as floats like '1.0'. The
+        goals stay in 'gf' and 'ga', the penalties go into 'pen_gf' and
+        'pen_ga'. If there are no penalties, the value will be -1. All four
+        columns are nullable integers, so matches without a score are kept.
+
+        :param df: DataFrame to parse the goals columns of.
+        :return: DataFrame with goals and penalties columns.
         """
-        df = df.copy()
-        df['pen_gf'] = df['gf'].str.extract(r'\((\d+)\)')
-        df['pen_ga'] = df['ga'].str.extract(r'\((\d+)\)')
-
-        # Fill NaNs with -1s. 0 would be a valid value, so we can't use that.
-        df['pen_gf'].fillna(-1, inplace=True)
-        df['pen_ga'].fillna(-1, inplace=True)
-        logger.info('Split goals columns into goals and penalties columns.')
-        return df
-
-    @staticmethod
-    def convert_goals_columns_to_int(df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Convert the goals columns to int. They are currently strings because
-        they contain the number of penalties in parentheses or the goals
-        as a float (e.g. '1.0').
-
-        :param df: DataFrame to convert the goals columns of.
-        :return: DataFrame with goals columns converted to int.
-        """
-        df = df.copy()
-        goals_cols = ['gf', 'ga']
-
-        def convert_goals_column_to_int(x: str) -> int:
-            if isinstance(x, int):
-                return x
-            if ' ' in x:
-                x = x.split(' ')[0]
-            if '.' in x:
-                x = x.split('.')[0]
-            return int(x)
-
-        for col in goals_cols:
-            df[col] = df[col].apply(convert_goals_column_to_int)
-
-        logger.info(f'Converted goals columns({goals_cols}) to int.')
+        df = copy_frame(df)
+        for col in ['gf', 'ga']:
+            scores = (
+                df[col]
+                .astype('string')
+                .str.extract(goals_pattern)
+                .astype('Int8')
+            )
+            df[col] = scores['goals']
+            # Fill NaNs with -1s. 0 would be a valid value, so we can't use
+            # that.
+            df[f'pen_{col}'] = scores['penalties'].fillna(-1)
+        logger.info('Parsed goals columns into goals and penalties columns.')
         return df
 
     @staticmethod
@@ -217,7 +467,7 @@ class FbrefCleaner:
         :param competition: Competition to narrow down to.
         :return: DataFrame narrowed down to a single competition.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df = df[df['comp'] == competition]
         logger.info(f'Narrowed down to {competition} competition.')
         return df
@@ -235,21 +485,47 @@ class FbrefCleaner:
             gets dropped.
         :return: DataFrame with rows with lots of missing values removed.
         """
-        df = df.copy()
+        df, future_matches = FbrefCleaner.split_future_matches(df)
+        df = FbrefCleaner.drop_rows_with_lots_of_missing_values(df, threshold)
+        future_matches = FbrefCleaner.get_next_matches(future_matches)
+        df = pd.concat([df, future_matches])
+        logger.info(
+            f'Added {future_matches.shape[0]} rows of future matches back.'
+        )
+        return df
+
+    @staticmethod
+    def split_future_matches(
+        df: pd.DataFrame,
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split the matches into past and future matches. Rows without a team
+        or opponent are dropped and the date column is converted to datetime.
+
+        :param df: DataFrame to split.
+        :return: DataFrames of the past and the future matches.
+        """
+        df = copy_frame(df)
         # Drop rows where team or opponent is NaN.
         df = df.dropna(subset=['team'])
         df = df.dropna(subset=['opponent'])
         # Convert date column to datetime.
         df['date'] = pd.to_datetime(df['date'])
-        # Rows of future matches will have lots of missing values, however, we
-        # want to keep them because we want to predict them. Extract one match
-        # per team that is after now and keep those rows.
-        future_matches = df[df['date'] > pd.Timestamp.now()]
-        # Resetting index to make 'team' a regular column.
-        future_matches = future_matches.groupby('team').first().reset_index()
-        # Fill with -1 as we don't care about the values. This is the future.
-        future_matches = future_matches.fillna(-1)
-        df = df[df['date'] <= pd.Timestamp.now()]
+        now = pd.Timestamp.now()
+        return df[df['date'] <= now], df[df['date'] > now]
+
+    @staticmethod
+    def drop_rows_with_lots_of_missing_values(
+        df: pd.DataFrame, threshold: int
+    ) -> pd.DataFrame:
+        """
+        Drop the rows that have more than `threshold` missing values.
+
+        :param df: DataFrame of past matches.
+        :param threshold: Amount of missing values a row can have before it
+            gets dropped.
+        :return: DataFrame with rows with lots of missing values dropped.
+        """
         # Threshold is the amount of missing values a row can have before it
         # gets dropped. So we need to subtract the threshold from the total
         # amount of columns.
@@ -260,38 +536,66 @@ class FbrefCleaner:
             f'Dropped {initial_amount_of_rows - df.shape[0]} rows with '
             f'{threshold} or more missing values.'
         )
-        df = pd.concat([df, future_matches])
-        logger.info(
-            f'Added {future_matches.shape[0]} rows of future matches back.'
-        )
         return df
 
     @staticmethod
-    def normalize_team_names(df: pd.DataFrame) -> pd.DataFrame:
+    def get_next_matches(future_matches: pd.DataFrame) -> pd.DataFrame:
+        """
+        Get the next match of each team. Rows of future matches have lots of
+        missing values, however, we want to keep them because we want to
+        predict them.
+
+        :param future_matches: DataFrame of future matches.
+        :return: DataFrame with one match per team.
         """
-        Normalize the team names. For example, 'Düsseldorf' becomes
-        'Dusseldorf'.
+        # Resetting index to make 'team' a regular column.
+        future_matches = future_matches.groupby('team').first().reset_index()
+        # Fill with -1 as we don't care about the values. This is the future.
+        return future_matches.fillna(-1)
+
+    @staticmethod
+    def normalize_team_names(
+        df: pd.DataFrame,
+        team_registry: TeamRegistry = None,
+        check_teams: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Normalize the team names with the registry. For example, 'Düsseldorf'
+        becomes 'Dusseldorf'.
 
         :param df: DataFrame to normalize the team names of.
+        :param team_registry: The registry of the names of the teams. If None,
+            the registry in TEAM_REGISTRY_FILE is loaded.
+        :param check_teams: Whether to check that there are as many teams as
+            opponents, see :meth:`check_team_names`.
         :return: DataFrame with normalized team names.
         """
-        df = df.copy()
-        mapping = {
-            'Düsseldorf': 'Dusseldorf',
-            'Eint Frankfurt': 'Eintracht Frankfurt',
-            'Greuther Fürth': 'Greuther Furth',
-            'Köln': 'Koln',
-            "M'Gladbach": 'Monchengladbach',
-            'Nürnberg': 'Nurnberg',
-            'Leverkusen': 'Bayer Leverkusen',
-        }
-        # Normalize team name or leave as is if not in mapping.
-        df['opponent'] = df['opponent'].map(mapping).fillna(df['opponent'])
-
-        teams = df['team'].unique().tolist()
-        opponents = df['opponent'].unique().tolist()
-        teams.sort()
-        opponents.sort()
+        df = copy_frame(df)
+        if team_registry is None:
+            team_registry = TeamRegistry(Path(TEAM_REGISTRY_FILE))
+        # The teams already have their canonical names on FBref, only the
+        # opponents have short ones.
+        df['opponent'] = team_registry.normalize(df['opponent'])
+
+        if check_teams:
+            teams = df['team'].unique().tolist()
+            opponents = df['opponent'].unique().tolist()
+            teams.sort()
+            opponents.sort()
+            FbrefCleaner.check_team_names(teams, opponents)
+
+        logger.info('Normalized team names.')
+        return df
+
+    @staticmethod
+    def check_team_names(teams: list[str], opponents: list[str]) -> None:
+        """
+        Check that there are as many teams as opponents. If not, some team
+        names are missing from the team registry.
+
+        :param teams: The sorted names of the teams.
+        :param opponents: The sorted names of the opponents.
+        """
         if len(teams) != len(opponents):
             msg = (
                 f'Amount of teams ({len(teams)}) and opponents '
@@ -301,6 +605,3 @@ class FbrefCleaner:
                 f'\nDifference: {set(teams) ^ set(opponents)}'
             )
             raise ValueError(msg)
-
-        logger.info('Normalized team names.')
-        return df
@@ -1,5 +1,8 @@
 """Contains the class that is responsible for crawling FBref."""
 
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from time import sleep
 
@@ -7,7 +10,13 @@ import requests
 from bs4 import BeautifulSoup
 
 from src.log import get_logger
+from src.data.crawl_frontier import CrawlFrontier, CrawlTask
 from src.data.fbref import categories
+from src.data.http_cache import HttpCache
+from src.data.http_client import create_session
+from src.data.page_manifest import PageManifest
+from src.data.page_store import PageStore, open_page_store
+from src.data.rate_limiter import RateLimiter
 
 logger = get_logger(__name__)
 
@@ -21,6 +30,10 @@ class FbrefCrawler:
 
     # The base URL of the website.
     base_url: str = 'https://fbref.com'
+    # FBref responds with a page with a '403 error' heading when it blocks the
+    # requests.
+    error_page_pattern = re.compile(r'<h1[^>]*>[^<]*403 error')
+    error_page_bytes_pattern = re.compile(error_page_pattern.pattern.encode())
 
     def __init__(
         self,
@@ -29,6 +42,14 @@ class FbrefCrawler:
         seasons_to_crawl: int = 1,
         seconds_to_sleep_between_requests: int = 4,
         request_headers: dict[str, str] = None,
+        max_workers: int = 1,
+        session: requests.Session = None,
+        frontier_file_path: Path = None,
+        skip_saved_pages: bool = False,
+        http_cache_file_path: Path = None,
+        past_seasons_max_age: float = None,
+        manifest_file_path: Path = None,
+        page_store: PageStore = None,
     ) -> None:
         """
         Initialize the crawler.
@@ -48,16 +69,60 @@ class FbrefCrawler:
             the server.
         :param request_headers: The headers to use for the requests. It is
             recommended to pass a User-Agent header.
+        :param max_workers: The number of pages to fetch in parallel. If it is
+            greater than 1, the pages are fetched by a pool of workers that
+            share a rate limiter of one request per
+            seconds_to_sleep_between_requests instead of sleeping after each
+            request.
+        :param session: The session to make the requests with. If None, a
+            session with a connection pool for max_workers connections is
+            created.
+        :param frontier_file_path: The path to the file where the progress of
+            the crawl is saved. If a crawl from the same competition_stats_href
+            was interrupted, the crawl continues from where it stopped. If
+            None, the progress is not saved.
+        :param skip_saved_pages: Whether to read pages that have already been
+            saved successfully from disk instead of requesting them again.
+            This is always done when an interrupted crawl is resumed.
+        :param http_cache_file_path: The path to the file where the ETag and
+            Last-Modified headers of the saved pages are kept. They are sent
+            with the next request for the same page and the page isn't saved
+            again if the server responds with 304 Not Modified. If None, the
+            headers are only kept for the current crawl.
+        :param past_seasons_max_age: The number of seconds for which saved
+            pages of past seasons are considered up to date and are not
+            requested at all. If None, they are always requested.
+        :param manifest_file_path: The path to the file where the health of
+            the saved pages is recorded, so errored pages can be found without
+            reading all pages. If None, the health is only recorded for the
+            current crawl.
+        :param page_store: The store to save the pages to. If None, the store
+            in html_folder_path is opened. It keeps the pages as plain HTML
+            files, unless the folder contains compressed pages.
         """
         self.competition_stats_href = competition_stats_href
         self.html_folder_path = html_folder_path
-        if not self.html_folder_path.exists():
-            self.html_folder_path.mkdir(parents=True)
-            logger.info(f'Created folder {self.html_folder_path}')
+        self.page_store = page_store or open_page_store(self.html_folder_path)
 
         self.seasons_to_crawl = seasons_to_crawl
         self.seconds_to_sleep = seconds_to_sleep_between_requests
         self.request_headers = request_headers
+        self.max_workers = max_workers
+        # Only the concurrent crawl is rate limited. The sequential crawl
+        # sleeps after each request instead.
+        self.rate_limiter = (
+            RateLimiter(requests_per_second=1 / self.seconds_to_sleep)
+            if self.max_workers > 1
+            else None
+        )
+        self.session = session or create_session(
+            request_headers=self.request_headers, pool_size=self.max_workers
+        )
+        self.frontier = CrawlFrontier(frontier_file_path)
+        self.skip_saved_pages = skip_saved_pages
+        self.http_cache = HttpCache(http_cache_file_path)
+        self.past_seasons_max_age = past_seasons_max_age
+        self.manifest = PageManifest(manifest_file_path)
 
     def crawl(self) -> None:
         """
@@ -65,65 +130,272 @@ class FbrefCrawler:
         crawl the team page and the page for each category. Then crawl the
         previous season.
         """
-        current_season_stats_href = self.competition_stats_href
+        if self.seasons_to_crawl < 1:
+            return
 
-        for _ in range(self.seasons_to_crawl):
-            stats_page_html = self.save_page(current_season_stats_href)
-            stats_page_soup = BeautifulSoup(
-                stats_page_html, features='html.parser'
+        if self.frontier.is_unfinished(self.competition_stats_href):
+            logger.info(
+                f'Resuming crawl with {len(self.frontier.pending)} pending '
+                f'pages'
             )
-            teams_hrefs = self.get_teams_hrefs(stats_page_soup)
-
-            for team_href in teams_hrefs:
-                self.crawl_team(team_href)
-
-            # Point to the previous season for the next iteration.
-            current_season_stats_href = self.get_href_to_previous_season(
-                stats_page_soup
+            # Pages saved after the last checkpoint don't have to be
+            # requested again.
+            self.skip_saved_pages = True
+        else:
+            self.frontier.start(
+                self.competition_stats_href,
+                [CrawlTask('season', self.competition_stats_href)],
             )
+        tasks = list(self.frontier.pending.values())
+
+        try:
+            if self.max_workers > 1:
+                self.crawl_concurrently(tasks)
+            else:
+                self.crawl_sequentially(tasks)
+        finally:
+            self.save_progress()
 
         logger.info('DONE')
 
-    def recrawl_errored_pages(self) -> None:
+    def crawl_sequentially(self, tasks: list[CrawlTask]) -> None:
+        """
+        Crawl the given tasks and the tasks they discover one at a time. New
+        tasks are crawled right after the task that discovered them, so a
+        team's categories are crawled before the next team.
+
+        :param tasks: The tasks to start from.
+        """
+        queue = deque(tasks)
+        while queue:
+            task = queue.popleft()
+            new_tasks = self.frontier.complete(task, self.crawl_task(task))
+            queue.extendleft(reversed(new_tasks))
+
+    def crawl_concurrently(self, tasks: list[CrawlTask]) -> None:
+        """
+        Crawl the given tasks and the tasks they discover with a pool of
+        workers. A task is submitted as soon as the page that links to it has
+        been crawled.
+
+        :param tasks: The tasks to start from.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending: dict[Future, CrawlTask] = {
+                executor.submit(self.crawl_task, task): task for task in tasks
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # The frontier is only updated from this thread.
+                    new_tasks = self.frontier.complete(
+                        pending.pop(future), future.result()
+                    )
+                    for task in new_tasks:
+                        pending[executor.submit(self.crawl_task, task)] = task
+
+    def crawl_task(self, task: CrawlTask) -> list[CrawlTask]:
+        """
+        Save the page of the given task and find the pages it links to.
+
+        :param task: The task to crawl.
+        :return: The tasks discovered on the page.
+        """
+        if task.kind == 'season':
+            return self.crawl_season(task.href, task.season)
+        if task.kind == 'team':
+            return self.crawl_team(task.href, task.season)
+        self.get_page(task.href, task.season)
+        return []
+
+    def crawl_season(self, stats_href: str, season: int) -> list[CrawlTask]:
+        """
+        Crawl the stats page of a season. Discover the teams of the season and
+        the stats page of the previous season, if it should be crawled too.
+
+        :param stats_href: The href to the stats page of the season.
+        :param season: How many seasons back the season is.
+        :return: The tasks for the teams and the previous season.
+        """
+        stats_page_html = self.get_page(stats_href, season)
+        stats_page_soup = BeautifulSoup(stats_page_html, features='html.parser')
+
+        tasks = [
+            CrawlTask('team', team_href, season)
+            for team_href in self.get_teams_hrefs(stats_page_soup)
+        ]
+        if season + 1 < self.seasons_to_crawl:
+            tasks.append(
+                CrawlTask(
+                    'season',
+                    self.get_href_to_previous_season(stats_page_soup),
+                    season + 1,
+                )
+            )
+        return tasks
+
+    def recrawl_errored_pages(self, max_attempts: int = 3) -> list[str]:
         """
         Recrawl all pages that were not crawled successfully. This is useful
-        if the crawler was interrupted and some pages were not crawled.
-        """
-        # TODO: Can be optimized by using grep or something similar.
-        for file_path in self.html_folder_path.glob('**/*.html'):
-            logger.info(f'Checking {file_path}')
-            with open(file_path, 'r') as f:
-                html = f.read()
-            soup = BeautifulSoup(html, features='html.parser')
-            if soup.select_one('h1:-soup-contains("403 error")'):
-                fixed_page = False
-                while not fixed_page:
-                    logger.info(f'Recrawling {file_path}')
-                    href = self.convert_file_name_to_href(file_path.name)
-                    html = self.save_page(href)
-                    soup = BeautifulSoup(html, features='html.parser')
-                    if not soup.select_one('h1:-soup-contains("403 error")'):
-                        fixed_page = True
+        if the crawler was interrupted and some pages were not crawled. If a
+        page is still errored, wait longer before each next attempt.
+
+        :param max_attempts: The maximum number of times to request each page.
+        :return: The pages that are still errored after all attempts.
+        """
+        errored_pages = self.find_errored_pages()
+        logger.info(f'Found {len(errored_pages)} errored pages')
+
+        still_errored_pages = []
+        try:
+            for file_name in errored_pages:
+                href = self.convert_file_name_to_href(file_name)
+                for attempt in range(1, max_attempts + 1):
+                    logger.info(
+                        f'Recrawling {file_name} '
+                        f'(attempt {attempt}/{max_attempts})'
+                    )
+                    self.save_page(href)
+                    # Ask the manifest, so that pages with an error status
+                    # are recrawled too.
+                    if not self.is_errored_file(file_name):
+                        break
+                    if attempt < max_attempts:
+                        # The server is still blocking the requests, so back
+                        # off.
+                        sleep(self.seconds_to_sleep * 2**attempt)
+                else:
+                    logger.error(f'Could not recrawl {file_name}')
+                    still_errored_pages.append(file_name)
+        finally:
+            self.save_progress()
 
         logger.info('DONE')
+        return still_errored_pages
+
+    def find_errored_pages(self) -> list[str]:
+        """
+        Find the saved pages that are error pages. The manifest is used for
+        pages that it knows. Other pages, e.g. saved before the manifest
+        existed, are scanned and added to the manifest.
+
+        :return: The names of the errored pages.
+        """
+        errored_pages = [
+            file_name
+            for file_name in self.page_store.list_pages()
+            if file_name.endswith('.html') and self.is_errored_file(file_name)
+        ]
+        self.manifest.save()
+        return errored_pages
+
+    def is_errored_file(self, file_name: str) -> bool:
+        """
+        Check whether the saved page is an error page. Ask the manifest first.
+        If it doesn't know the page, scan the bytes of the page for the error
+        heading and record the result in the manifest.
+
+        :param file_name: The name of the saved page.
+        :return: True if the page is an error page or empty.
+        """
+        size = self.page_store.size(file_name)
+        errored = self.manifest.is_errored(file_name, size)
+        if errored is None:
+            errored = size == 0 or bool(
+                self.error_page_bytes_pattern.search(
+                    self.page_store.read_bytes(file_name)
+                )
+            )
+            self.manifest.record(file_name, size, errored)
+        return errored
+
+    def get_page(self, href: str, season: int = 0) -> str:
+        """
+        Get the page from the given href. If saved pages are skipped, or the
+        page belongs to a past season and was saved recently enough, and the
+        page has been saved successfully before, read it from disk. Otherwise,
+        save the page.
+
+        :param href: href to get the page from.
+        :param season: How many seasons back the page is.
+        :return: The HTML page as a string.
+        """
+        file_name = self.convert_href_to_file_name(href)
+        is_fresh = season > 0 and self.http_cache.is_fresh(
+            file_name, self.past_seasons_max_age
+        )
+        if self.skip_saved_pages or is_fresh:
+            is_saved = self.page_store.exists(file_name)
+            if is_saved and not self.is_errored_file(file_name):
+                logger.info(f'Skipped already saved {file_name}')
+                return self.page_store.read(file_name)
+        return self.save_page(href)
 
     def save_page(self, href: str) -> str:
         """
         Save the page from the given href. Build the url from the href and
-        make a request to it. Save the response to a file.
+        make a request to it. Save the response to a file. If the page has
+        been saved before, the request is conditional and the saved page is
+        kept if it hasn't been modified.
 
         :param href: href to save the page from.
         :return: Response from the request.
         """
-        url = self.build_url(href)
-        html = self.get_html(url)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
 
+        url = self.build_url(href)
         file_name = f'{self.convert_href_to_file_name(href)}'
-        self.save_file(file_name, html)
+        headers = (
+            self.http_cache.get_conditional_headers(file_name)
+            if self.page_store.exists(file_name)
+            else {}
+        )
+        response = self.get_response(url, headers)
+        self.http_cache.store(file_name, response)
+
+        if response.status_code == 304:
+            html = self.page_store.read(file_name)
+            logger.info(f'Not modified {file_name}')
+        else:
+            html = response.text
+            self.save_file(file_name, html)
+            errored = not response.ok or self.is_errored_page(html)
+            if errored:
+                # Don't revalidate the error page, request the full page.
+                self.http_cache.remove(file_name)
+            self.manifest.record(
+                file_name,
+                self.page_store.size(file_name),
+                errored,
+                response.status_code,
+            )
 
-        sleep(self.seconds_to_sleep)
+        if not self.rate_limiter:
+            sleep(self.seconds_to_sleep)
         return html
 
+    def save_progress(self) -> None:
+        """
+        Save what is kept in memory during a crawl and only saved now and
+        then: the progress of the crawl, the manifest and the index of the
+        saved pages and the HTTP cache.
+        """
+        self.frontier.save()
+        self.manifest.save()
+        self.page_store.flush()
+        self.http_cache.save()
+
+    @classmethod
+    def is_errored_page(cls, html: str) -> bool:
+        """
+        Check whether the page is an error page or empty.
+
+        :param html: The HTML page as a string.
+        :return: True if the page is an error page.
+        """
+        return not html or bool(cls.error_page_pattern.search(html))
+
     @staticmethod
     def get_teams_hrefs(stats_page_soup: BeautifulSoup) -> list[str]:
         """
@@ -138,18 +410,26 @@ class FbrefCrawler:
         teams_hrefs = [anchor['href'] for anchor in teams_anchors]
         return teams_hrefs
 
-    def crawl_team(self, team_href: str) -> None:
+    def crawl_team(self, team_href: str, season: int = 0) -> list[CrawlTask]:
         """
-        Crawl the given team. Save the team page and the pages for the
-        categories.
+        Crawl the given team. Save the team page and discover the pages for
+        the categories.
 
         :param team_href: The href to the team.
+        :param season: How many seasons back the team page is.
+        :return: The tasks for the categories.
         """
-        team_page_html = self.save_page(team_href)
+        team_page_html = self.get_page(team_href, season)
         team_page_soup = BeautifulSoup(team_page_html, features='html.parser')
 
-        for category in categories:
-            self.save_page(self.get_category_href(team_page_soup, category))
+        return [
+            CrawlTask(
+                'category',
+                self.get_category_href(team_page_soup, category),
+                season,
+            )
+            for category in categories
+        ]
 
     @staticmethod
     def get_href_to_previous_season(stats_page_soup: BeautifulSoup) -> str:
@@ -198,10 +478,7 @@ class FbrefCrawler:
         :param file_name: Name of the file to save the text to.
         :param text: The text to save.
         """
-        file_path = Path(self.html_folder_path, file_name)
-        with open(file_path, 'w') as f:
-            f.write(text)
-            logger.info(f'Saved {file_path}')
+        self.page_store.write(file_name, text)
 
     def get_html(self, url: str) -> str:
         """
@@ -210,9 +487,23 @@ class FbrefCrawler:
         :param url: The url to get the HTML from.
         :return: The HTML page as a string.
         """
-        html = requests.get(url, headers=self.request_headers)
+        return self.get_response(url).text
+
+    def get_response(
+        self, url: str, headers: dict[str, str] = None
+    ) -> requests.Response:
+        """
+        Make a request to the given url.
+
+        :param url: The url to make the request to.
+        :param headers: Additional headers for the request.
+        :return: The response.
+        """
+        response = self.session.get(url, headers=headers)
         logger.info(f'Made a request to {url}')
-        return html.text
+        if not response.ok:
+            logger.warning(f'Got status {response.status_code} from {url}')
+        return response
 
     def build_url(self, href: str) -> str:
         """
@@ -2,6 +2,16 @@
 from pathlib import Path
 import pandas as pd
 
+from src.data.data_format import (
+    get_data_format,
+    get_data_format_of_file,
+    load_dataframe,
+)
+from src.data.dtype_schema import DtypeSchema
+from src.data.features import FeatureSpec, FormFeatureBuilder
+from src.data.form_feature_store import FormFeatureStore
+from src.data.match_key import MatchKeyBuilder
+from src.data.pipeline import Pipeline, copy_frame
 from src.log import get_logger
 
 logger = get_logger(__name__)
@@ -17,8 +27,17 @@ class FbrefProcessor:
     # dataset with the betting odds dataset.
     info_prefix = 'info_'
 
+    # The columns that are needed besides the numeric columns.
+    required_columns = ('date', 'time', 'team', 'opponent', 'venue', 'result')
+
     def __init__(
-        self, cleaned_data_file_path: Path, processed_data_folder_path: Path
+        self,
+        cleaned_data_file_path: Path,
+        processed_data_folder_path: Path,
+        data_format: str = 'csv',
+        feature_spec: FeatureSpec = None,
+        state_folder_path: Path = None,
+        dtype_schema: DtypeSchema = None,
     ) -> None:
         """
         Initialize the processor.
@@ -26,33 +45,100 @@ class FbrefProcessor:
         :param cleaned_data_file_path: Path to the cleaned data file.
         :param processed_data_folder_path: Path to the folder where the
             processed data will be saved.
+        :param data_format: The format to save the processed data in, one of
+            :data:`data_formats`. The cleaned data can be in any format.
+        :param feature_spec: The form features to create. If None, the
+            rolling averages over the last 3 matches are created.
+        :param state_folder_path: The folder to keep the form features of the
+            processed matches in, so that the next run only creates the
+            features of new matches, see :class:`FormFeatureStore`. If None,
+            the features of all matches are created in every run.
+        :param dtype_schema: The schema of the dtypes to save the processed
+            data with. If None, the dtypes are not changed.
         """
         self.cleaned_data_file_path = cleaned_data_file_path
         self.processed_data_folder_path = processed_data_folder_path
+        self.data_format = get_data_format(data_format)
+        self.feature_spec = feature_spec or FeatureSpec()
+        self.feature_spec.validate()
+        self.state_folder_path = state_folder_path
+        self.dtype_schema = dtype_schema
 
-    def process(self) -> None:
-        """Process cleaned data."""
-        matches_df = pd.read_csv(self.cleaned_data_file_path)
-
-        matches_df = self.add_match_id_column(matches_df)
-        matches_df = self.create_rolling_average_columns(matches_df)
-        matches_df = self.fill_na_values_with_mean(matches_df)
-        matches_df = self.convert_obj_columns_to_int(matches_df)
+    def process(self, full_rebuild: bool = False) -> None:
+        """
+        Process cleaned data.
 
-        matches_df = self.create_target_column(matches_df)
-        matches_df = self.mark_information_columns(matches_df)
-        matches_df = self.drop_all_irrelevant_columns(matches_df)
+        :param full_rebuild: Whether to create the form features of all
+            matches, even if the features of earlier matches are stored.
+        """
+        with Pipeline('FbrefProcessor.process') as pipeline:
+            matches_df = pipeline.run_step(
+                load_dataframe,
+                self.cleaned_data_file_path,
+                self.get_columns_to_load(),
+            )
 
-        save_path = Path(
-            self.processed_data_folder_path, self.cleaned_data_file_path.name
-        )
-        matches_df.to_csv(save_path, index=False)
+            if self.state_folder_path is None:
+                matches_df = pipeline.run_step(
+                    self.add_match_id_column, matches_df
+                )
+                matches_df = pipeline.run_step(
+                    self.create_form_feature_columns,
+                    matches_df,
+                    self.feature_spec,
+                )
+            else:
+                matches_df = pipeline.run_step(
+                    self.update_form_feature_columns, matches_df, full_rebuild
+                )
+            for step in [
+                self.fill_na_values_with_mean,
+                self.convert_obj_columns_to_int,
+                self.create_target_column,
+                self.mark_information_columns,
+                self.drop_all_irrelevant_columns,
+            ]:
+                matches_df = pipeline.run_step(step, matches_df)
+
+            if self.dtype_schema is not None:
+                matches_df = pipeline.run_step(
+                    self.dtype_schema.apply,
+                    matches_df,
+                    self.cleaned_data_file_path.stem,
+                )
+
+            save_path = Path(
+                self.processed_data_folder_path,
+                f'{self.cleaned_data_file_path.stem}'
+                f'{self.data_format.extension}',
+            )
+            pipeline.run_step(self.data_format.save, matches_df, save_path)
         logger.info(
             f'Saved {matches_df.shape[0]} rows and '
             f'{matches_df.shape[1]} cols of data to {save_path}.'
         )
         logger.info('DONE')
 
+    def get_columns_to_load(self) -> list[str] | None:
+        """
+        Get the columns of the cleaned data that are needed for processing:
+        the numeric columns, which become features, and the required columns.
+        The other columns are dropped during processing anyway.
+
+        :return: The columns or None if the dtypes of the columns are not
+            known before loading them, in which case all columns are loaded.
+        """
+        data_format = get_data_format_of_file(self.cleaned_data_file_path)
+        dtypes = data_format.get_dtypes(self.cleaned_data_file_path)
+        if dtypes is None:
+            return None
+        return [
+            column
+            for column, dtype in dtypes.items()
+            if column in self.required_columns
+            or pd.api.types.is_numeric_dtype(dtype)
+        ]
+
     @staticmethod
     def create_target_column(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -62,7 +148,7 @@ class FbrefProcessor:
         :param df: Dataframe containing the result column.
         :return: Dataframe with the target column.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df['target'] = (df['result'] == 'W').astype('int')
         logger.info('Created target column.')
         return df
@@ -75,7 +161,7 @@ class FbrefProcessor:
         :param df: Dataframe containing object columns.
         :return: Dataframe with int columns.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df['date'] = pd.to_datetime(df['date'])
         df[f'{FbrefProcessor.feat_perfix}team_code'] = (
             df['team'].astype('category').cat.codes
@@ -110,82 +196,158 @@ class FbrefProcessor:
         :param df: Dataframe containing the date and team columns.
         :return: Dataframe with the match id column.
         """
-        df = df.copy()
-        df['match_id'] = df.apply(
-            lambda row: f'{row["date"]}_{row["team"]}_{row["opponent"]}'
-            if row['venue'] == 'Home'
-            else f'{row["date"]}_{row["opponent"]}_{row["team"]}',
-            axis=1,
-        )
+        df = copy_frame(df)
+        df['match_id'] = MatchKeyBuilder.get_match_ids(df)
         logger.info('Added match id column.')
         return df
 
     @staticmethod
     def create_rolling_average_columns(df: pd.DataFrame) -> pd.DataFrame:
         """
-        Create rolling average columns for all numeric columns.
+        Create rolling average columns for all numeric columns, the features
+        of the default :class:`FeatureSpec`.
 
         :param df: Dataframe containing numeric columns.
         :return: Dataframe with rolling average columns.
         """
-        df = df.copy()
-        # Grab all numeric columns to compute rolling averages for.
-        # Those should be only statistics columns.
+        return FbrefProcessor.create_form_feature_columns(df)
+
+    @staticmethod
+    def create_form_feature_columns(
+        df: pd.DataFrame, feature_spec: FeatureSpec = None
+    ) -> pd.DataFrame:
+        """
+        Create form feature columns for the numeric columns: rolling and
+        exponentially weighted averages over the previous matches of the team,
+        see :class:`FeatureSpec`. The current match is not included. Rows
+        without any feature, like the first matches of each team, are dropped.
+
+        :param df: Dataframe containing numeric columns.
+        :param feature_spec: The features to create. If None, the rolling
+            averages over the last 3 matches are created.
+        :return: Dataframe with the feature columns, sorted by team and date.
+        """
+        df = copy_frame(df)
+        # Grab all numeric columns to compute features for. Those should be
+        # only statistics columns.
         numeric_columns = df.select_dtypes(include='number').columns.tolist()
-        # Create names for the new rolling average columns.
-        rolling_avg_columns = [
-            f'{FbrefProcessor.feat_perfix}{col}_rolling_avg'
-            for col in numeric_columns
-        ]
 
-        # Group by team so that we can compute rolling averages for each team.
-        grouped_teams_df = df.groupby('team')
-        # Compute rolling averages for each team.
-        df = grouped_teams_df.apply(
-            lambda group: FbrefProcessor.calculate_rolling_averages(
-                group, numeric_columns, rolling_avg_columns
-            )
+        # Sort once, so that the matches of each team are in a row and in
+        # order. A team doesn't play twice on the same day, so the order is
+        # well-defined.
+        df = df.dropna(subset=['team'])
+        df = df.sort_values(['team', 'date'], kind='stable')
+        features_df = FormFeatureBuilder.create_features(
+            df,
+            numeric_columns,
+            feature_spec or FeatureSpec(),
+            FbrefProcessor.feat_perfix,
         )
+        df = pd.concat([df, features_df], axis=1)
 
-        # Drop the team index level because we don't need it.
-        df = df.droplevel(0)
-        # Fix the index because there might be duplicate indices.
-        df.reset_index(drop=True, inplace=True)
-        logger.info('Created rolling average columns.')
+        # Drop rows that don't have any feature. These are going to be the
+        # first rows of each team because there are no matches before them.
+        df = df.dropna(subset=features_df.columns, how='all')
+        df = df.reset_index(drop=True)
+        logger.info(f'Created {features_df.shape[1]} form feature columns.')
 
         return df
 
-    @staticmethod
-    def calculate_rolling_averages(
-        df: pd.DataFrame, cols: list[str], new_cols: list[str]
+    def update_form_feature_columns(
+        self, df: pd.DataFrame, full_rebuild: bool = False
     ) -> pd.DataFrame:
         """
-        Compute rolling averages for the specified columns.
-
-        :param df: the dataframe to use.
-        :param cols: the columns to compute rolling averages for.
-        :param new_cols: the names of the new columns that will contain the
-            rolling averages.
-        :return: the dataframe with the new columns added.
+        Add the match id and the form feature columns, like
+        :meth:`add_match_id_column` and :meth:`create_form_feature_columns`
+        do, but only create them for the played matches that weren't
+        processed in an earlier run. The processed matches and the state of
+        the teams are kept in the store in :attr:`state_folder_path`. The
+        features of future matches are always created, since those matches
+        will have been played in the next run.
+
+        If a played match that was processed before is missing or another
+        match before it shows up, e.g. because older seasons were cleaned
+        again, the features of all matches are created again.
+
+        :param df: Dataframe containing the cleaned matches.
+        :param full_rebuild: Whether to ignore the store and create the
+            features of all matches.
+        :return: Dataframe with the feature columns, sorted by team and date.
         """
-        df = df.copy()
-        # Sort by date because we want to look at the last 3 matches.
-        df = df.sort_values('date')
-
-        # Compute rolling averages for the specified columns.
-        # The closed parameter is set to 'left' so that the current match is not
-        # included in the average.
-        rolling_stats = df[cols].rolling(3, closed='left').mean()
-
-        # Add the rolling averages to the dataframe.
-        rolling_stats.columns = new_cols
-        df = pd.concat([df, rolling_stats], axis=1)
-
-        # Drop rows that contain NaN values in the new columns. These are going
-        # to be the first 3 rows of the dataframe because we are computing
-        # rolling averages for the next row.
-        df.dropna(subset=new_cols, how='all', inplace=True)
+        numeric_columns = df.select_dtypes(include='number').columns.tolist()
+        store = FormFeatureStore(
+            self.state_folder_path,
+            self.feature_spec,
+            df.dtypes.astype(str).to_dict(),
+        )
+        df = df.dropna(subset=['team'])
+        # Future matches don't have a result yet.
+        is_played = df['result'].isin(['W', 'D', 'L'])
+
+        stored = None if full_rebuild else store.load()
+        processed_df, state = stored or (None, None)
+        is_new = pd.Series(True, index=df.index)
+        if state is not None:
+            last_dates = (
+                pd.to_datetime(state.recent_matches['date'])
+                .groupby(state.recent_matches['team'])
+                .max()
+            )
+            is_new = ~(pd.to_datetime(df['date']) <= df['team'].map(last_dates))
+            processed_counts = (
+                df[is_played & ~is_new].groupby('team').size().to_dict()
+            )
+            if processed_counts != store.match_counts:
+                logger.warning(
+                    'The processed matches changed since the last run, '
+                    'creating the features of all matches.'
+                )
+                processed_df, state = None, None
+                is_new[:] = True
+
+        new_df = df[is_played & is_new]
+        future_df = df[~is_played]
+        logger.info(
+            f'Creating the features of {len(new_df)} new and '
+            f'{len(future_df)} future matches.'
+        )
+        new_df = self.add_match_id_column(new_df)
+        new_df = new_df.sort_values(['team', 'date'], kind='stable')
+        features_df, state = FormFeatureBuilder.update_features(
+            new_df,
+            numeric_columns,
+            self.feature_spec,
+            FbrefProcessor.feat_perfix,
+            state,
+        )
+        new_df = pd.concat([new_df, features_df], axis=1)
+        new_df = new_df.dropna(subset=features_df.columns, how='all')
+
+        future_df = self.add_match_id_column(future_df)
+        future_df = future_df.sort_values(['team', 'date'], kind='stable')
+        features_df = FormFeatureBuilder.create_features(
+            future_df,
+            numeric_columns,
+            self.feature_spec,
+            FbrefProcessor.feat_perfix,
+            state,
+        )
+        future_df = pd.concat([future_df, features_df], axis=1)
+        future_df = future_df.dropna(subset=features_df.columns, how='all')
+
+        if processed_df is None:
+            store.clear()
+        match_counts = df[is_played].groupby('team').size()
+        store.save(
+            new_df,
+            state,
+            {team: int(count) for team, count in match_counts.items()},
+        )
 
+        df = pd.concat([processed_df, new_df, future_df])
+        df = df.sort_values(['team', 'date'], kind='stable')
+        df = df.reset_index(drop=True)
+        logger.info(f'Created {features_df.shape[1]} form feature columns.')
         return df
 
     @staticmethod
@@ -196,9 +358,12 @@ class FbrefProcessor:
         :param df: Dataframe containing NaN values.
         :return: Dataframe with NaN values filled with mean.
         """
-        df = df.copy()
+        df = copy_frame(df)
         numeric_columns = df.select_dtypes(include=['number']).columns
-        df.fillna(df[numeric_columns].mean(), inplace=True)
+        # Filling splits the data into a block per column. Consolidate the
+        # blocks again, so that the next steps don't work on a fragmented
+        # dataframe.
+        df = df.fillna(df[numeric_columns].mean()).copy()
         logger.info('Filled NaN values with mean.')
         return df
 
@@ -211,7 +376,7 @@ class FbrefProcessor:
         :param df: Dataframe containing the important columns.
         :return: Dataframe with the important columns with a prefix added.
         """
-        df = df.copy()
+        df = copy_frame(df)
         info_columns = ['date', 'team', 'opponent', 'venue', 'match_id']
         for col in info_columns:
             df[f'{FbrefProcessor.info_prefix}{col}'] = df[col]
@@ -227,7 +392,7 @@ class FbrefProcessor:
         :param df: Dataframe containing columns to drop.
         :return: Dataframe with columns dropped.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df = df.filter(
             regex=f'^({FbrefProcessor.feat_perfix}|'
             f'{FbrefProcessor.info_prefix}|target)'
@@ -1,16 +1,38 @@
 """Contains the class that is responsible for scraping FBref."""
+import hashlib
 import re
-from io import StringIO
-from os import listdir
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
 from src.log import get_logger
+from src.data.data_format import get_data_format
 from src.data.fbref import categories
+from src.data.html_table_extractor import HtmlTableExtractor
+from src.data.page_store import PageStore, open_page_store
+from src.data.scrape_cache import ScrapeCache
 
 logger = get_logger(__name__)
 
+# The scraper of a worker process of a concurrent scrape. It is sent to each
+# process once, when the process starts, instead of with every page.
+_worker_scraper: 'FbrefScraper' = None
+
+
+class CategoryPageKey(NamedTuple):
+
+    """Identifies the page of a category of stats of a team in a season."""
+
+    # The id of the team on FBref, for example 4eaa11d7.
+    squad_id: str
+    # For example 2021-2022.
+    season: str
+    # One of the hrefs in :data:`categories`, for example shooting.
+    category: str
+
 
 class FbrefScraper:
 
@@ -19,11 +41,31 @@ class FbrefScraper:
     :class:`FbrefCrawler`.
     """
 
+    # An example category page file name is:
+    # _sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_matchlogs
+    # _sl4sh_all_comps_sl4sh_shooting_sl4sh_Wolfsburg-Match-Logs.html
+    category_page_pattern = re.compile(
+        r'^.*_sl4sh_squads_sl4sh_(?P<squad_id>[^_]+)'
+        r'_sl4sh_(?P<season>\d{4}-\d{4})_sl4sh_matchlogs_sl4sh_all_comps'
+        r'_sl4sh_(?P<category>.+?)_sl4sh_.+\.html$'
+    )
+    # An example team stats page file name is:
+    # _sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_Wolfsburg-Stats.html
+    # The season is missing from the pages of the current season.
+    team_stats_page_pattern = re.compile(
+        r'^.*_sl4sh_squads_sl4sh_(?P<squad_id>[^_]+)'
+        r'(_sl4sh_(?P<season>\d{4}-\d{4}))?_sl4sh_[^/]+-Stats\.html$'
+    )
+
     def __init__(
         self,
         html_folder_path: Path,
         raw_data_folder_path: Path,
         competition: str,
+        page_store: PageStore = None,
+        max_workers: int = 1,
+        cache_folder_path: Path = None,
+        data_format: str = 'csv',
     ) -> None:
         """
         Initialize the scraper.
@@ -33,40 +75,171 @@ class FbrefScraper:
             will be saved.
         :param competition: The name of the competition. Used for the name of
             the file that will be saved.
+        :param page_store: The store the pages have been saved to. If None,
+            the store in html_folder_path is opened.
+        :param max_workers: The number of processes that scrape the teams
+            stats pages. If 1, the pages are scraped in the current process.
+        :param cache_folder_path: The folder to cache the dataframes of the
+            teams in, so that only new or changed pages are scraped again. If
+            None, all pages are scraped every time.
+        :param data_format: The format to save the scraped data in, one of
+            :data:`data_formats`.
         """
         self.html_folder_path = html_folder_path
+        self.page_store = page_store or open_page_store(self.html_folder_path)
         self.raw_data_folder_path = raw_data_folder_path
         if not self.raw_data_folder_path.exists():
             self.raw_data_folder_path.mkdir(parents=True)
             logger.info(f'Created folder {self.raw_data_folder_path}')
 
         self.competition = competition.lower().replace(' ', '_')
+        self.max_workers = max_workers
+        self.data_format = get_data_format(data_format)
+        self.scrape_cache = (
+            ScrapeCache(cache_folder_path) if cache_folder_path else None
+        )
         self.html_pages = self.get_html_pages()
         self.latest_season = self.get_latest_season(self.html_pages)
+        self.category_pages = self.get_category_pages(self.html_pages)
 
-    def scrape(self) -> None:
-        """Scrape the data off the saved pages."""
+    def scrape(self, full_rebuild: bool = False) -> None:
+        """
+        Scrape the data off the saved pages.
+
+        :param full_rebuild: Whether to scrape all pages, even the ones whose
+            dataframes are cached.
+        """
         teams_stats_pages_files = self.get_teams_stats_pages_files()
 
-        competition_matches_dfs = []
+        fingerprints = {}
+        team_dfs = {}
+        if self.scrape_cache:
+            for team_stats_page_file in teams_stats_pages_files:
+                fingerprint = self.get_team_fingerprint(team_stats_page_file)
+                fingerprints[team_stats_page_file] = fingerprint
+                if full_rebuild:
+                    continue
+                cached_df = self.scrape_cache.get(
+                    team_stats_page_file, fingerprint
+                )
+                if cached_df is not None:
+                    team_dfs[team_stats_page_file] = cached_df
+            logger.info(
+                f'Reusing {len(team_dfs)} of {len(teams_stats_pages_files)} '
+                'cached teams'
+            )
 
-        for team_stats_page_file in teams_stats_pages_files:
-            team_df = self.get_team_matches_df(team_stats_page_file)
-            competition_matches_dfs.append(team_df)
+        pages_to_scrape = [
+            team_stats_page_file
+            for team_stats_page_file in teams_stats_pages_files
+            if team_stats_page_file not in team_dfs
+        ]
+        scraped_dfs = self.get_teams_matches_dfs(pages_to_scrape)
+        for team_stats_page_file, team_df in zip(pages_to_scrape, scraped_dfs):
+            team_dfs[team_stats_page_file] = team_df
+            if self.scrape_cache:
+                self.scrape_cache.store(
+                    team_stats_page_file,
+                    fingerprints[team_stats_page_file],
+                    team_df,
+                )
+        if self.scrape_cache:
+            self.scrape_cache.prune(teams_stats_pages_files)
+            self.scrape_cache.save()
 
+        # Keep the order of the pages, so the output is the same as when all
+        # pages are scraped.
+        competition_matches_dfs = [
+            team_dfs[team_stats_page_file]
+            for team_stats_page_file in teams_stats_pages_files
+        ]
         self.save_dataframe(pd.concat(competition_matches_dfs))
         logger.info('DONE')
 
+    def get_teams_matches_dfs(
+        self, teams_stats_pages_files: list[str]
+    ) -> list[pd.DataFrame]:
+        """
+        Get the matches dataframes of the given team stats pages.
+
+        :param teams_stats_pages_files: The names of the team stats pages.
+        :return: The matches dataframes in the order of the pages.
+        """
+        if self.max_workers > 1 and len(teams_stats_pages_files) > 1:
+            # Parsing the pages is CPU bound, so it is spread over processes.
+            # map keeps the order of the pages, so the output is the same as
+            # when scraping serially.
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as executor:
+                return list(
+                    executor.map(_get_team_matches_df, teams_stats_pages_files)
+                )
+        return [
+            self.get_team_matches_df(team_stats_page_file)
+            for team_stats_page_file in teams_stats_pages_files
+        ]
+
+    def get_team_fingerprint(self, team_stats_page_file: str) -> str:
+        """
+        Get a fingerprint of the pages of a team in a season. It changes when
+        any of the pages changes.
+
+        :param team_stats_page_file: The name of the team stats page.
+        :return: The fingerprint.
+        """
+        pages = [team_stats_page_file] + [
+            self.category_pages.get(
+                self.get_category_page_key(team_stats_page_file, category_href)
+            )
+            for category_href in categories
+        ]
+        fingerprint = hashlib.sha256()
+        for page in pages:
+            if page is None:
+                # A missing page fails the scrape, so it's never cached.
+                fingerprint.update(b'missing')
+                continue
+            fingerprint.update(page.encode())
+            fingerprint.update(self.page_store.get_fingerprint(page).encode())
+        return fingerprint.hexdigest()
+
     def get_html_pages(self) -> list[str]:
         """
         Get a list of all pages that have been crawled by :class:`FbrefCrawler`.
 
         :return: A list of files.
         """
-        pages = listdir(self.html_folder_path)
+        pages = self.page_store.list_pages()
         logger.info(f'Found {len(pages)} pages')
         return pages
 
+    @classmethod
+    def get_category_pages(
+        cls, html_pages: list[str]
+    ) -> dict[CategoryPageKey, str]:
+        """
+        Parse the names of the category pages once, so that the page of a
+        category of a team in a season can be looked up directly.
+
+        :param html_pages: The list of HTML pages.
+        :return: The category pages by their key.
+        """
+        category_pages = {}
+        for page in html_pages:
+            match = cls.category_page_pattern.match(page)
+            if not match:
+                continue
+            key = CategoryPageKey(
+                match['squad_id'], match['season'], match['category']
+            )
+            # Keep the first page, like the previous regex search over the
+            # list of pages did.
+            category_pages.setdefault(key, page)
+        return category_pages
+
     def get_teams_stats_pages_files(self) -> list[str]:
         """
         Get a list of all teams stats pages. This excludes the Bundesliga stats
@@ -92,24 +265,95 @@ class FbrefScraper:
         """
         logger.info(f'Scraping {team_stats_page_file}')
         team_name = self.get_team_name(team_stats_page_file)
-        team_stats_file_path = Path(self.html_folder_path, team_stats_page_file)
-        # Wrap in StringIO to prevent warnings.
-        team_stats_file_contents = StringIO(team_stats_file_path.read_text())
         # Grab the 'Scores & Fixtures' table as a base.
-        team_df = pd.read_html(
-            team_stats_file_contents, match='Scores & Fixtures'
-        )[0]
+        team_df = HtmlTableExtractor.read_table(
+            self.page_store.read(team_stats_page_file),
+            match='Scores & Fixtures',
+        )
         # Add team column because the table doesn't have it.
         team_df['Team'] = team_name
-        # Iterate trough each category and merge it.
-        for category_href, category_caption in categories.items():
-            category_df = self.get_category_dataframe(
+        category_dfs = [
+            self.get_category_dataframe(
                 team_stats_page_file, category_href, category_caption
             )
-            team_df = team_df.merge(
-                category_df, on=['Date', 'Time'], how='outer'
+            for category_href, category_caption in categories.items()
+        ]
+        return self.join_category_dataframes(team_df, category_dfs)
+
+    @classmethod
+    def join_category_dataframes(
+        cls, team_df: pd.DataFrame, category_dfs: list[pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        Join the category dataframes to the team dataframe on the date and
+        time of the matches, in one pass. The result is the same as outer
+        merging them one after the other, without copying the growing
+        dataframe for every category.
+
+        :param team_df: The dataframe of the 'Scores & Fixtures' table.
+        :param category_dfs: The dataframes of the categories.
+        :return: The joined dataframe.
+        """
+        keys = ['Date', 'Time']
+        category_keys = category_dfs[0][keys]
+        if not category_keys.duplicated().any() and all(
+            category_df[keys].equals(category_keys)
+            for category_df in category_dfs[1:]
+        ):
+            # The category tables of a team list the same matches in the same
+            # order, so they only have to be aligned with the team dataframe
+            # once. Only the keys are merged, to find the row of each match
+            # in the team dataframe and in the category dataframes.
+            rows = (
+                team_df[keys]
+                .assign(team_row=np.arange(len(team_df)))
+                .merge(
+                    category_keys.assign(
+                        category_row=np.arange(len(category_keys))
+                    ),
+                    on=keys,
+                    how='outer',
+                )
             )
-        return team_df
+            # Each dataframe is copied once, into the rows of the result.
+            # Missing rows become NaN, like in a merge.
+            team_rows = rows['team_row'].fillna(-1).astype(int).to_numpy()
+            category_rows = (
+                rows['category_row'].fillna(-1).astype(int).to_numpy()
+            )
+            joined_dfs = [
+                cls.take_rows(team_df, team_rows).assign(
+                    Date=rows['Date'].to_numpy(), Time=rows['Time'].to_numpy()
+                )
+            ] + [
+                cls.take_rows(category_df.drop(columns=keys), category_rows)
+                for category_df in category_dfs
+            ]
+            return pd.concat(joined_dfs, axis=1, copy=False)
+
+        indexed_dfs = [df.set_index(keys) for df in [team_df, *category_dfs]]
+        if any(not df.index.is_unique for df in indexed_dfs):
+            # Matches with the same date and time can't be aligned on the
+            # index, so they are merged like a relational join instead.
+            joined_df = team_df
+            for category_df in category_dfs:
+                joined_df = joined_df.merge(category_df, on=keys, how='outer')
+            return joined_df
+
+        # Like the merges, keep the order of the matches of the team
+        # dataframe and add the matches that are missing from it after them,
+        # in the order of the categories.
+        joined_df = pd.concat(
+            indexed_dfs, axis=1, join='outer', sort=False
+        ).reset_index()
+        # The keys stay where they are in the team dataframe.
+        columns = list(team_df.columns) + [
+            column
+            for category_df in category_dfs
+            for column in category_df.columns
+            if column not in keys
+        ]
+        return joined_df[columns]
 
     @staticmethod
     def get_team_name(team_stats_page_file: str) -> str:
@@ -129,6 +373,43 @@ class FbrefScraper:
             .strip()  # Just in case.
         )
 
+    @staticmethod
+    def take_rows(df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+        """
+        Take the rows at the given positions. Rows at position -1 are added
+        as missing values.
+
+        :param df: The dataframe.
+        :param rows: The positions of the rows.
+        :return: The rows with a new range index.
+        """
+        df = df.reset_index(drop=True).reindex(rows)
+        df.index = pd.RangeIndex(len(rows))
+        return df
+
+    def get_category_page_key(
+        self, team_stats_page_file: str, category_href: str
+    ) -> CategoryPageKey:
+        """
+        Get the key of the category page of the team in the season of the
+        given team stats page.
+
+        :param team_stats_page_file: The team stats page file name.
+        :param category_href: The href for the category.
+        :return: The key of the category page.
+        """
+        match = self.team_stats_page_pattern.match(team_stats_page_file)
+        if not match:
+            msg = f'{team_stats_page_file} is not a team stats page.'
+            raise ValueError(msg)
+        # If the team stats page doesn't have a season, it's the current
+        # season.
+        return CategoryPageKey(
+            match['squad_id'],
+            match['season'] or self.latest_season,
+            category_href,
+        )
+
     def get_category_dataframe(
         self,
         team_stats_page_file: str,
@@ -143,31 +424,21 @@ class FbrefScraper:
         :param category_caption: The caption for the category.
         :return: A dataframe containing the stats.
         """
-        # An example team stats page file name is:
-        # _sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_Wolfsburg-Stats.html
-        link_without_team = '_sl4sh_'.join(
-            team_stats_page_file.split('_sl4sh_')[:-1]
-        )
-        # link_without_team is now:
-        # _sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022
-
-        # If the link_without_team doesn't end in a year-year, it means it's
-        # the current season, and we need to add the current season to the link.
-        if not re.search(r'\d{4}-\d{4}$', link_without_team):
-            link_without_team += f'_sl4sh_{self.latest_season}'
-
-        regex = re.compile(
-            rf'^{link_without_team}_sl4sh_matchlogs_sl4sh_all_comps_sl4sh_{category_href}_sl4sh_.+'
-        )
-        stats_page = list(filter(regex.match, self.html_pages))[0]
+        key = self.get_category_page_key(team_stats_page_file, category_href)
+        stats_page = self.category_pages.get(key)
+        if stats_page is None:
+            msg = (
+                f'No {category_href} page of squad {key.squad_id} in '
+                f'{key.season} in {self.html_folder_path}.'
+            )
+            raise FileNotFoundError(msg)
         # stats_page is now:
         # _sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_matchlogs
         # _sl4sh_all_comps_sl4sh_shooting_sl4sh_Wolfsburg-Match-Logs.html
-        stats_file = Path(self.html_folder_path, stats_page)
-        # Wrap in StringIO to prevent warnings.
-        stats_file_contents = StringIO(stats_file.read_text())
-        logger.info(f'Scraping {stats_file}')
-        stats_df = pd.read_html(stats_file_contents, match=category_caption)[0]
+        logger.info(f'Scraping {stats_page}')
+        stats_df = HtmlTableExtractor.read_table(
+            self.page_store.read(stats_page), match=category_caption
+        )
 
         # Rename the 'For <team name>' columns as they are unique to each team.
         stats_df.rename(columns=lambda x: re.sub('^For.+', '', x), inplace=True)
@@ -192,17 +463,16 @@ class FbrefScraper:
 
     def save_dataframe(self, df: pd.DataFrame) -> None:
         """
-        Save the dataframe to a csv file.
+        Save the dataframe to a file in the data format of the scraper.
 
         :param df: Dataframe to save.
         """
         path_to_save = Path(
-            self.raw_data_folder_path, f'{self.competition}_matches.csv'
-        )
-        df.to_csv(path_to_save, index=False)
-        logger.info(
-            f'Saved {len(df)} matches to ' f'{path_to_save}_matches.csv'
+            self.raw_data_folder_path,
+            f'{self.competition}_matches{self.data_format.extension}',
         )
+        self.data_format.save(df, path_to_save)
+        logger.info(f'Saved {len(df)} matches to {path_to_save}')
 
     @staticmethod
     def get_latest_season(html_pages: list[str]) -> str:
@@ -221,3 +491,24 @@ class FbrefScraper:
                 if re.search(r'\d{4}-\d{4}', page)
             ]
         )
+
+
+def _init_worker(scraper: FbrefScraper) -> None:
+    """
+    Keep the scraper in the worker process, see
+    :meth:`FbrefScraper.get_teams_matches_dfs`.
+
+    :param scraper: The scraper, with the pages that have been found.
+    """
+    global _worker_scraper
+    _worker_scraper = scraper
+
+
+def _get_team_matches_df(team_stats_page_file: str) -> pd.DataFrame:
+    """
+    Get the matches dataframe of a team stats page in a worker process.
+
+    :param team_stats_page_file: The name of the team stats page file.
+    :return: A dataframe containing the matches and categories of stats.
+    """
+    return _worker_scraper.get_team_matches_df(team_stats_page_file)
@@ -0,0 +1,647 @@
+"""
+Contains the form features of the teams: averages of their stats over the
+matches they played before.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+from src.data.fbref import categories
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+# The families of stats columns that form features can be created for. The
+# stats of a category are prefixed with its name, e.g. shooting_standard_sh.
+# The stats of the match itself, like gf or xg, have no prefix.
+feature_families = ['match', *categories]
+# The window of the rolling averages that the processor has always created.
+# Their columns keep their names without the window, e.g.
+# feat_gf_rolling_avg, so that the consumers of the processed data don't
+# break.
+default_window = 3
+
+
+class FeatureSpec(NamedTuple):
+
+    """
+    Which form features to create. Each numeric column of the selected
+    families gets a rolling average per window and an exponentially weighted
+    average per half-life, over the previous matches of the team.
+    """
+
+    # The number of previous matches of the rolling averages.
+    windows: tuple[int, ...] = (default_window,)
+    # The half-lives, in matches, of the exponentially weighted averages.
+    halflives: tuple[float, ...] = ()
+    # The number of previous matches with a value that an average needs. If
+    # None, a rolling average needs a full window and an exponentially
+    # weighted average a single match.
+    min_periods: int = None
+    # The families of the columns, see feature_families. If None, all
+    # numeric columns are used.
+    families: tuple[str, ...] = None
+
+    def validate(self) -> None:
+        """
+        Check that the spec can be used to create features.
+
+        :raises ValueError: If a window, half-life or family is invalid.
+        """
+        if not self.windows and not self.halflives:
+            msg = 'The feature spec needs at least one window or half-life.'
+            raise ValueError(msg)
+        if any(window < 1 for window in self.windows):
+            msg = f'The windows must be at least 1, got {self.windows}.'
+            raise ValueError(msg)
+        if any(halflife <= 0 for halflife in self.halflives):
+            msg = f'The half-lives must be positive, got {self.halflives}.'
+            raise ValueError(msg)
+        if self.min_periods is not None and self.min_periods < 1:
+            msg = f'min_periods must be at least 1, got {self.min_periods}.'
+            raise ValueError(msg)
+        unknown_families = set(self.families or []) - set(feature_families)
+        if unknown_families:
+            msg = (
+                f'Unknown feature families {sorted(unknown_families)}. Use '
+                f'any of {feature_families}.'
+            )
+            raise ValueError(msg)
+
+    def get_rolling_min_periods(self, window: int) -> int:
+        """
+        Get the number of previous matches a rolling average needs.
+
+        :param window: The window of the rolling average.
+        :return: The number of matches.
+        """
+        return window if self.min_periods is None else self.min_periods
+
+    def get_ewm_min_periods(self) -> int:
+        """
+        Get the number of previous matches an exponentially weighted average
+        needs.
+
+        :return: The number of matches.
+        """
+        return 1 if self.min_periods is None else self.min_periods
+
+    def get_recent_matches_count(self) -> int:
+        """
+        Get the number of recent matches of a team that the rolling averages
+        of its next match depend on.
+
+        :return: The number of matches, at least 1.
+        """
+        return max(self.windows, default=1)
+
+
+class FormState(NamedTuple):
+
+    """
+    What the form features of the next matches of each team depend on: the
+    most recent matches of the team and the exponentially weighted sums
+    before them. With the state, the features of new matches can be created
+    without the matches before them, see
+    :meth:`FormFeatureBuilder.update_features`.
+    """
+
+    # The most recent matches of each team, see
+    # FeatureSpec.get_recent_matches_count, with the team, date and stats
+    # columns. Sorted by team and date.
+    recent_matches: pd.DataFrame
+    # The number of values before the most recent matches, by team and stats
+    # column.
+    counts: pd.DataFrame
+    # The weighted sums of the values and of the weights before the most
+    # recent matches, by half-life, like the counts.
+    weighted_sums: dict[float, pd.DataFrame]
+    weights: dict[float, pd.DataFrame]
+
+
+class PreviousMatchesIndexer(BaseIndexer):
+
+    """
+    The bounds of rolling windows over the previous matches of a team. The
+    window of a match doesn't include the match itself, like
+    rolling(window_size, closed='left') within a group of a team. The rows
+    have to be sorted by team.
+    """
+
+    def __init__(self, group_starts: np.ndarray, window_size: int) -> None:
+        """
+        Initialize the indexer.
+
+        :param group_starts: The position of the first row of the team of
+            each row.
+        :param window_size: The number of previous matches in a window.
+        """
+        super().__init__(group_starts=group_starts, window_size=window_size)
+
+    @classmethod
+    def from_teams(
+        cls, teams: pd.Series, window_size: int
+    ) -> 'PreviousMatchesIndexer':
+        """
+        Create the indexer for rows sorted by team.
+
+        :param teams: The team of each row.
+        :param window_size: The number of previous matches in a window.
+        :return: The indexer.
+        """
+        teams = teams.to_numpy()
+        is_first_row = np.ones(len(teams), dtype=bool)
+        is_first_row[1:] = teams[1:] != teams[:-1]
+        first_rows = np.flatnonzero(is_first_row)
+        group_starts = np.repeat(
+            first_rows, np.diff(np.append(first_rows, len(teams)))
+        )
+        return cls(group_starts=group_starts, window_size=window_size)
+
+    def get_window_bounds(
+        self,
+        num_values: int = 0,
+        min_periods: int = None,
+        center: bool = None,
+        closed: str = None,
+        step: int = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the bounds of the windows. These are the same bounds that
+        groupby('team').rolling(window_size, closed='left') uses, so the
+        results are the same.
+
+        :param num_values: The number of rows.
+        :param min_periods: Unused.
+        :param center: Unused.
+        :param closed: Unused, the windows are always closed on the left.
+        :param step: Unused.
+        :return: The start and end of the window of each row, the end is
+            exclusive.
+        """
+        end = np.arange(num_values, dtype=np.int64)
+        start = np.maximum(end - self.window_size, self.group_starts)
+        return start, end
+
+
+class FormFeatureBuilder:
+
+    """
+    Creates the form features of a :class:`FeatureSpec` for matches sorted by
+    team and date. The rolling averages come from pandas' rolling mean over
+    the windows of :class:`PreviousMatchesIndexer`, so that they are the same
+    as the ones of groupby('team').rolling(window, closed='left'). The
+    exponentially weighted averages update the same match of every team at
+    once, see :meth:`get_ewm_sums`.
+    """
+
+    # The number of columns whose features are computed at once, so that the
+    # arrays of a block stay small.
+    columns_per_block = 8
+
+    @staticmethod
+    def get_family(column: str) -> str:
+        """
+        Get the family of a stats column.
+
+        :param column: The name of the column.
+        :return: The family, one of feature_families.
+        """
+        # The longest prefix wins, passing_types_ columns are not passing_
+        # columns.
+        matching_families = [
+            family
+            for family in categories
+            if column.startswith(f'{family}_')
+        ]
+        return max(matching_families, key=len, default='match')
+
+    @staticmethod
+    def get_rolling_column_name(prefix: str, column: str, window: int) -> str:
+        """
+        Get the name of a rolling average column. The averages over the
+        :data:`default_window` have no window in their name.
+
+        :param prefix: The prefix of the feature columns.
+        :param column: The name of the stats column.
+        :param window: The window of the rolling average.
+        :return: The name, e.g. feat_gf_rolling_avg or feat_gf_rolling_5_avg.
+        """
+        if window == default_window:
+            return f'{prefix}{column}_rolling_avg'
+        return f'{prefix}{column}_rolling_{window}_avg'
+
+    @staticmethod
+    def get_ewm_column_name(prefix: str, column: str, halflife: float) -> str:
+        """
+        Get the name of an exponentially weighted average column.
+
+        :param prefix: The prefix of the feature columns.
+        :param column: The name of the stats column.
+        :param halflife: The half-life of the average.
+        :return: The name, e.g. feat_gf_ewm_2.5_avg.
+        """
+        return f'{prefix}{column}_ewm_{halflife:g}_avg'
+
+    @staticmethod
+    def select_columns(
+        columns: list[str], families: tuple[str, ...] = None
+    ) -> list[str]:
+        """
+        Select the columns of the given families.
+
+        :param columns: The stats columns.
+        :param families: The families. If None, all columns are selected.
+        :return: The selected columns, in their order.
+        """
+        if families is None:
+            return list(columns)
+        return [
+            column
+            for column in columns
+            if FormFeatureBuilder.get_family(column) in families
+        ]
+
+    @staticmethod
+    def create_features(
+        df: pd.DataFrame,
+        columns: list[str],
+        feature_spec: FeatureSpec,
+        prefix: str,
+        state: FormState = None,
+    ) -> pd.DataFrame:
+        """
+        Create the form features of the given columns.
+
+        :param df: The matches, sorted by team and date.
+        :param columns: The numeric columns to create features for.
+        :param feature_spec: The features to create.
+        :param prefix: The prefix of the feature columns.
+        :param state: The state of the teams before the matches. If None, the
+            matches are the first matches of the teams.
+        :return: The features, with the index of df. The rolling averages
+            come first, by window, then the exponentially weighted averages,
+            by half-life.
+        """
+        return FormFeatureBuilder.update_features(
+            df, columns, feature_spec, prefix, state
+        )[0]
+
+    @staticmethod
+    def update_features(
+        df: pd.DataFrame,
+        columns: list[str],
+        feature_spec: FeatureSpec,
+        prefix: str,
+        state: FormState = None,
+    ) -> tuple[pd.DataFrame, FormState]:
+        """
+        Create the form features of the given columns and the state of the
+        teams after the matches.
+
+        :param df: The matches, sorted by team and date.
+        :param columns: The numeric columns to create features for.
+        :param feature_spec: The features to create.
+        :param prefix: The prefix of the feature columns.
+        :param state: The state of the teams before the matches. If None, the
+            matches are the first matches of the teams.
+        :return: The features, see :meth:`create_features`, and the state of
+            the teams after the matches.
+        """
+        feature_spec.validate()
+        columns = FormFeatureBuilder.select_columns(
+            columns, feature_spec.families
+        )
+        if not columns:
+            logger.warning(
+                f'No columns of the families {feature_spec.families} to '
+                'create features for.'
+            )
+        names = [
+            FormFeatureBuilder.get_rolling_column_name(prefix, column, window)
+            for window in feature_spec.windows
+            for column in columns
+        ] + [
+            FormFeatureBuilder.get_ewm_column_name(prefix, column, halflife)
+            for halflife in feature_spec.halflives
+            for column in columns
+        ]
+
+        # Continue the matches of the teams with their most recent matches,
+        # which the rolling averages of the matches depend on.
+        matches_df = df[['team', 'date', *columns]]
+        is_new_match = np.ones(len(df), dtype=bool)
+        if state is not None:
+            recent_matches_df = state.recent_matches[
+                state.recent_matches['team'].isin(df['team'])
+            ]
+            matches_df = pd.concat(
+                [recent_matches_df[matches_df.columns], matches_df]
+            )
+            is_new_match = np.concatenate(
+                [np.zeros(len(recent_matches_df), dtype=bool), is_new_match]
+            )
+            # The recent matches of a team are before its new matches.
+            order = np.argsort(matches_df['team'].to_numpy(), kind='stable')
+            matches_df = matches_df.iloc[order]
+            is_new_match = is_new_match[order]
+
+        teams = matches_df['team'].to_numpy()
+        is_first_match = np.ones(len(teams), dtype=bool)
+        is_first_match[1:] = teams[1:] != teams[:-1]
+        first_matches = np.flatnonzero(is_first_match)
+        team_names = teams[first_matches]
+        matches_counts = np.diff(np.append(first_matches, len(teams)))
+        match_numbers = np.arange(len(teams)) - np.repeat(
+            first_matches, matches_counts
+        )
+        team_numbers = np.cumsum(is_first_match) - 1
+        max_matches = matches_counts.max(initial=0)
+        # The position of each match when the matches are laid out by team
+        # and match number, with an empty match before the first match of
+        # every team.
+        positions = team_numbers * (max_matches + 1) + match_numbers + 1
+        # And without the empty matches, like the averages are laid out.
+        average_positions = (team_numbers * max_matches + match_numbers)[
+            is_new_match
+        ]
+        # The match of each team that the next state starts at.
+        state_match_numbers = np.maximum(
+            matches_counts - feature_spec.get_recent_matches_count(), 0
+        )
+
+        initial_counts = FormFeatureBuilder.get_team_state(
+            None if state is None else state.counts, team_names, columns
+        )
+        next_counts = np.empty(initial_counts.shape)
+        initial_weighted_sums = {}
+        initial_weights = {}
+        next_weighted_sums = {}
+        next_weights = {}
+        for halflife in feature_spec.halflives:
+            initial_weighted_sums[halflife] = FormFeatureBuilder.get_team_state(
+                None if state is None else state.weighted_sums[halflife],
+                team_names,
+                columns,
+            )
+            initial_weights[halflife] = FormFeatureBuilder.get_team_state(
+                None if state is None else state.weights[halflife],
+                team_names,
+                columns,
+            )
+            next_weighted_sums[halflife] = np.empty(initial_counts.shape)
+            next_weights[halflife] = np.empty(initial_counts.shape)
+
+        # The features by column, the way pandas stores them, so that the
+        # dataframe can be created without copying them.
+        features = np.empty((len(names), len(df)))
+        # The rolling averages are the ones pandas computes for every team
+        # separately, since its rolling sums are exact to the last bit only
+        # in the order pandas adds and removes the values.
+        group_starts = np.repeat(first_matches, matches_counts)
+        for i, window in enumerate(feature_spec.windows):
+            averages_df = (
+                matches_df[columns]
+                .rolling(
+                    PreviousMatchesIndexer(group_starts, window),
+                    min_periods=feature_spec.get_rolling_min_periods(window),
+                )
+                .mean()
+            )
+            features[i * len(columns) : (i + 1) * len(columns)] = (
+                averages_df.to_numpy(dtype='float64')[is_new_match].T
+            )
+
+        values = matches_df[columns].to_numpy(dtype='float64').T
+        block_size = FormFeatureBuilder.columns_per_block
+        for first in range(0, len(columns), block_size):
+            block = slice(first, first + block_size)
+            block_values = values[block]
+            team_values = np.full(
+                (len(block_values), len(team_names) * (max_matches + 1)),
+                np.nan,
+            )
+            team_values[:, positions] = block_values
+            team_values = team_values.reshape(
+                len(block_values), len(team_names), max_matches + 1
+            )
+            has_value = ~np.isnan(team_values)
+            np.copyto(team_values, 0.0, where=~has_value)
+            # The counts of the values before each match.
+            counts = np.cumsum(has_value, axis=2)
+            # Including the values before the matches.
+            previous_counts = (
+                initial_counts[block, :, np.newaxis] + counts[:, :, :-1]
+            )
+            next_counts[block] = FormFeatureBuilder.get_state_at(
+                previous_counts, state_match_numbers
+            )
+
+            block_features = []
+            for halflife in feature_spec.halflives:
+                weighted_sums, weights = FormFeatureBuilder.get_ewm_sums(
+                    team_values,
+                    has_value,
+                    halflife,
+                    initial_weighted_sums[halflife][block],
+                    initial_weights[halflife][block],
+                )
+                next_weighted_sums[halflife][block] = (
+                    FormFeatureBuilder.get_state_at(
+                        weighted_sums, state_match_numbers
+                    )
+                )
+                next_weights[halflife][block] = FormFeatureBuilder.get_state_at(
+                    weights, state_match_numbers
+                )
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    averages = weighted_sums / weights
+                np.copyto(
+                    averages,
+                    np.nan,
+                    where=previous_counts < feature_spec.get_ewm_min_periods(),
+                )
+                block_features.append(averages)
+
+            for i, averages in enumerate(
+                block_features, start=len(feature_spec.windows)
+            ):
+                start = i * len(columns) + first
+                # Take the new matches out of the layout again.
+                np.take(
+                    averages.reshape(len(block_values), -1),
+                    average_positions,
+                    axis=1,
+                    out=features[start : start + len(block_values)],
+                )
+
+        next_state = FormState(
+            recent_matches=matches_df[
+                match_numbers >= np.repeat(state_match_numbers, matches_counts)
+            ],
+            counts=FormFeatureBuilder.get_state_frame(
+                next_counts, team_names, columns
+            ),
+            weighted_sums={
+                halflife: FormFeatureBuilder.get_state_frame(
+                    team_state, team_names, columns
+                )
+                for halflife, team_state in next_weighted_sums.items()
+            },
+            weights={
+                halflife: FormFeatureBuilder.get_state_frame(
+                    team_state, team_names, columns
+                )
+                for halflife, team_state in next_weights.items()
+            },
+        )
+        if state is not None:
+            next_state = FormFeatureBuilder.merge_states(state, next_state)
+        return (
+            pd.DataFrame(features.T, index=df.index, columns=names),
+            next_state,
+        )
+
+    @staticmethod
+    def get_team_state(
+        state_df: pd.DataFrame | None, team_names: np.ndarray, columns: list
+    ) -> np.ndarray:
+        """
+        Get a part of the state of the teams as an array.
+
+        :param state_df: The part of the state, by team and stats column. If
+            None, the teams have no state yet.
+        :param team_names: The teams.
+        :param columns: The stats columns.
+        :return: The state by stats column and team, 0 for teams without a
+            state.
+        """
+        if state_df is None:
+            return np.zeros((len(columns), len(team_names)))
+        return (
+            state_df.reindex(index=team_names, columns=columns, fill_value=0)
+            .to_numpy(dtype='float64')
+            .T
+        )
+
+    @staticmethod
+    def get_state_frame(
+        team_state: np.ndarray, team_names: np.ndarray, columns: list
+    ) -> pd.DataFrame:
+        """
+        Get a part of the state of the teams as a dataframe.
+
+        :param team_state: The state by stats column and team.
+        :param team_names: The teams.
+        :param columns: The stats columns.
+        :return: The state by team and stats column.
+        """
+        return pd.DataFrame(
+            team_state.T,
+            index=pd.Index(team_names, name='team'),
+            columns=columns,
+        )
+
+    @staticmethod
+    def get_state_at(
+        team_values: np.ndarray, match_numbers: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the values before a given match of each team.
+
+        :param team_values: The values by column, team and match number.
+        :param match_numbers: The match number of each team.
+        :return: The values by column and team.
+        """
+        return team_values[:, np.arange(len(match_numbers)), match_numbers]
+
+    @staticmethod
+    def merge_states(state: FormState, next_state: FormState) -> FormState:
+        """
+        Merge the state of the teams that played new matches into the state
+        of all teams.
+
+        :param state: The state of all teams before the new matches.
+        :param next_state: The state of the teams that played new matches.
+        :return: The state of all teams.
+        """
+
+        def merge(
+            state_df: pd.DataFrame, next_df: pd.DataFrame
+        ) -> pd.DataFrame:
+            state_df = state_df[~state_df.index.isin(next_df.index)]
+            return pd.concat([state_df, next_df]).sort_index()
+
+        recent_matches_df = state.recent_matches[
+            ~state.recent_matches['team'].isin(next_state.counts.index)
+        ]
+        return FormState(
+            recent_matches=pd.concat(
+                [recent_matches_df, next_state.recent_matches]
+            ).sort_values('team', kind='stable'),
+            counts=merge(state.counts, next_state.counts),
+            weighted_sums={
+                halflife: merge(state_df, next_state.weighted_sums[halflife])
+                for halflife, state_df in state.weighted_sums.items()
+            },
+            weights={
+                halflife: merge(state_df, next_state.weights[halflife])
+                for halflife, state_df in state.weights.items()
+            },
+        )
+
+    @staticmethod
+    def get_ewm_sums(
+        values: np.ndarray,
+        has_value: np.ndarray,
+        halflife: float,
+        initial_weighted_sums: np.ndarray,
+        initial_weights: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the exponentially weighted sums of the values and of the weights
+        before each match. Their ratio is the average over the previous
+        matches, like pandas' ewm(halflife).mean() of the matches before.
+        Missing values are skipped, but the weights still decay over them.
+        The matches of all teams are updated at once: first the second match
+        of every team, then the third match and so on.
+
+        :param values: The values by column, team and match number, with an
+            empty match before the first match. 0 where they are missing.
+        :param has_value: Whether each value is there, in the same layout.
+        :param halflife: The half-life in matches.
+        :param initial_weighted_sums: The weighted sums before the first
+            match, by column and team.
+        :param initial_weights: The weights before the first match, by column
+            and team.
+        :return: The weighted sums of the values and of the weights by
+            column, team and match number.
+        """
+        decay = 0.5 ** (1 / halflife)
+        # Put the match number first, so that each update works on a
+        # contiguous array.
+        values = np.moveaxis(values, 2, 0).copy()
+        has_value = np.moveaxis(has_value, 2, 0).astype('float64')
+        matches = len(values) - 1
+        weighted_sums = np.empty((matches,) + values.shape[1:])
+        weights = np.empty(weighted_sums.shape)
+        if matches > 0:
+            weighted_sums[0] = initial_weighted_sums
+            weights[0] = initial_weights
+        for match_number in range(1, matches):
+            np.multiply(
+                weighted_sums[match_number - 1],
+                decay,
+                out=weighted_sums[match_number],
+            )
+            weighted_sums[match_number] += values[match_number]
+            np.multiply(
+                weights[match_number - 1], decay, out=weights[match_number]
+            )
+            weights[match_number] += has_value[match_number]
+        return (
+            np.moveaxis(weighted_sums, 0, 2),
+            np.moveaxis(weights, 0, 2),
+        )
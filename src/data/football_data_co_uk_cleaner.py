@@ -2,10 +2,16 @@
 Contains the class that is responsible for cleaning the scraped data
 from FootballDataCoUk.
 """
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
 
+from settings import TEAM_REGISTRY_FILE
+from src.data.data_format import get_data_format
+from src.data.pipeline import Pipeline, copy_frame
+from src.data.team_registry import TeamRegistry
 from src.log import get_logger
 
 logger = get_logger(__name__)
@@ -15,11 +21,38 @@ class FootballDataCoUkCleaner:
 
     """Cleans data scraped from :class:`FootballDataCoUkScraper`."""
 
+    # The columns of the notes that contain text, all others are numbers.
+    text_columns = (
+        'Div',
+        'Date',
+        'Time',
+        'HomeTeam',
+        'AwayTeam',
+        'FTR',
+        'Res',
+        'HTR',
+        'Referee',
+    )
+    # The columns that are dropped anyway, so they aren't loaded.
+    irrelevant_columns = ('Div', 'Time')
+    # The abbreviations of the bookmakers whose odds are loaded. P is
+    # Pinnacle on the total goals and Asian handicap odds, Max and Avg are
+    # the market maximum and average, AH is the market size of the handicap.
+    bookmakers = ('B365', 'BW', 'IW', 'PS', 'P', 'WH', 'VC', 'Max', 'Avg', 'AH')
+    # The endings of the odds columns after the abbreviation of the bookmaker,
+    # longest first. The closing odds have a C in between.
+    odds_suffixes = ('AHH', 'AHA', '>2.5', '<2.5', 'H', 'D', 'A', 'h')
+    # The formats of the dates, the older seasons have two digit years.
+    date_formats = ('%d/%m/%Y', '%d/%m/%y')
+
     def __init__(
         self,
         raw_data_folder_path: Path,
         cleaned_data_folder_path: Path,
         competition: str,
+        data_format: str = 'csv',
+        max_workers: int = 4,
+        team_registry: TeamRegistry = None,
     ) -> None:
         """
         Initialize the cleaner.
@@ -29,29 +62,43 @@ class FootballDataCoUkCleaner:
             to.
         :param competition: The name of the competition that was scraped. Used
             to determine which files to clean.
+        :param data_format: The format to save the cleaned data in, one of
+            :data:`data_formats`.
+        :param max_workers: The number of csv files to read in parallel.
+        :param team_registry: The registry to normalize the team names with.
+            If None, the registry in TEAM_REGISTRY_FILE is loaded.
         """
         self.raw_data_folder_path = raw_data_folder_path
         self.cleaned_data_folder_path = cleaned_data_folder_path
         self.competition = competition.replace(' ', '_').lower()
+        self.data_format = get_data_format(data_format)
+        self.max_workers = max_workers
+        if team_registry is None:
+            team_registry = TeamRegistry(Path(TEAM_REGISTRY_FILE))
+        self.team_registry = team_registry
 
     def clean(self) -> None:
         """Clean the data."""
-        odds_df = self.get_odds_df()
+        with Pipeline('FootballDataCoUkCleaner.clean') as pipeline:
+            odds_df = pipeline.run_step(self.get_odds_df)
 
-        # Column operations.
-        odds_df = self.normalize_column_names(odds_df)
-        odds_df = self.drop_irrelevant_columns(odds_df)
-        odds_df = self.rename_columns(odds_df)
+            # Column operations.
+            odds_df = pipeline.run_step(self.normalize_column_names, odds_df)
+            odds_df = pipeline.run_step(self.drop_irrelevant_columns, odds_df)
+            odds_df = pipeline.run_step(self.rename_columns, odds_df)
 
-        # Row operations.
-        odds_df = self.normalize_team_names(odds_df)
-        odds_df = self.normalize_dates(odds_df)
+            # Row operations.
+            odds_df = pipeline.run_step(
+                self.normalize_team_names, odds_df, self.team_registry
+            )
+            odds_df = pipeline.run_step(self.normalize_dates, odds_df)
 
-        # Save.
-        save_path = Path(
-            self.cleaned_data_folder_path, f'{self.competition}_odds.csv'
-        )
-        odds_df.to_csv(save_path, index=False)
+            # Save.
+            save_path = Path(
+                self.cleaned_data_folder_path,
+                f'{self.competition}_odds{self.data_format.extension}',
+            )
+            pipeline.run_step(self.data_format.save, odds_df, save_path)
         logger.info(
             f'Saved {odds_df.shape[0]} rows and {odds_df.shape[1]} cols '
             f'of data to {save_path}.'
@@ -60,19 +107,152 @@ class FootballDataCoUkCleaner:
 
     def get_odds_df(self) -> pd.DataFrame:
         """
-        Find all the odds csv files and combine them into one dataframe.
+        Find all the odds csv files and combine them into one dataframe. The
+        files are read in parallel with the dtypes of
+        :meth:`get_column_dtypes`, only the columns of the notes that are
+        relevant are loaded and the dates are parsed with the format of each
+        season. If the notes haven't been saved, all columns are loaded with
+        the dtypes pandas infers.
 
         :return: Dataframe containing all the odds' data.
         """
-        odds_dfs = []
-        for csv_file_path in self.raw_data_folder_path.glob(
-            f'*{self.competition}*odds*.csv'
-        ):
-            odds_df = pd.read_csv(csv_file_path)
-            odds_dfs.append(odds_df)
-        odds_df = pd.concat(odds_dfs)
+        notes_path = Path(self.raw_data_folder_path, 'notes.txt')
+        if notes_path.is_file():
+            dtypes = self.get_column_dtypes(self.read_notes_keys(notes_path))
+        else:
+            logger.warning(
+                f'No notes in {notes_path}, loading all columns without '
+                f'dtypes.'
+            )
+            dtypes = None
+
+        csv_file_paths = sorted(
+            self.raw_data_folder_path.glob(f'*{self.competition}*odds*.csv')
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            odds_dfs = list(
+                executor.map(
+                    lambda file_path: self.read_odds_csv(file_path, dtypes),
+                    csv_file_paths,
+                )
+            )
+        odds_df = pd.concat(odds_dfs, ignore_index=True)
+        logger.info(
+            f'Loaded {len(odds_df)} rows and {len(odds_df.columns)} cols from '
+            f'{len(csv_file_paths)} files.'
+        )
+        return odds_df
+
+    @staticmethod
+    def read_odds_csv(
+        file_path: Path, dtypes: dict[str, str | None] = None
+    ) -> pd.DataFrame:
+        """
+        Read the odds csv file of a season.
+
+        :param file_path: The path to the file.
+        :param dtypes: The dtypes of the columns to load, see
+            :meth:`get_column_dtypes`. The other columns are not loaded. If
+            None, all columns are loaded.
+        :return: Dataframe containing the odds of the season, with the dates
+            parsed if the dtypes are given.
+        """
+        if dtypes is None:
+            return pd.read_csv(file_path)
+        odds_df = pd.read_csv(
+            file_path,
+            usecols=lambda column: column in dtypes,
+            dtype={
+                column: dtype
+                for column, dtype in dtypes.items()
+                if dtype is not None
+            },
+        )
+        odds_df['Date'] = FootballDataCoUkCleaner.parse_dates(odds_df['Date'])
         return odds_df
 
+    @staticmethod
+    def read_notes_keys(notes_path: Path) -> dict[str, str]:
+        """
+        Read the keys of the columns from the notes of FootballDataCoUk.
+
+        :param notes_path: The path to the notes.
+        :return: The columns, like B365H, with the section of the notes they
+            are described in, like 'Key to 1X2 (match) betting odds data'.
+            Columns with multiple names, like 'FTHG and HG', are included
+            under each name.
+        """
+        keys = {}
+        section = None
+        for line in notes_path.read_text().splitlines():
+            line = line.strip()
+            if line.startswith(('Key to', 'Match Statistics')):
+                section = line.rstrip(':')
+            elif section is not None and ' = ' in line:
+                names = line.split(' = ')[0]
+                for name in re.split(r'\s+and\s+', names):
+                    keys[name] = section
+        return keys
+
+    @staticmethod
+    def get_column_dtypes(keys: dict[str, str]) -> dict[str, str | None]:
+        """
+        Get the dtypes of the columns to load: the text columns and counts of
+        the results and statistics, and the odds of :attr:`bookmakers`, also
+        their closing odds. Odds are float32, which keeps their two decimals.
+
+        :param keys: The columns with the section of the notes they are
+            described in, see :meth:`read_notes_keys`.
+        :return: The dtypes by column, None for the counts, whose dtype is
+            inferred.
+        """
+        cls = FootballDataCoUkCleaner
+        dtypes = {}
+        for column, section in keys.items():
+            if column in cls.irrelevant_columns:
+                continue
+            if column in cls.text_columns:
+                dtypes[column] = 'str'
+            elif 'betting' not in section:
+                # Goals, shots, cards and the like. Nullable integers are
+                # several times slower to parse, so pandas infers int64, or
+                # float64 if values are missing.
+                dtypes[column] = None
+            else:
+                suffix = next(
+                    (
+                        suffix
+                        for suffix in cls.odds_suffixes
+                        if column.endswith(suffix)
+                    ),
+                    None,
+                )
+                if suffix is None:
+                    continue
+                bookmaker = column.removesuffix(suffix)
+                if bookmaker not in cls.bookmakers:
+                    continue
+                dtypes[column] = 'float32'
+                dtypes[f'{bookmaker}C{suffix}'] = 'float32'
+        return dtypes
+
+    @staticmethod
+    def parse_dates(dates: pd.Series) -> pd.Series:
+        """
+        Parse the dates of a season with the first of :attr:`date_formats`
+        that all of them have. If none fits, the format of each date is
+        inferred.
+
+        :param dates: The dates as strings, like 18/08/17.
+        :return: The dates as datetimes.
+        """
+        for date_format in FootballDataCoUkCleaner.date_formats:
+            try:
+                return pd.to_datetime(dates, format=date_format)
+            except ValueError:
+                continue
+        return pd.to_datetime(dates, format='mixed', dayfirst=True)
+
     @staticmethod
     def normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -82,7 +262,7 @@ class FootballDataCoUkCleaner:
         :param df: Dataframe to normalize the column names of.
         :return: Dataframe with normalized column names.
         """
-        df = df.copy()
+        df = copy_frame(df)
         df.columns = df.columns.str.lower()
         logger.info('Normalized column names of dataframe.')
         return df
@@ -95,9 +275,10 @@ class FootballDataCoUkCleaner:
         :param df: Dataframe to drop the columns from.
         :return: Dataframe with the irrelevant columns dropped.
         """
-        df = df.copy()
+        df = copy_frame(df)
         cols_to_drop = ['div', 'time']
-        df = df.drop(columns=cols_to_drop)
+        # The typed loader doesn't load them in the first place.
+        df = df.drop(columns=cols_to_drop, errors='ignore')
         logger.info(
             f'Dropped {len(cols_to_drop)} irrelevant columns from dataframe. '
             f'Columns dropped: {cols_to_drop}.'
@@ -112,38 +293,30 @@ class FootballDataCoUkCleaner:
         :param df: Dataframe to rename the columns of.
         :return: Dataframe with the columns renamed.
         """
-        df = df.copy()
+        df = copy_frame(df)
         mapping = {'hometeam': 'team', 'awayteam': 'opponent'}
         df = df.rename(columns=mapping)
         logger.info('Renamed columns of dataframe.')
         return df
 
     @staticmethod
-    def normalize_team_names(df: pd.DataFrame) -> pd.DataFrame:
+    def normalize_team_names(
+        df: pd.DataFrame, team_registry: TeamRegistry = None
+    ) -> pd.DataFrame:
         """
         Normalize the team names in the dataframe to match the names in
         the scraped data from FBref.
 
         :param df: Dataframe to normalize the team names of.
+        :param team_registry: The registry of the names of the teams. If None,
+            the registry in TEAM_REGISTRY_FILE is loaded.
         :return: Dataframe with the team names normalized.
         """
-        df = df.copy()
-        mapping = {
-            'Ein Frankfurt': 'Eintracht Frankfurt',
-            "M'gladbach": 'Monchengladbach',
-            'FC Koln': 'Koln',
-            'Leverkusen': 'Bayer Leverkusen',
-            'Fortuna Dusseldorf': 'Dusseldorf',
-            'Hamburg': 'Hamburger SV',
-            'Darmstadt': 'Darmstadt 98',
-            'Paderborn': 'Paderborn 07',
-            'Hannover': 'Hannover 96',
-            'Hertha': 'Hertha BSC',
-            'Mainz': 'Mainz 05',
-            'Bielefeld': 'Arminia',
-        }
-        df['team'] = df['team'].map(mapping).fillna(df['team'])
-        df['opponent'] = df['opponent'].map(mapping).fillna(df['opponent'])
+        df = copy_frame(df)
+        if team_registry is None:
+            team_registry = TeamRegistry(Path(TEAM_REGISTRY_FILE))
+        df['team'] = team_registry.normalize(df['team'])
+        df['opponent'] = team_registry.normalize(df['opponent'])
         logger.info('Normalized team names of dataframe.')
         return df
 
@@ -153,10 +326,14 @@ class FootballDataCoUkCleaner:
         Normalize the dates in the dataframe to match the dates in
         the scraped data from FBref.
 
-        :param df: Dataframe to normalize the dates of.
+        :param df: Dataframe to normalize the dates of, as strings or already
+            parsed.
         :return: Dataframe with the dates normalized.
         """
-        df = df.copy()
+        df = copy_frame(df)
+        if pd.api.types.is_datetime64_any_dtype(df['date']):
+            logger.info('Dates of dataframe are already normalized.')
+            return df
         df['date'] = df['date'].str.replace('/', '-')
         df['date'] = pd.to_datetime(df['date'], format='mixed', dayfirst=True)
         logger.info('Normalized dates of dataframe.')
@@ -5,6 +5,10 @@ FootballDataCoUk data.
 from pathlib import Path
 import pandas as pd
 
+from src.data.data_format import get_data_format, load_dataframe
+from src.data.dtype_schema import DtypeSchema
+from src.data.match_key import MatchKeyBuilder
+from src.data.pipeline import Pipeline, copy_frame
 from src.log import get_logger
 
 logger = get_logger(__name__)
@@ -15,7 +19,11 @@ class FootballDataCoUkProcessor:
     """Processes data cleaned from :class:`FootballDataCoUkCleaner`."""
 
     def __init__(
-        self, cleaned_data_file_path: Path, processed_data_folder_path: Path
+        self,
+        cleaned_data_file_path: Path,
+        processed_data_folder_path: Path,
+        data_format: str = 'csv',
+        dtype_schema: DtypeSchema = None,
     ) -> None:
         """
         Initialize the processor.
@@ -23,20 +31,38 @@ class FootballDataCoUkProcessor:
         :param cleaned_data_file_path: Path to the cleaned data file.
         :param processed_data_folder_path: Path to the folder where the
             processed data will be saved.
+        :param data_format: The format to save the processed data in, one of
+            :data:`data_formats`. The cleaned data can be in any format.
+        :param dtype_schema: The schema of the dtypes to save the processed
+            data with. If None, the dtypes are not changed.
         """
         self.cleaned_data_file_path = cleaned_data_file_path
         self.processed_data_folder_path = processed_data_folder_path
+        self.data_format = get_data_format(data_format)
+        self.dtype_schema = dtype_schema
 
     def process(self) -> None:
         """Process cleaned data."""
-        odds_df = pd.read_csv(self.cleaned_data_file_path)
+        with Pipeline('FootballDataCoUkProcessor.process') as pipeline:
+            odds_df = pipeline.run_step(
+                load_dataframe, self.cleaned_data_file_path
+            )
 
-        odds_df = self.add_match_id_column(odds_df)
+            odds_df = pipeline.run_step(self.add_match_id_column, odds_df)
 
-        save_path = Path(
-            self.processed_data_folder_path, self.cleaned_data_file_path.name
-        )
-        odds_df.to_csv(save_path, index=False)
+            if self.dtype_schema is not None:
+                odds_df = pipeline.run_step(
+                    self.dtype_schema.apply,
+                    odds_df,
+                    self.cleaned_data_file_path.stem,
+                )
+
+            save_path = Path(
+                self.processed_data_folder_path,
+                f'{self.cleaned_data_file_path.stem}'
+                f'{self.data_format.extension}',
+            )
+            pipeline.run_step(self.data_format.save, odds_df, save_path)
         logger.info(
             f'Saved {odds_df.shape[0]} rows and '
             f'{odds_df.shape[1]} cols of data to {save_path}.'
@@ -52,9 +78,7 @@ class FootballDataCoUkProcessor:
         :param df: Dataframe containing the date and team columns.
         :return: Dataframe with the match id column.
         """
-        df = df.copy()
-        df['match_id'] = df.apply(
-            lambda row: f'{row["date"]}_{row["team"]}_{row["opponent"]}', axis=1
-        )
+        df = copy_frame(df)
+        df['match_id'] = MatchKeyBuilder.get_match_ids(df)
         logger.info('Added match id column.')
         return df
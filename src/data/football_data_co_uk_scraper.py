@@ -1,11 +1,16 @@
 """Contains the class that is responsible for scraping FootballDataCoUk."""
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from time import sleep
 
+import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
 from src.log import get_logger
+from src.data.http_cache import HttpCache
+from src.data.http_client import create_session
+from src.data.rate_limiter import RateLimiter
 
 logger = get_logger(__name__)
 
@@ -24,6 +29,11 @@ class FootballDataCoUkScraper:
         raw_data_folder_path: Path,
         seconds_to_sleep_between_requests: int = 4,
         request_headers: dict[str, str] = None,
+        session: requests.Session = None,
+        http_cache_file_path: Path = None,
+        past_seasons_max_age: float = None,
+        max_workers: int = 1,
+        rate_limiter: RateLimiter = None,
     ) -> None:
         """
         Initialize the scraper.
@@ -37,6 +47,25 @@ class FootballDataCoUkScraper:
         :param seconds_to_sleep_between_requests: The number of seconds to sleep
             between requests to FootballDataCoUk. This is to avoid getting
             blocked by the server.
+        :param session: The session to make the requests with. If None, a new
+            session is created.
+        :param http_cache_file_path: The path to the file where the ETag and
+            Last-Modified headers of the saved csv files are kept. They are
+            sent with the next request for the same file and the file isn't
+            saved again if the server responds with 304 Not Modified. If None,
+            the headers are only kept for the current run.
+        :param past_seasons_max_age: The number of seconds for which saved csv
+            files of past seasons are considered up to date and are not
+            requested at all. If None, they are always requested. Past
+            seasons that contain all of their matches are never requested.
+        :param max_workers: The number of csv files to fetch in parallel. If
+            it is greater than 1, the files are fetched by a pool of workers
+            that share a rate limiter of one request per
+            seconds_to_sleep_between_requests instead of sleeping after each
+            request.
+        :param rate_limiter: The rate limiter of the parallel requests, e.g.
+            to share it with the scrapers of other competitions. If None, a
+            rate limiter is created if max_workers is greater than 1.
         """
         self.odds_href = odds_href
         self.competition = competition
@@ -46,11 +75,25 @@ class FootballDataCoUkScraper:
             logger.info(f'Created folder {self.raw_data_folder_path}')
         self.seconds_to_sleep = seconds_to_sleep_between_requests
         self.request_headers = request_headers
+        self.max_workers = max_workers
+        # Only the parallel requests are rate limited. The sequential ones
+        # sleep after each request instead.
+        if rate_limiter is None and self.max_workers > 1:
+            rate_limiter = RateLimiter(
+                requests_per_second=1 / self.seconds_to_sleep
+            )
+        self.rate_limiter = rate_limiter if self.max_workers > 1 else None
+        self.session = session or create_session(
+            request_headers=self.request_headers, pool_size=self.max_workers
+        )
+        self.http_cache = HttpCache(http_cache_file_path)
+        self.past_seasons_max_age = past_seasons_max_age
 
     def scrape(self) -> None:
         """Scrape the odds data from the provided page."""
         self.save_notes()
-        sleep(self.seconds_to_sleep)
+        if self.rate_limiter is None:
+            sleep(self.seconds_to_sleep)
         self.save_odds()
         logger.info('DONE')
 
@@ -60,33 +103,137 @@ class FootballDataCoUkScraper:
         # If the notes file already exists, don't save it again.
         if notes_path.is_file():
             return
-        notes_response = requests.get(self.notes_url)
+        notes_response = self.get_response(self.notes_url)
         notes = notes_response.text
         with open(notes_path, 'w') as f:
             f.write(notes)
             logger.info(f'Saved {notes_path}')
 
     def save_odds(self) -> None:
-        """Save the odds data from the provided page."""
+        """
+        Save the odds data from the provided page. Past seasons that are
+        complete on disk or were fetched recently are not requested again.
+        The other seasons are fetched one after another or, if max_workers is
+        greater than 1, in parallel.
+        """
         csv_hrefs = self.get_csv_hrefs()
 
-        for href in csv_hrefs:
-            href = href.lstrip('/')
-            csv_url = f'{self.base_url}/{href}'
-            # An example of href is '/mmz4281/2122/D1.csv'.
-            year = href.split('/')[-2]
-            csv_response = requests.get(csv_url, headers=self.request_headers)
-            csv_content = csv_response.text
+        # The page lists the seasons from the newest to the oldest, so all but
+        # the first one are past seasons.
+        hrefs_to_fetch = []
+        for season_index, href in enumerate(csv_hrefs):
+            file_name = self.get_odds_file_name(href)
+            odds_path = Path(self.raw_data_folder_path, file_name)
+            if season_index == 0:
+                hrefs_to_fetch.append(href)
+            elif self.is_complete_season(odds_path):
+                logger.info(f'Skipped complete season {odds_path}')
+            elif odds_path.is_file() and self.http_cache.is_fresh(
+                file_name, self.past_seasons_max_age
+            ):
+                logger.info(f'Skipped up to date {odds_path}')
+            else:
+                hrefs_to_fetch.append(href)
+
+        try:
+            if self.rate_limiter is None:
+                for href in hrefs_to_fetch:
+                    self.save_season_odds(href)
+                    sleep(self.seconds_to_sleep)
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=self.max_workers
+                ) as executor:
+                    # Consume the results, so that errors are raised.
+                    list(executor.map(self.save_season_odds, hrefs_to_fetch))
+        finally:
+            self.http_cache.save()
+
+    def save_season_odds(self, href: str) -> None:
+        """
+        Save the odds data of a season. If the file is already saved, the
+        request is conditional and the file is only saved again if the server
+        has a newer one. If the request fails, the saved file is kept.
 
-            file_name = (
-                f'{self.competition.lower().replace(" ", "_")}_odds_{year}.csv'
+        :param href: The href of the csv file of the season.
+        """
+        file_name = self.get_odds_file_name(href)
+        odds_path = Path(self.raw_data_folder_path, file_name)
+        csv_url = f'{self.base_url}/{href.lstrip("/")}'
+        headers = (
+            self.http_cache.get_conditional_headers(file_name)
+            if odds_path.is_file()
+            else {}
+        )
+        csv_response = self.get_response(csv_url, headers=headers)
+        self.http_cache.store(file_name, csv_response)
+
+        if csv_response.status_code == 304:
+            logger.info(f'Not modified {odds_path}')
+        elif not csv_response.ok:
+            logger.error(
+                f'Could not download {csv_url} with status '
+                f'{csv_response.status_code}, {odds_path} was not saved.'
             )
-            odds_path = Path(self.raw_data_folder_path, file_name)
+        else:
             with open(odds_path, 'w') as f:
-                f.write(csv_content)
+                f.write(csv_response.text)
                 logger.info(f'Saved {odds_path}')
 
-            sleep(self.seconds_to_sleep)
+    def get_odds_file_name(self, href: str) -> str:
+        """
+        Get the name of the file the odds data of a season are saved to.
+
+        :param href: The href of the csv file of the season, for example
+            '/mmz4281/2122/D1.csv'.
+        :return: The file name, for example 'bundesliga_1_odds_2122.csv'.
+        """
+        year = href.rstrip('/').split('/')[-2]
+        return f'{self.competition.lower().replace(" ", "_")}_odds_{year}.csv'
+
+    @staticmethod
+    def is_complete_season(odds_path: Path) -> bool:
+        """
+        Check whether the saved odds data of a season contain all of its
+        matches: with n teams, every team plays every other team at home once,
+        so a complete season has n * (n - 1) matches, e.g. 306 with 18 teams.
+
+        :param odds_path: The path to the csv file of the season.
+        :return: True if the file exists and contains every match once.
+        """
+        if not odds_path.is_file():
+            return False
+        try:
+            matches_df = pd.read_csv(
+                odds_path, usecols=['HomeTeam', 'AwayTeam']
+            ).dropna()
+        except (ValueError, UnicodeDecodeError, pd.errors.ParserError):
+            return False
+        teams = pd.unique(matches_df.to_numpy().ravel())
+        return (
+            len(teams) > 1
+            and len(matches_df) == len(teams) * (len(teams) - 1)
+            and not matches_df.duplicated().any()
+        )
+
+    def get_response(
+        self, url: str, headers: dict[str, str] = None
+    ) -> requests.Response:
+        """
+        Make a request to the given url. If the requests are made in parallel,
+        wait for the rate limiter first.
+
+        :param url: The url to make the request to.
+        :param headers: Additional headers for the request.
+        :return: The response.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = self.session.get(url, headers=headers)
+        logger.info(f'Made a request to {url}')
+        if not response.ok:
+            logger.warning(f'Got status {response.status_code} from {url}')
+        return response
 
     def get_csv_hrefs(self) -> list[BeautifulSoup]:
         """
@@ -96,7 +243,7 @@ class FootballDataCoUkScraper:
         """
         self.odds_href = self.odds_href.lstrip('/')
         odds_url = f'{self.base_url}/{self.odds_href}'
-        response = requests.get(odds_url, headers=self.request_headers)
+        response = self.get_response(odds_url)
         soup = BeautifulSoup(response.text, features='html.parser')
         csv_anchors = soup.find_all('a', href=True, string=self.competition)
         return [anchor['href'] for anchor in csv_anchors]
@@ -0,0 +1,155 @@
+"""Contains the store of the form features of processed matches."""
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.features import FeatureSpec, FormState
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class FormFeatureStore:
+
+    """
+    Stores the processed matches with their form features and the
+    :class:`FormState` of the teams after them, so that the next run of the
+    processor only has to create the features of the new matches. The
+    matches of each run are saved to their own file, so that saving takes
+    time proportional to the new matches. What is stored is only used with
+    the same feature spec and the same columns of the cleaned data,
+    otherwise the store is empty.
+    """
+
+    # Increase when the stored data changes, so that the data stored by
+    # earlier versions is not used anymore.
+    version = 1
+
+    def __init__(
+        self,
+        folder_path: Path,
+        feature_spec: FeatureSpec,
+        dtypes: dict[str, str],
+    ) -> None:
+        """
+        Initialize the store. If the folder contains an index of the same
+        feature spec and columns, it is loaded.
+
+        :param folder_path: The folder to save the index and the data to. If
+            the folder does not exist, it will be created.
+        :param feature_spec: The features that are created.
+        :param dtypes: The dtypes of the columns of the cleaned data.
+        """
+        self.folder_path = folder_path
+        self.index_file_path = Path(self.folder_path, 'index.json')
+        # Stored as JSON, so that it can be compared with the stored index.
+        self.feature_spec = json.loads(json.dumps(feature_spec._asdict()))
+        self.dtypes = dtypes
+        # The number of played matches of each team that were processed.
+        self.match_counts: dict[str, int] = {}
+        # The files of the processed matches, one per run.
+        self.matches_file_names: list[str] = []
+        # The file of the state after the last run.
+        self.state_file_name: str = None
+
+        if not self.folder_path.exists():
+            self.folder_path.mkdir(parents=True)
+            logger.info(f'Created folder {self.folder_path}')
+        if self.index_file_path.is_file():
+            index = json.loads(self.index_file_path.read_text())
+            if (
+                index['version'] == self.version
+                and index['feature_spec'] == self.feature_spec
+                and index['dtypes'] == self.dtypes
+            ):
+                self.match_counts = index['match_counts']
+                self.matches_file_names = index['matches_file_names']
+                self.state_file_name = index['state_file_name']
+                logger.info(
+                    f'Loaded the processed matches of '
+                    f'{len(self.match_counts)} teams from '
+                    f'{self.index_file_path}'
+                )
+
+    def load(self) -> tuple[pd.DataFrame, FormState] | None:
+        """
+        Load the processed matches and the state of the teams after them.
+
+        :return: The matches, in the order they were saved in, and the state,
+            or None if nothing is stored.
+        """
+        if not self.match_counts:
+            return None
+        file_paths = [
+            Path(self.folder_path, file_name)
+            for file_name in [*self.matches_file_names, self.state_file_name]
+        ]
+        if not all(file_path.is_file() for file_path in file_paths):
+            return None
+        return (
+            pd.concat(map(pd.read_pickle, file_paths[:-1])),
+            pd.read_pickle(file_paths[-1]),
+        )
+
+    def save(
+        self,
+        matches_df: pd.DataFrame,
+        state: FormState,
+        match_counts: dict[str, int],
+    ) -> None:
+        """
+        Save the newly processed matches and the state of the teams after
+        them.
+
+        :param matches_df: The newly processed matches with their form
+            features.
+        :param state: The state of the teams after the matches.
+        :param match_counts: The number of played matches of each team that
+            were processed, including the new ones.
+        """
+        # Name the files after the run, so that the files of the last run are
+        # kept until the index points to the new ones.
+        run = len(self.matches_file_names)
+        previous_state_file_name = self.state_file_name
+        if len(matches_df) > 0 or not self.matches_file_names:
+            file_name = f'matches_{run}.pkl'
+            matches_df.to_pickle(Path(self.folder_path, file_name))
+            self.matches_file_names.append(file_name)
+        self.state_file_name = f'state_{run}.pkl'
+        pd.to_pickle(state, Path(self.folder_path, self.state_file_name))
+        self.match_counts = match_counts
+        self.save_index()
+        if previous_state_file_name not in (None, self.state_file_name):
+            Path(self.folder_path, previous_state_file_name).unlink(
+                missing_ok=True
+            )
+
+    def clear(self) -> None:
+        """
+        Remove the processed matches and the state, also the ones of other
+        feature specs.
+        """
+        self.matches_file_names = []
+        self.state_file_name = None
+        self.match_counts = {}
+        self.save_index()
+        for file_path in self.folder_path.glob('*.pkl'):
+            file_path.unlink()
+
+    def save_index(self) -> None:
+        """Save the index to the folder."""
+        index = {
+            'version': self.version,
+            'feature_spec': self.feature_spec,
+            'dtypes': self.dtypes,
+            'match_counts': self.match_counts,
+            'matches_file_names': self.matches_file_names,
+            'state_file_name': self.state_file_name,
+        }
+        # Write the index last and to a temporary file first, so that the
+        # index doesn't point to data of another run if the process is
+        # interrupted.
+        tmp_file_path = self.index_file_path.with_suffix('.tmp')
+        tmp_file_path.write_text(json.dumps(index, indent=2))
+        tmp_file_path.replace(self.index_file_path)
@@ -0,0 +1,220 @@
+"""Contains the class that extracts single tables from HTML pages."""
+import re
+
+import pandas as pd
+from lxml import etree
+from lxml import html as lxml_html
+from pandas.io.parsers import TextParser
+
+# Matches the whitespace that pd.read_html replaces with a single space.
+whitespace_pattern = re.compile(r'[\r\n]+|\s{2,}')
+
+
+class HtmlTableExtractor:
+
+    """
+    Extracts a single table from an HTML page. Unlike pd.read_html, which
+    parses every table of the page into a dataframe and then keeps the ones
+    that match, the page is parsed incrementally and parsing stops as soon as
+    the wanted table has been found. Only that table is converted to a
+    dataframe. The dataframe is the same as the one pd.read_html returns for
+    the table.
+
+    FBref hides some tables in HTML comments and shows them with JavaScript.
+    If the table is not part of the page, the tables in the comments are
+    searched as well.
+    """
+
+    # The number of characters that are parsed at once.
+    chunk_size = 64 * 1024
+
+    @classmethod
+    def read_table(
+        cls, html: str, match: str = None, table_id: str = None
+    ) -> pd.DataFrame:
+        """
+        Read the first table whose caption matches or that has the given id.
+
+        :param html: The HTML page.
+        :param match: A regex that the caption of the table must match.
+        :param table_id: The id of the table.
+        :return: A dataframe with the table, as pd.read_html would return it.
+        """
+        table = cls.find_table(html, match, table_id)
+        if table is None:
+            msg = (
+                f'No table found with caption matching {match!r} or id '
+                f'{table_id!r}.'
+            )
+            raise ValueError(msg)
+        return cls.table_to_dataframe(table)
+
+    @classmethod
+    def find_table(
+        cls, html: str, match: str = None, table_id: str = None
+    ) -> lxml_html.HtmlElement | None:
+        """
+        Find the first table whose caption matches or that has the given id.
+        Tables in the page come before tables in comments.
+
+        :param html: The HTML page.
+        :param match: A regex that the caption of the table must match.
+        :param table_id: The id of the table.
+        :return: The table or None if no table was found.
+        """
+        pattern = re.compile(match) if match else None
+        parser = etree.HTMLPullParser(events=('end', 'comment'), recover=True)
+        # Create the same elements as lxml.html, like pd.read_html does.
+        parser.set_element_class_lookup(lxml_html.HtmlElementClassLookup())
+        commented_tables = []
+        for start in range(0, len(html), cls.chunk_size):
+            parser.feed(html[start : start + cls.chunk_size])
+            for event, element in parser.read_events():
+                if event == 'comment':
+                    if element.text and '<table' in element.text:
+                        commented_tables.append(element.text)
+                elif element.tag == 'table' and cls.is_wanted_table(
+                    element, pattern, table_id
+                ):
+                    # Stop parsing, the rest of the page is not needed.
+                    return element
+        parser.close()
+
+        for comment in commented_tables:
+            fragment = lxml_html.fragment_fromstring(
+                comment, create_parent='div'
+            )
+            for table in fragment.iter('table'):
+                if cls.is_wanted_table(table, pattern, table_id):
+                    return table
+        return None
+
+    @staticmethod
+    def is_wanted_table(
+        table: lxml_html.HtmlElement, pattern: re.Pattern | None, table_id: str
+    ) -> bool:
+        """
+        Check whether the table is the one that is looked for.
+
+        :param table: The table.
+        :param pattern: The pattern the caption must match.
+        :param table_id: The id the table must have.
+        :return: True if the table matches the pattern and the id, whichever
+            are given.
+        """
+        if table_id is not None and table.get('id') != table_id:
+            return False
+        if pattern is not None:
+            caption = table.find('caption')
+            if caption is None:
+                return False
+            return pattern.search(''.join(caption.itertext())) is not None
+        return True
+
+    @classmethod
+    def table_to_dataframe(cls, table: lxml_html.HtmlElement) -> pd.DataFrame:
+        """
+        Convert the table to a dataframe the same way pd.read_html does. The
+        rows of the header become the levels of the columns.
+
+        :param table: The table.
+        :return: The dataframe.
+        """
+        # pd.read_html drops hidden elements and turns line breaks into
+        # spaces.
+        for element in table.xpath('.//style'):
+            element.drop_tree()
+        for element in table.xpath('.//*[@style]'):
+            style = element.get('style', '').replace(' ', '')
+            if 'display:none' in style:
+                element.drop_tree()
+        for br in table.iter('br'):
+            br.tail = '\n' + (br.tail or '')
+
+        header_rows = table.xpath('.//thead/tr')
+        body_rows = table.xpath('.//tbody//tr') + table.xpath('./tr')
+        footer_rows = table.xpath('.//tfoot//tr')
+        if not header_rows:
+            # Without a <thead>, the top rows that only have <th> cells are
+            # the header.
+            while body_rows and all(
+                cell.tag == 'th' for cell in body_rows[0].xpath('./td|./th')
+            ):
+                header_rows.append(body_rows.pop(0))
+
+        header = cls.get_row_texts(header_rows)
+        rows = header + cls.get_row_texts(body_rows)
+        rows += cls.get_row_texts(footer_rows)
+        # Fill ragged rows with empty cells.
+        width = max(len(row) for row in rows)
+        for row in rows:
+            row += [''] * (width - len(row))
+
+        if len(header) == 1:
+            header_levels = 0
+        elif header:
+            # Rows without any text are not part of the header.
+            header_levels = [
+                i for i, texts in enumerate(header) if any(texts)
+            ]
+        else:
+            header_levels = None
+        with TextParser(rows, header=header_levels, thousands=',') as parser:
+            return parser.read()
+
+    @staticmethod
+    def get_row_texts(rows: list[lxml_html.HtmlElement]) -> list[list[str]]:
+        """
+        Get the texts of the cells of the rows. Cells that span multiple
+        columns or rows are repeated in each of them.
+
+        :param rows: The rows.
+        :return: The texts of the cells by row.
+        """
+        all_texts = []
+        # The cells that span into the following rows, as
+        # (column, text, number of rows left).
+        spanning_cells = []
+        for row in rows:
+            texts = []
+            next_spanning_cells = []
+            column = 0
+            for cell in row.xpath('./td|./th'):
+                while spanning_cells and spanning_cells[0][0] <= column:
+                    spanning_column, text, rows_left = spanning_cells.pop(0)
+                    texts.append(text)
+                    if rows_left > 1:
+                        next_spanning_cells.append(
+                            (spanning_column, text, rows_left - 1)
+                        )
+                    column += 1
+
+                text = whitespace_pattern.sub(
+                    ' ', cell.text_content().strip()
+                )
+                rowspan = int(cell.get('rowspan') or 1)
+                colspan = int(cell.get('colspan') or 1)
+                for _ in range(colspan):
+                    texts.append(text)
+                    if rowspan > 1:
+                        next_spanning_cells.append((column, text, rowspan - 1))
+                    column += 1
+
+            for spanning_column, text, rows_left in spanning_cells:
+                texts.append(text)
+                if rows_left > 1:
+                    next_spanning_cells.append(
+                        (spanning_column, text, rows_left - 1)
+                    )
+            all_texts.append(texts)
+            spanning_cells = next_spanning_cells
+
+        # Add the rows that only consist of cells spanning from above.
+        while spanning_cells:
+            all_texts.append([text for _, text, _ in spanning_cells])
+            spanning_cells = [
+                (column, text, rows_left - 1)
+                for column, text, rows_left in spanning_cells
+                if rows_left > 1
+            ]
+        return all_texts
@@ -0,0 +1,134 @@
+"""Contains the cache of HTTP validators of saved responses."""
+import json
+from pathlib import Path
+from threading import Lock
+from time import time
+
+import requests
+
+from src.data.save_schedule import SaveSchedule
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class HttpCache:
+
+    """
+    Stores the validators (ETag and Last-Modified headers) of responses that
+    have been saved to files. The validators are sent with the next request for
+    the same file, so the server can respond with 304 Not Modified instead of
+    the full body. Also stores when each file was last fetched, so files can be
+    considered fresh for some time without making a request at all.
+
+    Changes are saved to the file when the save schedule says so, the owner of
+    the cache calls :meth:`save` once it is done to save the last ones.
+    """
+
+    def __init__(
+        self, file_path: Path = None, save_schedule: SaveSchedule = None
+    ) -> None:
+        """
+        Initialize the cache. If the file exists, the cache is loaded from it.
+
+        :param file_path: The path to the file to save the cache to. If None,
+            the cache is kept in memory only.
+        :param save_schedule: When to save the changed cache. If None, it is
+            saved every 100 changes or 30 seconds.
+        """
+        self.file_path = file_path
+        self.save_schedule = save_schedule or SaveSchedule()
+        # Entries by the name of the file the response was saved to.
+        self.entries: dict[str, dict] = {}
+        # The cache is shared by the workers of a concurrent crawl.
+        self.lock = Lock()
+
+        if self.file_path and self.file_path.is_file():
+            self.entries = json.loads(self.file_path.read_text())
+            logger.info(
+                f'Loaded {len(self.entries)} cache entries from '
+                f'{self.file_path}'
+            )
+
+    def get_conditional_headers(self, key: str) -> dict[str, str]:
+        """
+        Get the headers for a conditional request for the given file.
+
+        :param key: The name of the file the response was saved to.
+        :return: The If-None-Match and If-Modified-Since headers, if the
+            validators are known.
+        """
+        entry = self.entries.get(key, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def is_fresh(self, key: str, max_age: float = None) -> bool:
+        """
+        Check whether the file was fetched recently enough that it doesn't have
+        to be requested again.
+
+        :param key: The name of the file the response was saved to.
+        :param max_age: The number of seconds a fetched file stays fresh. If
+            None, files are never fresh.
+        :return: True if the file is fresh.
+        """
+        if max_age is None or key not in self.entries:
+            return False
+        return time() - self.entries[key]['fetched_at'] <= max_age
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """
+        Store the validators of the response. If the response is not
+        successful, forget the validators, because the saved file is not the
+        one they belong to anymore.
+
+        :param key: The name of the file the response was saved to.
+        :param response: The response.
+        """
+        with self.lock:
+            if response.status_code == 304 and key in self.entries:
+                self.entries[key]['fetched_at'] = time()
+            elif response.ok:
+                self.entries[key] = {
+                    'url': response.url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'fetched_at': time(),
+                }
+            else:
+                self.entries.pop(key, None)
+            is_save_due = self.save_schedule.add_change()
+        if is_save_due:
+            self.save()
+
+    def remove(self, key: str) -> None:
+        """
+        Forget the validators of the given file.
+
+        :param key: The name of the file the response was saved to.
+        """
+        with self.lock:
+            is_removed = self.entries.pop(key, None) is not None
+            is_save_due = is_removed and self.save_schedule.add_change()
+        if is_save_due:
+            self.save()
+
+    def save(self) -> None:
+        """Save the cache to the file, if it changed since it was saved."""
+        if not self.file_path:
+            return
+        with self.lock:
+            if not self.save_schedule.changes:
+                return
+            if not self.file_path.parent.exists():
+                self.file_path.parent.mkdir(parents=True)
+            # Write to a temporary file first, so that the cache isn't
+            # corrupted if the process is interrupted while writing.
+            tmp_file_path = self.file_path.with_suffix('.tmp')
+            tmp_file_path.write_text(json.dumps(self.entries, indent=2))
+            tmp_file_path.replace(self.file_path)
+            self.save_schedule.reset()
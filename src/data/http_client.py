@@ -0,0 +1,50 @@
+"""Contains the HTTP session that is shared by the crawlers and scrapers."""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Responses with these statuses are retried. FBref responds with 429 when it
+# receives too many requests and the servers occasionally fail with 5xx.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def create_session(
+    request_headers: dict[str, str] = None,
+    pool_size: int = 10,
+    max_retries: int = 5,
+    backoff_factor: float = 2,
+) -> requests.Session:
+    """
+    Create a session that keeps connections alive between requests and
+    retries failed requests. Compressed responses are decompressed
+    transparently.
+
+    :param request_headers: The headers to send with every request.
+    :param pool_size: The maximum number of connections to keep alive per host.
+        Should be at least the number of threads that use the session.
+    :param max_retries: The number of times a request is retried.
+    :param backoff_factor: The factor for the exponential backoff between
+        retries. The n-th retry waits backoff_factor * 2 ** (n - 1) seconds,
+        unless the response contains a Retry-After header.
+    :return: The session.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True,
+        # Return the last response instead of raising, so the caller can
+        # decide what to do with it.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if request_headers:
+        session.headers.update(request_headers)
+    return session
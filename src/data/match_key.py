@@ -0,0 +1,210 @@
+"""
+Contains the keys that identify a match in the data of FBref and
+FootballDataCoUk.
+"""
+import numpy as np
+import pandas as pd
+
+
+class MatchKeyBuilder:
+
+    """
+    Builds the keys of matches from the date and the teams, for whole columns
+    at once. There are two kinds of keys.
+
+    - The match id, a string like 2021-08-13_Brentford_Arsenal of the date,
+      the home team and the away team. It is readable and saved with the
+      processed data.
+    - The match key, an integer of the date and the ids of the home and away
+      teams. It only has a meaning together with the team ids it was built
+      with, but joins and compares much faster than the match id.
+    """
+
+    # The team ids are stored in 16 bits each, below the date.
+    team_id_bits = 16
+    max_teams = 2**team_id_bits
+
+    @staticmethod
+    def get_home_and_away_teams(
+        df: pd.DataFrame,
+        team_column: str = 'team',
+        opponent_column: str = 'opponent',
+        venue_column: str = 'venue',
+    ) -> tuple[pd.Series, pd.Series]:
+        """
+        Get the home and the away team of each match. If the dataframe has no
+        venue column, the team is the home team.
+
+        :param df: Dataframe containing the team, opponent and venue columns.
+        :param team_column: The column of the team.
+        :param opponent_column: The column of the opponent.
+        :param venue_column: The column of the venue, 'Home' if the team plays
+            at home.
+        :return: The home teams and the away teams.
+        """
+        teams = df[team_column].to_numpy(dtype=object)
+        opponents = df[opponent_column].to_numpy(dtype=object)
+        if venue_column not in df.columns:
+            return (
+                pd.Series(teams, index=df.index),
+                pd.Series(opponents, index=df.index),
+            )
+        is_home = (df[venue_column] == 'Home').to_numpy()
+        return (
+            pd.Series(np.where(is_home, teams, opponents), index=df.index),
+            pd.Series(np.where(is_home, opponents, teams), index=df.index),
+        )
+
+    @staticmethod
+    def format_dates(dates: pd.Series) -> pd.Series:
+        """
+        Format the dates as YYYY-MM-DD, so that they are the same whether they
+        were loaded as strings or as datetimes. Each distinct date is only
+        formatted once.
+
+        :param dates: The dates, as strings or datetimes.
+        :return: The formatted dates, NaN for missing dates.
+        """
+        codes, unique_dates = pd.factorize(pd.to_datetime(dates))
+        formatted_dates = np.append(
+            unique_dates.strftime('%Y-%m-%d').to_numpy(dtype=object), np.nan
+        )
+        # Missing dates have the code -1, which takes the NaN at the end.
+        return pd.Series(formatted_dates[codes], index=dates.index)
+
+    @staticmethod
+    def create_match_ids(
+        dates: pd.Series, home_teams: pd.Series, away_teams: pd.Series
+    ) -> pd.Series:
+        """
+        Create the match ids, for example 2021-08-13_Brentford_Arsenal if
+        Brentford plays at home against Arsenal on 2021-08-13.
+
+        :param dates: The dates of the matches, as strings or datetimes.
+        :param home_teams: The home teams.
+        :param away_teams: The away teams.
+        :return: The match ids, NaN if the date or a team is missing.
+        """
+        return MatchKeyBuilder.format_dates(dates).str.cat(
+            [home_teams.astype(object), away_teams.astype(object)], sep='_'
+        )
+
+    @staticmethod
+    def create_team_ids(*teams: pd.Series) -> dict[str, int]:
+        """
+        Give every team an id. Match keys of different dataframes can only be
+        compared if they are built with the same team ids, so pass the teams
+        of all of them.
+
+        :param teams: The team columns of the dataframes.
+        :return: The ids by team, in the alphabetical order of the teams.
+        """
+        unique_teams = pd.unique(
+            np.concatenate([column.dropna().to_numpy() for column in teams])
+        )
+        if len(unique_teams) > MatchKeyBuilder.max_teams:
+            msg = (
+                f'Can not give ids to {len(unique_teams)} teams, at most '
+                f'{MatchKeyBuilder.max_teams} fit into a match key.'
+            )
+            raise ValueError(msg)
+        return {team: i for i, team in enumerate(sorted(unique_teams))}
+
+    @staticmethod
+    def create_match_keys(
+        dates: pd.Series,
+        home_teams: pd.Series,
+        away_teams: pd.Series,
+        team_ids: dict[str, int],
+    ) -> pd.Series:
+        """
+        Create the integer match keys: the days since 1970-01-01 in the high
+        bits, then the ids of the home and the away team.
+
+        :param dates: The dates of the matches, as strings or datetimes.
+        :param home_teams: The home teams.
+        :param away_teams: The away teams.
+        :param team_ids: The ids by team, see :meth:`create_team_ids`.
+        :return: The match keys, -1 if the date is missing or a team has no
+            id.
+        """
+        days = (
+            pd.to_datetime(dates).dt.normalize().to_numpy(dtype='datetime64[D]')
+        )
+        # Look the teams up in a hash index instead of mapping the dictionary
+        # row by row. Unknown teams get the position -1, which takes the 0 at
+        # the end of the ids, their keys are replaced below.
+        teams = pd.Index(list(team_ids))
+        ids = np.append(np.fromiter(team_ids.values(), dtype=np.int64), 0)
+        home_positions = teams.get_indexer(home_teams)
+        away_positions = teams.get_indexer(away_teams)
+        is_missing = (
+            np.isnat(days) | (home_positions == -1) | (away_positions == -1)
+        )
+
+        bits = MatchKeyBuilder.team_id_bits
+        keys = (
+            (days.astype(np.int64) << 2 * bits)
+            | (ids[home_positions] << bits)
+            | ids[away_positions]
+        )
+        keys[is_missing] = -1
+        return pd.Series(keys, index=dates.index)
+
+    @staticmethod
+    def get_match_ids(
+        df: pd.DataFrame,
+        date_column: str = 'date',
+        team_column: str = 'team',
+        opponent_column: str = 'opponent',
+        venue_column: str = 'venue',
+    ) -> pd.Series:
+        """
+        Get the match ids of the rows of a dataframe, see
+        :meth:`create_match_ids`.
+
+        :param df: Dataframe containing the date, team, opponent and
+            optionally venue columns.
+        :param date_column: The column of the date.
+        :param team_column: The column of the team.
+        :param opponent_column: The column of the opponent.
+        :param venue_column: The column of the venue. If the dataframe has no
+            such column, the team is the home team.
+        :return: The match ids.
+        """
+        home_teams, away_teams = MatchKeyBuilder.get_home_and_away_teams(
+            df, team_column, opponent_column, venue_column
+        )
+        return MatchKeyBuilder.create_match_ids(
+            df[date_column], home_teams, away_teams
+        )
+
+    @staticmethod
+    def get_match_keys(
+        df: pd.DataFrame,
+        team_ids: dict[str, int],
+        date_column: str = 'date',
+        team_column: str = 'team',
+        opponent_column: str = 'opponent',
+        venue_column: str = 'venue',
+    ) -> pd.Series:
+        """
+        Get the integer match keys of the rows of a dataframe, see
+        :meth:`create_match_keys`.
+
+        :param df: Dataframe containing the date, team, opponent and
+            optionally venue columns.
+        :param team_ids: The ids by team, see :meth:`create_team_ids`.
+        :param date_column: The column of the date.
+        :param team_column: The column of the team.
+        :param opponent_column: The column of the opponent.
+        :param venue_column: The column of the venue. If the dataframe has no
+            such column, the team is the home team.
+        :return: The match keys.
+        """
+        home_teams, away_teams = MatchKeyBuilder.get_home_and_away_teams(
+            df, team_column, opponent_column, venue_column
+        )
+        return MatchKeyBuilder.create_match_keys(
+            df[date_column], home_teams, away_teams, team_ids
+        )
@@ -0,0 +1,100 @@
+"""Contains the manifest that records the health of saved pages."""
+import json
+from pathlib import Path
+from threading import Lock
+
+from src.data.save_schedule import SaveSchedule
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class PageManifest:
+
+    """
+    Records the health of every saved page: the status code of the response,
+    the size of the saved file and whether it is an error page. This way the
+    errored pages can be found without reading all pages again.
+    """
+
+    def __init__(
+        self, file_path: Path = None, save_schedule: SaveSchedule = None
+    ) -> None:
+        """
+        Initialize the manifest. If the file exists, the manifest is loaded
+        from it.
+
+        :param file_path: The path to the file to save the manifest to. If
+            None, the manifest is kept in memory only.
+        :param save_schedule: When to save the manifest while pages are
+            recorded. If None, it is saved every 100 records or 30 seconds.
+        """
+        self.file_path = file_path
+        self.save_schedule = save_schedule or SaveSchedule()
+        # Entries by the name of the saved page.
+        self.entries: dict[str, dict] = {}
+        # The manifest is shared by the workers of a concurrent crawl.
+        self.lock = Lock()
+
+        if self.file_path and self.file_path.is_file():
+            self.entries = json.loads(self.file_path.read_text())
+            logger.info(
+                f'Loaded {len(self.entries)} manifest entries from '
+                f'{self.file_path}'
+            )
+
+    def record(
+        self, file_name: str, size: int, errored: bool, status_code: int = None
+    ) -> None:
+        """
+        Record the health of a saved page. The manifest is saved to the file
+        when its save schedule says so, call :meth:`save` to save the last
+        records.
+
+        :param file_name: The name of the saved page.
+        :param size: The size of the saved file in bytes.
+        :param errored: Whether the page is an error page.
+        :param status_code: The status code of the response. None if the page
+            was saved before the manifest existed.
+        """
+        with self.lock:
+            self.entries[file_name] = {
+                'status_code': status_code,
+                'size': size,
+                'errored': errored,
+            }
+            is_save_due = self.save_schedule.add_change()
+        if is_save_due:
+            self.save()
+
+    def is_errored(self, file_name: str, size: int) -> bool | None:
+        """
+        Check whether the saved page is an error page according to the
+        manifest.
+
+        :param file_name: The name of the saved page.
+        :param size: The current size of the saved file in bytes. If it is not
+            the recorded size, the file was changed after it was recorded.
+        :return: Whether the page is an error page or None if the manifest
+            doesn't know.
+        """
+        entry = self.entries.get(file_name)
+        if entry is None or entry['size'] != size:
+            return None
+        return entry['errored']
+
+    def save(self) -> None:
+        """Save the manifest to the file, if it changed since it was saved."""
+        if not self.file_path:
+            return
+        with self.lock:
+            if not self.save_schedule.changes:
+                return
+            if not self.file_path.parent.exists():
+                self.file_path.parent.mkdir(parents=True)
+            # Write to a temporary file first, so that the manifest isn't
+            # corrupted if the process is interrupted while writing.
+            tmp_file_path = self.file_path.with_suffix('.tmp')
+            tmp_file_path.write_text(json.dumps(self.entries, indent=2))
+            tmp_file_path.replace(self.file_path)
+            self.save_schedule.reset()
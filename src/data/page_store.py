@@ -0,0 +1,384 @@
+"""Contains the classes that store crawled pages."""
+import gzip
+import hashlib
+import json
+from importlib.util import find_spec
+from os import listdir
+from pathlib import Path
+from threading import Lock
+from typing import ClassVar
+from uuid import uuid4
+
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class PageStore:
+
+    """
+    Stores each page as a plain HTML file in a folder. This is the layout of
+    the pages crawled by :class:`FbrefCrawler` before the pages could be
+    compressed.
+    """
+
+    def __init__(self, folder_path: Path) -> None:
+        """
+        Initialize the store.
+
+        :param folder_path: The folder with the pages. If the folder does not
+            exist, it will be created.
+        """
+        self.folder_path = folder_path
+        if not self.folder_path.exists():
+            self.folder_path.mkdir(parents=True)
+            logger.info(f'Created folder {self.folder_path}')
+
+    def list_pages(self) -> list[str]:
+        """
+        Get the names of all stored pages.
+
+        :return: A list of page names.
+        """
+        return listdir(self.folder_path)
+
+    def exists(self, name: str) -> bool:
+        """
+        Check whether the page is stored.
+
+        :param name: The name of the page.
+        :return: True if the page is stored.
+        """
+        return Path(self.folder_path, name).is_file()
+
+    def read(self, name: str) -> str:
+        """
+        Read the page.
+
+        :param name: The name of the page.
+        :return: The page.
+        """
+        return Path(self.folder_path, name).read_text()
+
+    def read_bytes(self, name: str) -> bytes:
+        """
+        Read the page as bytes.
+
+        :param name: The name of the page.
+        :return: The page.
+        """
+        return Path(self.folder_path, name).read_bytes()
+
+    def size(self, name: str) -> int:
+        """
+        Get the size of the page.
+
+        :param name: The name of the page.
+        :return: The size of the page in bytes.
+        """
+        return Path(self.folder_path, name).stat().st_size
+
+    def get_fingerprint(self, name: str) -> str:
+        """
+        Get a fingerprint of the page that changes when the page changes.
+
+        :param name: The name of the page.
+        :return: The size and modification time of the file.
+        """
+        stat = Path(self.folder_path, name).stat()
+        return f'{stat.st_size}-{stat.st_mtime_ns}'
+
+    def write(self, name: str, text: str) -> None:
+        """
+        Store the page. If a page with the same name exists, it is replaced.
+
+        :param name: The name of the page.
+        :param text: The page.
+        """
+        file_path = Path(self.folder_path, name)
+        with open(file_path, 'w') as f:
+            f.write(text)
+        logger.info(f'Saved {file_path}')
+
+    def flush(self) -> None:
+        """Save what the store keeps in memory. The files are always saved."""
+
+
+class CompressedPageStore(PageStore):
+
+    """
+    Stores the pages compressed and deduplicated by the hash of their content.
+    An index maps the names of the pages to the blobs that contain them, so
+    pages can be listed without listing the folder. Identical pages, such as
+    error pages, are stored once.
+
+    Rewriting the whole index for every page would take quadratic time over a
+    crawl, so every write appends its entry to a journal instead. The journal
+    is compacted into the index by :meth:`flush` and when the store is opened,
+    so a crawl that was interrupted doesn't lose any page.
+    """
+
+    # The name of the index file in the folder of the store.
+    index_file_name = 'index.json'
+    # The name of the file with the entries written after the index was saved.
+    journal_file_name = 'index.log'
+    # The file extensions of the blobs for each compression.
+    extensions: ClassVar[dict[str, str]] = {
+        'gzip': '.html.gz',
+        'zstd': '.html.zst',
+    }
+
+    def __init__(self, folder_path: Path, compression: str = 'gzip') -> None:
+        """
+        Initialize the store. If the folder contains an index, it is loaded,
+        otherwise an empty index is created.
+
+        :param folder_path: The folder with the blobs and the index. If the
+            folder does not exist, it will be created.
+        :param compression: The compression of new blobs, either 'gzip' or
+            'zstd'. 'zstd' requires the zstandard package. Blobs are always
+            read with the compression they were written with.
+        """
+        super().__init__(folder_path)
+        if compression not in self.extensions:
+            msg = (
+                f'Unknown compression {compression}. Use one of '
+                f'{list(self.extensions)}.'
+            )
+            raise ValueError(msg)
+        if compression == 'zstd' and find_spec('zstandard') is None:
+            # Fail before crawling instead of when the first page is written.
+            msg = 'The zstd compression requires the zstandard package.'
+            raise ValueError(msg)
+        self.compression = compression
+        self.index_file_path = Path(self.folder_path, self.index_file_name)
+        self.journal_file_path = Path(
+            self.folder_path, self.journal_file_name
+        )
+        # Index entries by the name of the page.
+        self.index: dict[str, dict] = {}
+        # Pages are written by the workers of a concurrent crawl.
+        self.lock = Lock()
+
+        if self.index_file_path.is_file():
+            self.index = json.loads(self.index_file_path.read_text())
+            logger.info(
+                f'Loaded index of {len(self.index)} pages from '
+                f'{self.index_file_path}'
+            )
+        if self.journal_file_path.is_file():
+            self.replay_journal()
+            self.flush()
+        elif not self.index_file_path.is_file():
+            # Mark the folder as compressed, even before any page is stored.
+            self.save_index()
+
+    def __getstate__(self) -> dict:
+        """
+        Get the state to pickle. The store is sent to the processes of a
+        concurrent scrape, which can't receive the lock.
+
+        :return: The state without the lock.
+        """
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restore the pickled state with a new lock.
+
+        :param state: The pickled state.
+        """
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def list_pages(self) -> list[str]:
+        """
+        Get the names of all stored pages.
+
+        :return: A list of page names.
+        """
+        return list(self.index)
+
+    def exists(self, name: str) -> bool:
+        """
+        Check whether the page is stored.
+
+        :param name: The name of the page.
+        :return: True if the page is stored.
+        """
+        return name in self.index
+
+    def read(self, name: str) -> str:
+        """
+        Read the page.
+
+        :param name: The name of the page.
+        :return: The page.
+        """
+        return self.read_bytes(name).decode()
+
+    def read_bytes(self, name: str) -> bytes:
+        """
+        Read the page as bytes.
+
+        :param name: The name of the page.
+        :return: The page.
+        """
+        entry = self.index.get(name)
+        if entry is None:
+            msg = f'Page {name} is not stored in {self.folder_path}.'
+            raise FileNotFoundError(msg)
+        blob = self.get_blob_path(entry['hash'], entry['compression'])
+        return self.decompress(blob.read_bytes(), entry['compression'])
+
+    def size(self, name: str) -> int:
+        """
+        Get the size of the page.
+
+        :param name: The name of the page.
+        :return: The size of the uncompressed page in bytes.
+        """
+        return self.index[name]['size']
+
+    def get_fingerprint(self, name: str) -> str:
+        """
+        Get a fingerprint of the page that changes when the page changes.
+
+        :param name: The name of the page.
+        :return: The hash of the content of the page.
+        """
+        return self.index[name]['hash']
+
+    def write(self, name: str, text: str) -> None:
+        """
+        Store the page. If the same content is already stored, only the index
+        is updated.
+
+        :param name: The name of the page.
+        :param text: The page.
+        """
+        content = text.encode()
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob = self.get_blob_path(content_hash, self.compression)
+        if not blob.is_file():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that a blob is never
+            # incomplete. The name is unique, because another thread might
+            # be writing the same blob.
+            tmp_blob = blob.with_name(f'{blob.name}.{uuid4().hex}.tmp')
+            tmp_blob.write_bytes(self.compress(content, self.compression))
+            tmp_blob.replace(blob)
+
+        entry = {
+            'hash': content_hash,
+            'size': len(content),
+            'compression': self.compression,
+        }
+        with self.lock:
+            self.index[name] = entry
+            with open(self.journal_file_path, 'a') as f:
+                f.write(json.dumps({'name': name, **entry}) + '\n')
+        logger.info(f'Saved {name} to {blob}')
+
+    def flush(self) -> None:
+        """Compact the journal into the index."""
+        with self.lock:
+            self.save_index()
+            self.journal_file_path.unlink(missing_ok=True)
+
+    def save_index(self) -> None:
+        """Save the index to the folder."""
+        tmp_file_path = self.index_file_path.with_suffix('.tmp')
+        tmp_file_path.write_text(json.dumps(self.index))
+        tmp_file_path.replace(self.index_file_path)
+
+    def replay_journal(self) -> None:
+        """
+        Add the entries of the journal to the index. A line that was cut off,
+        because the process was interrupted while writing it, is skipped.
+        """
+        replayed_entries = 0
+        for line in self.journal_file_path.read_text().splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(
+                    f'Skipped incomplete entry in {self.journal_file_path}'
+                )
+                continue
+            self.index[entry.pop('name')] = entry
+            replayed_entries += 1
+        logger.info(
+            f'Replayed {replayed_entries} entries from {self.journal_file_path}'
+        )
+
+    def get_blob_path(self, content_hash: str, compression: str) -> Path:
+        """
+        Get the path to the blob with the given content hash. Blobs are
+        spread over subfolders by the first two characters of the hash.
+
+        :param content_hash: The hash of the content of the blob.
+        :param compression: The compression of the blob.
+        :return: The path to the blob.
+        """
+        return Path(
+            self.folder_path,
+            'blobs',
+            content_hash[:2],
+            f'{content_hash}{self.extensions[compression]}',
+        )
+
+    @staticmethod
+    def compress(content: bytes, compression: str) -> bytes:
+        """
+        Compress the content.
+
+        :param content: The content to compress.
+        :param compression: Either 'gzip' or 'zstd'.
+        :return: The compressed content.
+        """
+        if compression == 'zstd':
+            import zstandard
+
+            return zstandard.ZstdCompressor().compress(content)
+        return gzip.compress(content)
+
+    @staticmethod
+    def decompress(content: bytes, compression: str) -> bytes:
+        """
+        Decompress the content.
+
+        :param content: The content to decompress.
+        :param compression: Either 'gzip' or 'zstd'.
+        :return: The decompressed content.
+        """
+        if compression == 'zstd':
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(content)
+        return gzip.decompress(content)
+
+
+def open_page_store(folder_path: Path, compress: bool = False) -> PageStore:
+    """
+    Open the store of the pages in the given folder. If the folder contains
+    the index of a :class:`CompressedPageStore`, the pages are compressed.
+
+    :param folder_path: The folder with the pages.
+    :param compress: Whether to compress the pages if the folder doesn't
+        contain any stored pages yet.
+    :return: The store.
+    """
+    index_file_path = Path(folder_path, CompressedPageStore.index_file_name)
+    if index_file_path.is_file():
+        return CompressedPageStore(folder_path)
+    if compress:
+        if folder_path.exists() and any(folder_path.iterdir()):
+            logger.warning(
+                f'{folder_path} contains uncompressed pages, not compressing'
+            )
+            return PageStore(folder_path)
+        return CompressedPageStore(folder_path)
+    return PageStore(folder_path)
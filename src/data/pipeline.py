@@ -0,0 +1,176 @@
+"""
+Contains the helpers that run the steps of the cleaners and processors
+without copying the data in every step.
+"""
+import sys
+from collections.abc import Callable
+from time import perf_counter
+from types import TracebackType
+from typing import NamedTuple, ParamSpec, Self, TypeVar
+
+import pandas as pd
+
+from src.log import get_logger
+
+try:
+    import resource
+except ImportError:
+    # Only available on Unix, the peak RSS isn't reported elsewhere.
+    resource = None
+
+logger = get_logger(__name__)
+
+# The parameters and the return type of a step of a pipeline.
+P = ParamSpec('P')
+T = TypeVar('T')
+
+
+def copy_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy a dataframe, so that a step can modify it without modifying the
+    dataframe of the caller. With copy-on-write enabled, as it is in a
+    :class:`Pipeline`, the copy is lazy and only the columns that the step
+    modifies are copied. Otherwise, all the data is copied.
+
+    :param df: The dataframe to copy.
+    :return: The copy.
+    """
+    return df.copy(deep=not pd.options.mode.copy_on_write)
+
+
+def get_peak_rss_mib() -> float | None:
+    """
+    Get the peak resident set size of the process so far.
+
+    :return: The peak RSS in MiB or None if it can't be measured on this
+        platform.
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS bytes.
+    if sys.platform == 'darwin':
+        return peak_rss / 2**20
+    return peak_rss / 2**10
+
+
+class StepReport(NamedTuple):
+
+    """The wall time and memory of a step of a :class:`Pipeline`."""
+
+    step: str
+    calls: int
+    seconds: float
+    # The peak RSS of the process at the end of the step, None if it can't
+    # be measured.
+    peak_rss_mib: float | None
+    # How much the step raised the peak RSS, None if it can't be measured.
+    peak_rss_increase_mib: float | None
+
+
+class Pipeline:
+
+    """
+    Runs the steps of a cleaner or processor with copy-on-write enabled, so
+    that the dataframe is shared between the steps instead of being copied
+    by each of them, see :func:`copy_frame`. The wall time and peak RSS of
+    each step are logged when the pipeline is done. Use it as a context
+    manager and run the steps with :meth:`run_step`.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Initialize the pipeline.
+
+        :param name: The name of the pipeline, used in the report.
+        """
+        self.name = name
+        # Reports by step, a step that runs multiple times, e.g. once per
+        # chunk, has a single report.
+        self.reports: dict[str, StepReport] = {}
+        self.copy_on_write = pd.option_context('mode.copy_on_write', True)
+
+    def __enter__(self) -> Self:
+        """
+        Enable copy-on-write for the steps.
+
+        :return: The pipeline.
+        """
+        self.copy_on_write.__enter__()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """
+        Restore copy-on-write and log the report of the steps.
+
+        :param exc_type: The type of the exception raised by a step, if any.
+        :param exc_value: The exception raised by a step, if any.
+        :param traceback: The traceback of the exception, if any.
+        """
+        self.copy_on_write.__exit__(exc_type, exc_value, traceback)
+        logger.info(self.format_report())
+
+    def run_step(
+        self, step: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """
+        Run a step and measure its wall time and peak RSS.
+
+        :param step: The step, e.g. a static method of a cleaner.
+        :param args: The positional arguments of the step.
+        :param kwargs: The keyword arguments of the step.
+        :return: What the step returns.
+        """
+        peak_rss_before = get_peak_rss_mib()
+        start = perf_counter()
+        result = step(*args, **kwargs)
+        seconds = perf_counter() - start
+        peak_rss = get_peak_rss_mib()
+
+        report = self.reports.get(step.__name__)
+        if report is None:
+            report = StepReport(step.__name__, 0, 0.0, 0.0, 0.0)
+        peak_rss_increase = None
+        if peak_rss is not None:
+            peak_rss_increase = (
+                report.peak_rss_increase_mib + peak_rss - peak_rss_before
+            )
+        self.reports[step.__name__] = StepReport(
+            step=step.__name__,
+            calls=report.calls + 1,
+            seconds=report.seconds + seconds,
+            peak_rss_mib=peak_rss,
+            peak_rss_increase_mib=peak_rss_increase,
+        )
+        return result
+
+    def format_report(self) -> str:
+        """
+        Format the reports of the steps as a table.
+
+        :return: The table.
+        """
+        width = max([len('Step'), *map(len, self.reports)])
+        lines = [
+            f'Steps of {self.name}:',
+            f'{"Step":<{width}}  Calls  Seconds  Peak RSS MiB  Increase MiB',
+        ]
+        for report in self.reports.values():
+            line = (
+                f'{report.step:<{width}}  {report.calls:>5}  '
+                f'{report.seconds:>7.2f}'
+            )
+            if report.peak_rss_mib is not None:
+                line += (
+                    f'  {report.peak_rss_mib:>12.1f}  '
+                    f'{report.peak_rss_increase_mib:>12.1f}'
+                )
+            lines.append(line)
+        total_seconds = sum(report.seconds for report in self.reports.values())
+        lines.append(f'Total: {total_seconds:.2f} seconds')
+        return '\n'.join(lines)
@@ -0,0 +1,60 @@
+"""Contains the rate limiter that is shared between concurrent requests."""
+from threading import Lock
+from time import monotonic, sleep
+
+
+class RateLimiter:
+
+    """
+    Token bucket rate limiter. Tokens are refilled at a constant rate up to
+    the capacity of the bucket. Every request takes one token and waits if
+    there are none left, so the requests-per-second budget is shared between
+    all threads that use the same limiter.
+    """
+
+    def __init__(self, requests_per_second: float, capacity: int = 1) -> None:
+        """
+        Initialize the rate limiter.
+
+        :param requests_per_second: The rate at which tokens are refilled.
+        :param capacity: The maximum amount of tokens that can be stored. This
+            is the maximum amount of requests that can be made in a burst.
+        """
+        if requests_per_second <= 0:
+            msg = (
+                'requests_per_second must be positive, got '
+                f'{requests_per_second}.'
+            )
+            raise ValueError(msg)
+        if capacity < 1:
+            msg = f'capacity must be at least 1, got {capacity}.'
+            raise ValueError(msg)
+
+        self.requests_per_second = requests_per_second
+        self.capacity = capacity
+        # Start with a full bucket so that the first requests don't wait.
+        self.tokens = float(capacity)
+        self.last_refill = monotonic()
+        self.lock = Lock()
+
+    def acquire(self) -> None:
+        """Take a token from the bucket. Block until one is available."""
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                # Time until the next token is available.
+                seconds_to_wait = (1 - self.tokens) / self.requests_per_second
+            # Sleep outside the lock so other threads can check the bucket.
+            sleep(seconds_to_wait)
+
+    def refill(self) -> None:
+        """Add the tokens that have accumulated since the last refill."""
+        now = monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.requests_per_second
+        )
+        self.last_refill = now
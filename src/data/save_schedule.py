@@ -0,0 +1,52 @@
+"""Contains the schedule for saving files that change on every request."""
+from time import monotonic
+
+
+class SaveSchedule:
+
+    """
+    Decides when to save a file that changes on every request of a crawl,
+    like the manifest of the saved pages. Saving the whole file after every
+    change takes time quadratic in the number of changes, so it is saved
+    after a number of changes or once the oldest unsaved change is some
+    seconds old, whichever comes first. The owner of the file still has to
+    save it at the end.
+
+    The schedule isn't thread-safe, the owner calls it under its own lock.
+    """
+
+    def __init__(self, max_changes: int = 100, max_seconds: float = 30) -> None:
+        """
+        Initialize the schedule.
+
+        :param max_changes: The number of unsaved changes after which the file
+            should be saved.
+        :param max_seconds: The number of seconds after the first unsaved
+            change after which the file should be saved.
+        """
+        if max_changes < 1:
+            msg = f'max_changes must be at least 1, got {max_changes}.'
+            raise ValueError(msg)
+
+        self.max_changes = max_changes
+        self.max_seconds = max_seconds
+        self.changes = 0
+        self.first_change_time = 0.0
+
+    def add_change(self) -> bool:
+        """
+        Count an unsaved change.
+
+        :return: Whether the file should be saved now.
+        """
+        if self.changes == 0:
+            self.first_change_time = monotonic()
+        self.changes += 1
+        return (
+            self.changes >= self.max_changes
+            or monotonic() - self.first_change_time >= self.max_seconds
+        )
+
+    def reset(self) -> None:
+        """Forget the changes, after the file was saved."""
+        self.changes = 0
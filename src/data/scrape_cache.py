@@ -0,0 +1,98 @@
+"""Contains the cache of the dataframes scraped off team pages."""
+import hashlib
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class ScrapeCache:
+
+    """
+    Stores the dataframe scraped off the pages of each team in each season,
+    together with the fingerprint of the pages it was scraped from. As long as
+    the fingerprint doesn't change, the pages don't have to be parsed again.
+    """
+
+    # Increase when the scraped dataframes change, so that the dataframes
+    # cached by earlier versions are not used anymore.
+    version = 1
+
+    def __init__(self, folder_path: Path) -> None:
+        """
+        Initialize the cache. If the folder contains an index, it is loaded.
+
+        :param folder_path: The folder to save the index and the dataframes
+            to. If the folder does not exist, it will be created.
+        """
+        self.folder_path = folder_path
+        self.index_file_path = Path(self.folder_path, 'index.json')
+        # Entries by the name of the team stats page.
+        self.entries: dict[str, dict] = {}
+
+        if not self.folder_path.exists():
+            self.folder_path.mkdir(parents=True)
+            logger.info(f'Created folder {self.folder_path}')
+        if self.index_file_path.is_file():
+            index = json.loads(self.index_file_path.read_text())
+            if index['version'] == self.version:
+                self.entries = index['entries']
+                logger.info(
+                    f'Loaded {len(self.entries)} cached teams from '
+                    f'{self.index_file_path}'
+                )
+
+    def get(self, key: str, fingerprint: str) -> pd.DataFrame | None:
+        """
+        Get the cached dataframe, if the pages haven't changed since.
+
+        :param key: The name of the team stats page.
+        :param fingerprint: The current fingerprint of the pages.
+        :return: The dataframe or None if it is not cached or the pages have
+            changed.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return None
+        file_path = Path(self.folder_path, entry['file_name'])
+        if not file_path.is_file():
+            return None
+        return pd.read_pickle(file_path)
+
+    def store(self, key: str, fingerprint: str, df: pd.DataFrame) -> None:
+        """
+        Cache the dataframe. The index is not saved to the file, call
+        :meth:`save` for that.
+
+        :param key: The name of the team stats page.
+        :param fingerprint: The fingerprint of the pages the dataframe was
+            scraped from.
+        :param df: The dataframe.
+        """
+        # Page names are long, so the dataframes are named by their hash.
+        file_name = f'{hashlib.sha256(key.encode()).hexdigest()}.pkl'
+        df.to_pickle(Path(self.folder_path, file_name))
+        self.entries[key] = {'fingerprint': fingerprint, 'file_name': file_name}
+
+    def prune(self, keys: list[str]) -> None:
+        """
+        Remove the dataframes of the pages that are not in the given list.
+
+        :param keys: The names of the team stats pages to keep.
+        """
+        for key in set(self.entries) - set(keys):
+            entry = self.entries.pop(key)
+            Path(self.folder_path, entry['file_name']).unlink(missing_ok=True)
+
+    def save(self) -> None:
+        """Save the index to the folder."""
+        index = {'version': self.version, 'entries': self.entries}
+        # Write to a temporary file first, so that the index isn't corrupted
+        # if the process is interrupted while writing.
+        tmp_file_path = self.index_file_path.with_suffix('.tmp')
+        tmp_file_path.write_text(json.dumps(index, indent=2))
+        tmp_file_path.replace(self.index_file_path)
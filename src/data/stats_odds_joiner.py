@@ -0,0 +1,432 @@
+"""
+Contains the class that joins the processed FBref matches with the processed
+FootballDataCoUk odds.
+"""
+from pathlib import Path
+from typing import ClassVar
+
+import numpy as np
+import pandas as pd
+
+from src.data.data_format import get_data_format
+from src.data.dtype_schema import DtypeSchema, load_processed_dataframe
+from src.data.match_key import MatchKeyBuilder
+from src.data.pipeline import Pipeline
+from src.data.team_registry import TeamRegistry
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class StatsOddsJoiner:
+
+    """
+    Joins the odds processed by :class:`FootballDataCoUkProcessor` onto the
+    matches processed by :class:`FbrefProcessor`. Both are aligned on the
+    integer match keys of :class:`MatchKeyBuilder`, so both rows of a FBref
+    match, the one of the home and the one of the away team, get the odds of
+    the match. The matches without odds and the odds without matches are
+    saved as a mismatch report with the reason they were not joined, see
+    :meth:`get_mismatches`.
+    """
+
+    # The prefix of the odds columns in the joined data, like the info_ and
+    # feat_ prefixes of the processed FBref data.
+    odds_prefix = 'odds_'
+    # The columns of the processed odds that identify the match.
+    odds_key_columns: ClassVar[tuple[str, ...]] = (
+        'date',
+        'team',
+        'opponent',
+        'match_id',
+    )
+    # How far apart the dates of a match in both sources may be to be
+    # reported as the same match on a different date, e.g. a postponed one.
+    date_tolerance = pd.Timedelta(days=60)
+    # The columns of the mismatch report.
+    mismatch_columns: ClassVar[tuple[str, ...]] = (
+        'source',
+        'date',
+        'home_team',
+        'away_team',
+        'reason',
+        'other_date',
+    )
+
+    def __init__(
+        self,
+        matches_file_path: Path,
+        odds_file_path: Path,
+        joined_data_folder_path: Path,
+        mismatch_report_file_path: Path,
+        data_format: str = 'csv',
+        dtype_schema: DtypeSchema = None,
+        team_registry: TeamRegistry = None,
+    ) -> None:
+        """
+        Initialize the joiner.
+
+        :param matches_file_path: Path to the processed FBref matches.
+        :param odds_file_path: Path to the processed FootballDataCoUk odds.
+        :param joined_data_folder_path: Path to the folder where the joined
+            data will be saved, as <matches>_odds.
+        :param mismatch_report_file_path: Path to the csv file where the
+            mismatch report will be saved.
+        :param data_format: The format to save the joined data in, one of
+            :data:`data_formats`. The processed data can be in any format.
+        :param dtype_schema: The schema of the dtypes to save the joined data
+            with. If None, the dtypes are not changed.
+        :param team_registry: The registry to give the teams their ids with,
+            so that the names of a team in the registry join. If None, only
+            equal names join.
+        """
+        self.matches_file_path = matches_file_path
+        self.odds_file_path = odds_file_path
+        self.joined_data_folder_path = joined_data_folder_path
+        self.mismatch_report_file_path = mismatch_report_file_path
+        self.data_format = get_data_format(data_format)
+        self.dtype_schema = dtype_schema
+        self.team_registry = team_registry
+
+    def join(self) -> pd.DataFrame:
+        """
+        Join the odds onto the matches and save the joined data and the
+        mismatch report.
+
+        :return: The mismatches, see :meth:`get_mismatches`.
+        """
+        dataset = f'{self.matches_file_path.stem}_odds'
+        with Pipeline('StatsOddsJoiner.join') as pipeline:
+            matches_df = pipeline.run_step(
+                load_processed_dataframe, self.matches_file_path
+            )
+            odds_df = pipeline.run_step(
+                load_processed_dataframe, self.odds_file_path
+            )
+
+            match_keys, odds_match_keys = pipeline.run_step(
+                self.get_match_keys, matches_df, odds_df, self.team_registry
+            )
+
+            joined_df = pipeline.run_step(
+                self.join_odds,
+                matches_df,
+                odds_df,
+                match_keys,
+                odds_match_keys,
+            )
+            mismatches_df = pipeline.run_step(
+                self.get_mismatches,
+                matches_df,
+                odds_df,
+                match_keys,
+                odds_match_keys,
+            )
+
+            if self.dtype_schema is not None:
+                joined_df = pipeline.run_step(
+                    self.dtype_schema.apply, joined_df, dataset
+                )
+
+            save_path = Path(
+                self.joined_data_folder_path,
+                f'{dataset}{self.data_format.extension}',
+            )
+            pipeline.run_step(self.data_format.save, joined_df, save_path)
+            pipeline.run_step(self.save_mismatches, mismatches_df)
+        logger.info(
+            f'Saved {joined_df.shape[0]} rows and '
+            f'{joined_df.shape[1]} cols of data to {save_path}.'
+        )
+        logger.info(
+            f'Mismatches between the matches and the odds:\n'
+            f'{self.format_mismatch_summary(mismatches_df)}'
+        )
+        logger.info('DONE')
+        return mismatches_df
+
+    @staticmethod
+    def get_match_keys(
+        matches_df: pd.DataFrame,
+        odds_df: pd.DataFrame,
+        team_registry: TeamRegistry = None,
+    ) -> tuple[pd.Series, pd.Series]:
+        """
+        Get the integer match keys of the matches and the odds, built with
+        the same team ids, see :meth:`MatchKeyBuilder.get_match_keys`.
+
+        :param matches_df: The processed FBref matches.
+        :param odds_df: The processed FootballDataCoUk odds.
+        :param team_registry: The registry to give the teams their ids with,
+            see :meth:`TeamRegistry.create_team_ids`. If None, every name
+            gets its own id.
+        :return: The match keys of the matches and of the odds.
+        """
+        teams = [
+            matches_df['info_team'],
+            matches_df['info_opponent'],
+            odds_df['team'],
+            odds_df['opponent'],
+        ]
+        if team_registry is None:
+            team_ids = MatchKeyBuilder.create_team_ids(*teams)
+        else:
+            team_ids = team_registry.create_team_ids(*teams)
+        match_keys = MatchKeyBuilder.get_match_keys(
+            matches_df,
+            team_ids,
+            date_column='info_date',
+            team_column='info_team',
+            opponent_column='info_opponent',
+            venue_column='info_venue',
+        )
+        odds_match_keys = MatchKeyBuilder.get_match_keys(odds_df, team_ids)
+        logger.info(
+            f'Got the match keys of {len(set(team_ids.values()))} teams.'
+        )
+        return match_keys, odds_match_keys
+
+    @staticmethod
+    def join_odds(
+        matches_df: pd.DataFrame,
+        odds_df: pd.DataFrame,
+        match_keys: pd.Series,
+        odds_match_keys: pd.Series,
+    ) -> pd.DataFrame:
+        """
+        Left join the odds onto the matches on their match keys. The odds
+        columns get the :attr:`odds_prefix`, the columns that identify the
+        match are dropped from the odds, since the matches have them already.
+        If the odds have a match twice, the last odds are used.
+
+        :param matches_df: The processed FBref matches.
+        :param odds_df: The processed FootballDataCoUk odds.
+        :param match_keys: The match keys of the matches.
+        :param odds_match_keys: The match keys of the odds.
+        :return: The matches in their order with the odds columns, NaN if
+            there are no odds of a match.
+        """
+        is_joinable = (odds_match_keys >= 0) & ~odds_match_keys.duplicated(
+            keep='last'
+        )
+        duplicates = (odds_match_keys >= 0).sum() - is_joinable.sum()
+        if duplicates:
+            logger.warning(
+                f'Dropped {duplicates} odds of matches that are in the odds '
+                f'more than once.'
+            )
+        odds_df = (
+            odds_df[is_joinable.to_numpy()]
+            .drop(
+                columns=list(StatsOddsJoiner.odds_key_columns), errors='ignore'
+            )
+            .add_prefix(StatsOddsJoiner.odds_prefix)
+            .reset_index(drop=True)
+        )
+        odds_index = pd.Index(odds_match_keys[is_joinable].to_numpy())
+        # Unknown keys, also the -1 of a match without a date, get -1.
+        positions = odds_index.get_indexer(match_keys)
+        joined_odds_df = odds_df.reindex(positions)
+        joined_odds_df.index = matches_df.index
+        joined_df = pd.concat([matches_df, joined_odds_df], axis=1)
+        logger.info(
+            f'Joined odds onto {(positions >= 0).sum()} of '
+            f'{len(positions)} matches.'
+        )
+        return joined_df
+
+    @staticmethod
+    def get_unique_matches(
+        df: pd.DataFrame,
+        match_keys: pd.Series,
+        date_column: str = 'date',
+        team_column: str = 'team',
+        opponent_column: str = 'opponent',
+        venue_column: str = 'venue',
+    ) -> pd.DataFrame:
+        """
+        Get each match of a dataframe once, with its date, home and away team.
+
+        :param df: Dataframe containing the date, team, opponent and
+            optionally venue columns.
+        :param match_keys: The match keys of the rows.
+        :param date_column: The column of the date.
+        :param team_column: The column of the team.
+        :param opponent_column: The column of the opponent.
+        :param venue_column: The column of the venue. If the dataframe has no
+            such column, the team is the home team.
+        :return: The matches with match_key, date, home_team and away_team
+            columns.
+        """
+        home_teams, away_teams = MatchKeyBuilder.get_home_and_away_teams(
+            df, team_column, opponent_column, venue_column
+        )
+        matches_df = pd.DataFrame(
+            {
+                'match_key': match_keys,
+                'date': pd.to_datetime(df[date_column]),
+                'home_team': home_teams,
+                'away_team': away_teams,
+            }
+        )
+        return matches_df.drop_duplicates('match_key').reset_index(drop=True)
+
+    @staticmethod
+    def get_mismatches(
+        matches_df: pd.DataFrame,
+        odds_df: pd.DataFrame,
+        match_keys: pd.Series,
+        odds_match_keys: pd.Series,
+    ) -> pd.DataFrame:
+        """
+        Get the matches without odds and the odds without matches. Each
+        mismatch has the first of these reasons that applies.
+
+        - unknown team: the other source has no match of the home or the away
+          team, e.g. because the team is named differently.
+        - outside dates: the match is before the first or after the last
+          match of the other source, e.g. a match that was not played yet.
+        - different date: the other source has the match on another date,
+          at most :attr:`date_tolerance` apart, which is in other_date.
+        - missing: the other source does not have the match.
+
+        :param matches_df: The processed FBref matches.
+        :param odds_df: The processed FootballDataCoUk odds.
+        :param match_keys: The match keys of the matches.
+        :param odds_match_keys: The match keys of the odds.
+        :return: The mismatches with the :attr:`mismatch_columns`, first the
+            ones of the matches, then the ones of the odds, each by date.
+        """
+        unique_matches_df = StatsOddsJoiner.get_unique_matches(
+            matches_df,
+            match_keys,
+            date_column='info_date',
+            team_column='info_team',
+            opponent_column='info_opponent',
+            venue_column='info_venue',
+        )
+        unique_odds_df = StatsOddsJoiner.get_unique_matches(
+            odds_df, odds_match_keys
+        )
+        mismatches_dfs = [
+            StatsOddsJoiner.get_source_mismatches(
+                'matches', unique_matches_df, unique_odds_df
+            ),
+            StatsOddsJoiner.get_source_mismatches(
+                'odds', unique_odds_df, unique_matches_df
+            ),
+        ]
+        mismatches_df = pd.concat(mismatches_dfs, ignore_index=True)
+        logger.info(f'Found {len(mismatches_df)} mismatches.')
+        return mismatches_df
+
+    @staticmethod
+    def get_source_mismatches(
+        source: str, df: pd.DataFrame, other_df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Get the matches of one source that the other source does not have,
+        see :meth:`get_mismatches`.
+
+        :param source: The name of the source.
+        :param df: The unique matches of the source, see
+            :meth:`get_unique_matches`.
+        :param other_df: The unique matches of the other source.
+        :return: The mismatches with the :attr:`mismatch_columns`.
+        """
+        other_keys = other_df['match_key'][other_df['match_key'] >= 0]
+        is_missing = ~df['match_key'].isin(other_keys)
+        mismatches_df = (
+            df[is_missing]
+            .drop(columns='match_key')
+            .sort_values('date', kind='stable')
+            .reset_index(drop=True)
+        )
+        mismatches_df['home_team'] = mismatches_df['home_team'].astype(object)
+        mismatches_df['away_team'] = mismatches_df['away_team'].astype(object)
+
+        other_teams = pd.unique(
+            np.concatenate(
+                [
+                    other_df['home_team'].to_numpy(dtype=object),
+                    other_df['away_team'].to_numpy(dtype=object),
+                ]
+            )
+        )
+        has_unknown_team = ~(
+            mismatches_df['home_team'].isin(other_teams)
+            & mismatches_df['away_team'].isin(other_teams)
+        )
+        is_outside_dates = ~mismatches_df['date'].between(
+            other_df['date'].min(), other_df['date'].max()
+        )
+        # The same home and away team on the nearest date of the other source.
+        other_dates_df = (
+            other_df[['date', 'home_team', 'away_team']]
+            .dropna()
+            .astype({'home_team': object, 'away_team': object})
+            .assign(other_date=lambda df: df['date'])
+            .sort_values('date', kind='stable')
+        )
+        has_date = mismatches_df['date'].notna()
+        other_dates = pd.merge_asof(
+            mismatches_df[has_date],
+            other_dates_df,
+            on='date',
+            by=['home_team', 'away_team'],
+            tolerance=StatsOddsJoiner.date_tolerance,
+            direction='nearest',
+        )['other_date']
+        mismatches_df['other_date'] = pd.Series(
+            other_dates.to_numpy(), index=mismatches_df.index[has_date]
+        ).reindex(mismatches_df.index)
+
+        mismatches_df['reason'] = np.select(
+            [
+                has_unknown_team,
+                is_outside_dates,
+                mismatches_df['other_date'].notna(),
+            ],
+            ['unknown team', 'outside dates', 'different date'],
+            default='missing',
+        )
+        mismatches_df['source'] = source
+        return mismatches_df[list(StatsOddsJoiner.mismatch_columns)]
+
+    def save_mismatches(self, mismatches_df: pd.DataFrame) -> None:
+        """
+        Save the mismatch report as csv.
+
+        :param mismatches_df: The mismatches, see :meth:`get_mismatches`.
+        """
+        self.mismatch_report_file_path.parent.mkdir(
+            parents=True, exist_ok=True
+        )
+        mismatches_df.to_csv(
+            self.mismatch_report_file_path, index=False, date_format='%Y-%m-%d'
+        )
+        logger.info(
+            f'Saved {len(mismatches_df)} mismatches to '
+            f'{self.mismatch_report_file_path}.'
+        )
+
+    @staticmethod
+    def format_mismatch_summary(mismatches_df: pd.DataFrame) -> str:
+        """
+        Format the number of mismatches of each source and reason as a table.
+
+        :param mismatches_df: The mismatches, see :meth:`get_mismatches`.
+        :return: The table.
+        """
+        if mismatches_df.empty:
+            return 'No mismatches.'
+        counts = mismatches_df.groupby(
+            ['source', 'reason'], sort=True
+        ).size()
+        width = max(
+            [len('Reason'), *(len(reason) for _, reason in counts.index)]
+        )
+        lines = [f'{"Source":<7}  {"Reason":<{width}}  Matches']
+        for (source, reason), count in counts.items():
+            lines.append(f'{source:<7}  {reason:<{width}}  {count:>7}')
+        return '\n'.join(lines)
@@ -0,0 +1,176 @@
+"""
+Contains the registry of the names of the teams in the data of FBref and
+FootballDataCoUk.
+"""
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.match_key import MatchKeyBuilder
+from src.log import get_logger
+
+logger = get_logger(__name__)
+
+
+class TeamRegistry:
+
+    """
+    The teams of each league by their canonical name, the name of the team on
+    FBref, with the other names they have in the scraped data, e.g. 'Köln' on
+    FBref and 'FC Koln' on football-data.co.uk for 'Koln'. The registry is
+    saved as JSON, like {"Bundesliga": {"Koln": ["Köln", "FC Koln"]}}, so
+    adding a league or a team doesn't change any code.
+
+    Every canonical name has an integer id, in the alphabetical order of the
+    canonical names of all leagues, and its aliases have the same id. A
+    column of names is encoded into ids once per unique name, see
+    :meth:`encode`, instead of being mapped name by name.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        """
+        Initialize the registry. If the file exists, the teams are loaded from
+        it.
+
+        :param file_path: The JSON file of the registry.
+        """
+        self.file_path = file_path
+        self.leagues: dict[str, dict[str, list[str]]] = {}
+        if self.file_path.is_file():
+            self.leagues = json.loads(
+                self.file_path.read_text(encoding='utf-8')
+            )
+        else:
+            logger.warning(f'No team registry in {self.file_path}.')
+        self.teams = pd.Index([])
+        self.names = pd.Index([])
+        self.name_ids = np.array([], dtype=np.int64)
+        self.update_index()
+
+    def save(self) -> None:
+        """Save the registry to its file."""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that there is no incomplete
+        # file if saving fails.
+        tmp_file_path = self.file_path.with_name(f'{self.file_path.name}.tmp')
+        tmp_file_path.write_text(
+            json.dumps(self.leagues, indent=2, ensure_ascii=False),
+            encoding='utf-8',
+        )
+        tmp_file_path.replace(self.file_path)
+        logger.info(
+            f'Saved {len(self.teams)} teams of {len(self.leagues)} leagues to '
+            f'{self.file_path}.'
+        )
+
+    def add_team(
+        self, league: str, team: str, aliases: Iterable[str] = ()
+    ) -> None:
+        """
+        Add a team or more aliases of a team to a league. Call :meth:`save`
+        to save them.
+
+        :param league: The name of the league.
+        :param team: The canonical name of the team.
+        :param aliases: The other names of the team.
+        """
+        team_aliases = self.leagues.setdefault(league, {}).setdefault(team, [])
+        team_aliases.extend(
+            alias for alias in aliases if alias not in team_aliases
+        )
+        self.update_index()
+
+    def update_index(self) -> None:
+        """
+        Give every canonical name its id and index all names with the ids of
+        their teams.
+
+        :raises ValueError: If a name is the name of multiple teams.
+        """
+        self.teams = pd.Index(
+            sorted({team for teams in self.leagues.values() for team in teams})
+        )
+        team_ids = {}
+        for teams in self.leagues.values():
+            for team, aliases in teams.items():
+                team_id = self.teams.get_loc(team)
+                for name in [team, *aliases]:
+                    if team_ids.setdefault(name, team_id) != team_id:
+                        msg = (
+                            f'{name} is a name of both {team} and '
+                            f'{self.teams[team_ids[name]]} in '
+                            f'{self.file_path}.'
+                        )
+                        raise ValueError(msg)
+        self.names = pd.Index(list(team_ids))
+        self.name_ids = np.fromiter(team_ids.values(), dtype=np.int64)
+
+    def encode(self, names: pd.Series) -> np.ndarray:
+        """
+        Get the ids of the teams of the names. Each unique name is looked up
+        once.
+
+        :param names: The names of the teams.
+        :return: The ids, -1 for unknown or missing names.
+        """
+        codes, unique_names = pd.factorize(names)
+        # Missing names have the code -1 and unknown ones the position -1,
+        # both take the -1 at the end.
+        positions = self.names.get_indexer(unique_names)
+        unique_ids = np.append(self.name_ids, -1)[positions]
+        return np.append(unique_ids, -1)[codes]
+
+    def normalize(self, names: pd.Series) -> pd.Series:
+        """
+        Replace the names with the canonical names of their teams. Unknown and
+        missing names are kept as they are.
+
+        :param names: The names of the teams.
+        :return: The canonical names, as objects.
+        """
+        ids = self.encode(names)
+        is_known = ids >= 0
+        canonical_names = names.to_numpy(dtype=object, copy=True)
+        canonical_names[is_known] = self.teams.to_numpy(dtype=object)[
+            ids[is_known]
+        ]
+        unknown_names = pd.unique(names[~is_known].dropna())
+        if len(unknown_names):
+            logger.warning(
+                f'Kept {len(unknown_names)} names that are not in the team '
+                f'registry: {sorted(unknown_names)}.'
+            )
+        return pd.Series(canonical_names, index=names.index, name=names.name)
+
+    def create_team_ids(self, *teams: pd.Series) -> dict[str, int]:
+        """
+        Give every name of the teams an id to build match keys with, see
+        :meth:`MatchKeyBuilder.create_match_keys`. The names of a team in the
+        registry share its id, so matches are the same even if one source
+        names a team differently. Unknown names get ids after the ones of the
+        registry.
+
+        :param teams: The team columns of the dataframes.
+        :return: The ids by name.
+        :raises ValueError: If there are more teams than fit into a match key.
+        """
+        team_ids = dict(zip(self.names, self.name_ids.tolist()))
+        unique_names = pd.unique(
+            np.concatenate([column.dropna().to_numpy() for column in teams])
+        )
+        unknown_names = sorted(
+            name for name in unique_names if name not in team_ids
+        )
+        if len(self.teams) + len(unknown_names) > MatchKeyBuilder.max_teams:
+            msg = (
+                f'Can not give ids to {len(self.teams) + len(unknown_names)} '
+                f'teams, at most {MatchKeyBuilder.max_teams} fit into a match '
+                f'key.'
+            )
+            raise ValueError(msg)
+        for i, name in enumerate(unknown_names):
+            team_ids[name] = len(self.teams) + i
+        return team_ids
@@ -0,0 +1,76 @@
+"""Tests for the CrawlFrontier class."""
+from pathlib import Path
+
+from src.data.crawl_frontier import CrawlFrontier, CrawlTask
+from src.data.save_schedule import SaveSchedule
+
+
+def test_complete():
+    frontier = CrawlFrontier()
+    season_task = CrawlTask('season', '/en/comps/20/Bundesliga-Stats')
+    frontier.start(season_task.href, [season_task])
+
+    new_tasks = frontier.complete(
+        season_task,
+        [
+            CrawlTask('team', '/a'),
+            CrawlTask('team', '/a'),
+            CrawlTask('season', '/en/comps/20/2022-2023/Bundesliga-Stats', 1),
+        ],
+    )
+
+    assert new_tasks == [
+        CrawlTask('team', '/a'),
+        CrawlTask('season', '/en/comps/20/2022-2023/Bundesliga-Stats', 1),
+    ]
+    assert list(frontier.pending.values()) == new_tasks
+    assert frontier.completed == {season_task.href}
+    assert frontier.seasons == {
+        0: '/en/comps/20/Bundesliga-Stats',
+        1: '/en/comps/20/2022-2023/Bundesliga-Stats',
+    }
+
+
+def test_completed_tasks_are_not_added_again():
+    frontier = CrawlFrontier()
+    frontier.start('/start', [CrawlTask('team', '/a')])
+    frontier.complete(CrawlTask('team', '/a'), [])
+
+    assert frontier.add([CrawlTask('team', '/a')]) == []
+    assert frontier.pending == {}
+
+
+def test_save_and_load(tmpdir):
+    file_path = Path(tmpdir, 'cache', 'frontier.json')
+    frontier = CrawlFrontier(file_path)
+    frontier.start('/start', [CrawlTask('season', '/start')])
+    frontier.complete(
+        CrawlTask('season', '/start'),
+        [CrawlTask('team', '/a'), CrawlTask('team', '/b')],
+    )
+    frontier.save()
+
+    loaded_frontier = CrawlFrontier(file_path)
+
+    assert loaded_frontier.start_href == '/start'
+    assert list(loaded_frontier.pending.values()) == [
+        CrawlTask('team', '/a'),
+        CrawlTask('team', '/b'),
+    ]
+    assert loaded_frontier.completed == {'/start'}
+    assert loaded_frontier.seasons == {0: '/start'}
+    assert loaded_frontier.is_unfinished('/start')
+    assert not loaded_frontier.is_unfinished('/other')
+
+
+def test_complete_saves_on_schedule(tmpdir):
+    file_path = Path(tmpdir, 'frontier.json')
+    frontier = CrawlFrontier(
+        file_path, SaveSchedule(max_changes=2, max_seconds=60)
+    )
+    frontier.start('/start', [CrawlTask('team', '/a'), CrawlTask('team', '/b')])
+
+    frontier.complete(CrawlTask('team', '/a'), [])
+    assert CrawlFrontier(file_path).completed == set()
+    frontier.complete(CrawlTask('team', '/b'), [])
+    assert CrawlFrontier(file_path).completed == {'/a', '/b'}
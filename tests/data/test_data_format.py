@@ -0,0 +1,105 @@
+"""Tests for the data formats."""
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data.data_format import (
+    ChunkWriter,
+    CsvFormat,
+    ParquetFormat,
+    find_data_file,
+    get_data_format,
+    load_dataframe,
+)
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            'date': ['2023-08-18', '2023-08-26'],
+            'team': ['Bayern Munich', 'Augsburg'],
+            'gf': [4, 2],
+            'xg': [2.5, None],
+        }
+    )
+
+
+def test_csv_round_trip(tmpdir, df):
+    file_path = Path(tmpdir, 'matches.csv')
+
+    CsvFormat.save(df, file_path)
+
+    pd.testing.assert_frame_equal(load_dataframe(file_path), df)
+    pd.testing.assert_frame_equal(
+        load_dataframe(file_path, columns=['team', 'gf']), df[['team', 'gf']]
+    )
+    assert CsvFormat.get_dtypes(file_path) is None
+
+
+def test_parquet_round_trip(tmpdir, df):
+    pytest.importorskip('fastparquet')
+    file_path = Path(tmpdir, 'matches.parquet')
+
+    ParquetFormat.save(df, file_path)
+
+    pd.testing.assert_frame_equal(load_dataframe(file_path), df)
+    pd.testing.assert_frame_equal(
+        load_dataframe(file_path, columns=['team', 'gf']), df[['team', 'gf']]
+    )
+
+
+def test_parquet_get_dtypes(tmpdir, df):
+    # pyarrow may be installed but fail to import, e.g. with an older numpy.
+    pytest.importorskip('pyarrow', exc_type=ImportError)
+    file_path = Path(tmpdir, 'matches.parquet')
+
+    ParquetFormat.save(df, file_path)
+
+    assert ParquetFormat.get_dtypes(file_path) == {
+        'date': 'object',
+        'team': 'object',
+        'gf': 'int64',
+        'xg': 'float64',
+    }
+
+
+def test_convert_mixed_columns():
+    df = pd.DataFrame(
+        {
+            'numbers': ['1', -1, None],
+            'strings': ['1 (3)', -1, None],
+            'team': ['Augsburg', 'Bochum', None],
+        }
+    )
+
+    converted_df = ParquetFormat.convert_mixed_columns(df)
+
+    assert converted_df['numbers'].tolist()[:2] == [1, -1]
+    assert converted_df['strings'].tolist()[:2] == ['1 (3)', '-1']
+    assert converted_df['strings'].isna().tolist() == [False, False, True]
+    pd.testing.assert_series_equal(converted_df['team'], df['team'])
+
+
+def test_chunk_writer_is_abstract(tmpdir):
+    with pytest.raises(TypeError):
+        ChunkWriter(Path(tmpdir, 'matches.csv'))
+
+
+def test_get_data_format_unknown():
+    with pytest.raises(ValueError):
+        get_data_format('xlsx')
+
+
+def test_find_data_file(tmpdir, df):
+    csv_file_path = Path(tmpdir, 'matches.csv')
+    parquet_file_path = Path(tmpdir, 'matches.parquet')
+    csv_file_path.write_text('')
+    parquet_file_path.write_text('')
+    os.utime(csv_file_path, (0, 0))
+
+    assert find_data_file(Path(tmpdir), 'matches') == parquet_file_path
+    with pytest.raises(FileNotFoundError):
+        find_data_file(Path(tmpdir), 'odds')
@@ -0,0 +1,170 @@
+"""Tests for the dtype schema of the processed data."""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.dtype_schema import (
+    DtypeSchema,
+    create_dtype_schema,
+    load_processed_dataframe,
+)
+from src.data.fbref_processor import FbrefProcessor
+from tests.data.test_fbref_processor import make_cleaned_matches
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = 200
+    return pd.DataFrame(
+        {
+            'date': ['2023-08-18'] * rows,
+            'team': rng.choice(['Bochum', 'Koln', 'Mainz 05'], rows),
+            'info_venue': rng.choice(['Home', 'Away'], rows),
+            'feat_team_code': rng.integers(0, 18, rows),
+            'attendance': rng.integers(10_000, 80_000, rows),
+            'b365h': rng.integers(101, 2_000, rows) / 100,
+            'feat_gf_rolling_avg': rng.integers(0, 15, rows) / 3,
+            'feat_xg_ewm_2_avg': np.where(
+                rng.random(rows) < 0.1, np.nan, rng.random(rows) * 3
+            ),
+            # Below the smallest normal float32.
+            'tiny': rng.random(rows) * 1e-40,
+            'is_home': rng.random(rows) < 0.5,
+        }
+    )
+
+
+def test_infer_dtypes(df):
+    dtypes = DtypeSchema.infer_dtypes(df)
+
+    assert dtypes == {
+        'date': 'object',
+        'team': 'category',
+        'info_venue': 'category',
+        'feat_team_code': 'int8',
+        'attendance': 'int32',
+        'b365h': 'float32',
+        'feat_gf_rolling_avg': 'float32',
+        'feat_xg_ewm_2_avg': 'float32',
+        # float32 would change the values by more than the tolerance.
+        'tiny': 'float64',
+        'is_home': 'bool',
+    }
+
+
+def test_apply_dtypes_has_no_drift(df):
+    converted_df = DtypeSchema.apply_dtypes(df, DtypeSchema.infer_dtypes(df))
+
+    for column in df.columns:
+        if pd.api.types.is_float_dtype(df[column]):
+            np.testing.assert_allclose(
+                converted_df[column].to_numpy(dtype='float64'),
+                df[column],
+                rtol=DtypeSchema.float_rtol,
+            )
+            assert (converted_df[column].isna() == df[column].isna()).all()
+        else:
+            assert converted_df[column].astype(df[column].dtype).equals(
+                df[column]
+            )
+    # The odds stay exact to their two decimals.
+    odds = converted_df['b365h'].astype('float64')
+    assert (odds.round(2) == df['b365h']).all()
+    assert DtypeSchema.get_memory_report(
+        'matches', df, converted_df
+    ).max_relative_drift <= DtypeSchema.float_rtol
+
+
+def test_apply_dtypes_keeps_columns_that_do_not_fit(df):
+    dtypes = DtypeSchema.infer_dtypes(df)
+    df = df.assign(
+        feat_team_code=df['feat_team_code'] + 1_000,
+        attendance=df['attendance'].astype('float64'),
+        date=pd.to_datetime(df['date']),
+    )
+
+    converted_df = DtypeSchema.apply_dtypes(df, dtypes)
+
+    assert converted_df['feat_team_code'].dtype == 'int64'
+    assert converted_df['attendance'].dtype == 'float64'
+    assert converted_df['date'].dtype == 'datetime64[ns]'
+    assert converted_df['b365h'].dtype == 'float32'
+
+
+def test_get_memory_report(df):
+    converted_df = DtypeSchema.apply_dtypes(df, DtypeSchema.infer_dtypes(df))
+
+    report = DtypeSchema.get_memory_report('matches', df, converted_df)
+
+    assert report.rows == 200
+    assert report.columns == 10
+    assert report.mib_after < report.mib_before / 2
+    assert 'matches' in DtypeSchema.format_memory_reports([report])
+
+
+def test_get_relative_drift():
+    values = pd.Series([0.0, 2.0, np.nan])
+
+    assert DtypeSchema.get_relative_drift(values, values) == 0
+    assert DtypeSchema.get_relative_drift(
+        values, pd.Series([0.0, 2.5, np.nan])
+    ) == pytest.approx(0.25)
+    assert DtypeSchema.get_relative_drift(
+        values, pd.Series([0.0, 2.0, 1.0])
+    ) == np.inf
+
+
+def test_create_dtype_schema_and_load_processed_dataframe(tmpdir, df):
+    df.to_csv(Path(tmpdir, 'matches.csv'), index=False)
+    Path(tmpdir, 'notes.txt').write_text('Not a dataset.')
+    schema_file_path = Path(tmpdir, DtypeSchema.file_name)
+    schema_file_path.write_text(json.dumps({'old_odds': {'b365h': 'float32'}}))
+
+    reports = create_dtype_schema(Path(tmpdir), schema_file_path)
+    loaded_df = load_processed_dataframe(Path(tmpdir, 'matches.csv'))
+
+    assert [report.dataset for report in reports] == ['matches']
+    schema = DtypeSchema(schema_file_path)
+    assert schema.get_dtypes('old_odds') == {'b365h': 'float32'}
+    assert schema.get_dtypes('matches') == DtypeSchema.infer_dtypes(df)
+    assert loaded_df.dtypes.astype(str).to_dict() == DtypeSchema.infer_dtypes(
+        df
+    )
+
+
+def test_apply_warns_about_unknown_dataset(tmpdir, df, caplog):
+    schema = DtypeSchema(Path(tmpdir, DtypeSchema.file_name))
+
+    applied_df = schema.apply(df, 'matches')
+
+    assert applied_df is df
+    assert 'No dtypes of matches' in caplog.text
+
+
+def test_process_applies_dtype_schema(tmpdir):
+    cleaned_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    make_cleaned_matches(20).to_csv(cleaned_data_file_path, index=False)
+    Path(tmpdir, 'processed').mkdir()
+    processed_file_path = Path(tmpdir, 'processed', 'bundesliga_matches.csv')
+    FbrefProcessor(cleaned_data_file_path, Path(tmpdir, 'processed')).process()
+    expected_df = pd.read_csv(processed_file_path)
+    schema_file_path = Path(tmpdir, 'processed', DtypeSchema.file_name)
+    create_dtype_schema(Path(tmpdir, 'processed'), schema_file_path)
+
+    FbrefProcessor(
+        cleaned_data_file_path,
+        Path(tmpdir, 'processed'),
+        dtype_schema=DtypeSchema(schema_file_path),
+    ).process()
+    df = load_processed_dataframe(processed_file_path)
+
+    assert df['info_team'].dtype == 'category'
+    assert df['feat_team_code'].dtype == 'int8'
+    assert df['feat_gf_rolling_avg'].dtype == 'float32'
+    pd.testing.assert_frame_equal(
+        df, expected_df, check_dtype=False, check_categorical=False, rtol=1e-6
+    )
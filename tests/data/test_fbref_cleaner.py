@@ -1,7 +1,12 @@
 """Tests for the FbrefCleaner class."""
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import pytest
 
+from src.data.data_format import CsvFormat
 from src.data.fbref_cleaner import FbrefCleaner
 
 
@@ -57,6 +62,39 @@ def test_get_list_of_equal_columns():
     assert equal_cols == [('a', 'c'), ('b', 'd')]
 
 
+def test_get_list_of_equal_columns_is_same_as_pairwise_comparison():
+    df = pd.DataFrame(
+        {
+            'a': [1.0, 0.0, np.nan],
+            'b': [1.0, -0.0, np.nan],
+            'c': [1, 0, 2],
+            'd': ['1', None, 'x'],
+            'e': pd.Series([1, 0, 2], dtype=object),
+            'f': ['1', np.nan, 'x'],
+            'g': pd.Series([1.0, 0.0, 2.0], dtype=object),
+            'h': [1, 0, 2],
+            'i': pd.Series([1, None, 2], dtype='Int8'),
+            'j': pd.Series([1, None, 2], dtype='Int8'),
+            'k': [[1], [0], [2]],
+            'l': [[1], [0], [2]],
+        }
+    )
+
+    equal_cols = FbrefCleaner.get_list_of_equal_columns(df)
+
+    assert equal_cols == [
+        (i, j) for i, j in combinations(df, 2) if df[i].equals(df[j])
+    ]
+    assert equal_cols == [
+        ('a', 'b'),
+        ('c', 'h'),
+        ('d', 'f'),
+        ('e', 'g'),
+        ('i', 'j'),
+        ('k', 'l'),
+    ]
+
+
 def test_drop_irrelevant_columns():
     df = pd.DataFrame(
         {
@@ -73,34 +111,32 @@ def test_drop_irrelevant_columns():
     assert df.columns.tolist() == ['e']
 
 
-def test_create_penalties_columns_from_goals_columns():
+def test_parse_goals_columns():
     df = pd.DataFrame(
         {
-            'gf': ['1 (1)', '2 (1)', '3 (1)', '1'],
-            'ga': ['1 (1)', '4 (4)', '3 (2)', '2'],
+            'gf': ['1 (1)', '2 (1)', '3 (1)', '1', '1.0', None],
+            'ga': ['1 (1)', '4 (4)', '3 (2)', '2', '8.0', None],
         }
     )
 
-    df = FbrefCleaner.create_penalties_columns_from_goals_columns(df)
+    df = FbrefCleaner.parse_goals_columns(df)
 
     assert df.columns.tolist() == ['gf', 'ga', 'pen_gf', 'pen_ga']
-    assert df['pen_gf'].tolist() == ['1', '1', '1', -1]
-    assert df['pen_ga'].tolist() == ['1', '4', '2', -1]
+    assert df.dtypes.tolist() == ['Int8'] * 4
+    assert df['gf'].tolist() == [1, 2, 3, 1, 1, pd.NA]
+    assert df['ga'].tolist() == [1, 4, 3, 2, 8, pd.NA]
+    assert df['pen_gf'].tolist() == [1, 1, 1, -1, -1, -1]
+    assert df['pen_ga'].tolist() == [1, 4, 2, -1, -1, -1]
 
 
-def test_convert_goals_columns_to_int():
-    df = pd.DataFrame(
-        {
-            'gf': ['1 (1)', '2 (1)', '3 (1)', '1', '1.0'],
-            'ga': ['1 (1)', '4 (4)', '3 (2)', '2', '8.0'],
-        }
-    )
+def test_parse_goals_columns_of_numbers():
+    df = pd.DataFrame({'gf': [1.0, 2.0, np.nan], 'ga': [0, 3, -1]})
 
-    df = FbrefCleaner.convert_goals_columns_to_int(df)
+    df = FbrefCleaner.parse_goals_columns(df)
 
-    assert df.columns.tolist() == ['gf', 'ga']
-    assert df['gf'].tolist() == [1, 2, 3, 1, 1]
-    assert df['ga'].tolist() == [1, 4, 3, 2, 8]
+    assert df['gf'].tolist() == [1, 2, pd.NA]
+    assert df['ga'].tolist() == [0, 3, -1]
+    assert df['pen_gf'].tolist() == [-1, -1, -1]
 
 
 def test_narrow_down_to_single_competition():
@@ -194,3 +230,117 @@ def test_normalize_team_names_length_difference():
 
     with pytest.raises(ValueError):
         FbrefCleaner.normalize_team_names(df)
+
+
+@pytest.fixture
+def raw_matches_df():
+    teams = ['Bochum', 'Köln', 'Mainz 05']
+    rows = []
+    for day, (team, opponent) in enumerate(
+        (team, opponent)
+        for team in teams
+        for opponent in teams
+        if team != opponent
+    ):
+        rows.append(
+            {
+                'Date': f'2023-09-{day + 10}',
+                'Time': '15:30',
+                'Comp': 'DFB-Pokal' if day == 2 else 'Bundesliga',
+                'Round': f'Matchweek {day}',
+                'Venue': 'Home' if day % 2 else 'Away',
+                'Result': 'W',
+                'GF': '1 (4)' if day == 2 else f'{day % 3}.0',
+                'GA': str(day % 2),
+                'Opponent': opponent,
+                # Equal to 'shooting  xG' in the first rows only.
+                'xG': None if day < 3 else day / 10,
+                'Poss': day * 7 if day < 4 else f'{day * 7}%',
+                'Match Report': 'Match Report',
+                'Team': team,
+                'shooting  xG': None,
+                'shooting  Sh': day + 3,
+                'shooting  Comp': 'DFB-Pokal' if day == 2 else 'Bundesliga',
+                'passing  Cmp': day * 11,
+            }
+        )
+    # Future matches.
+    for day, team in enumerate(teams):
+        for month in [8, 9]:
+            rows.append(
+                {
+                    'Date': f'2099-0{month}-{day + 10}',
+                    'Comp': 'Bundesliga',
+                    'Opponent': teams[(day + month - 7) % len(teams)],
+                    'Team': team,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 100])
+def test_clean_in_chunks_is_same_as_clean(tmpdir, raw_matches_df, chunk_size):
+    raw_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    raw_matches_df.to_csv(raw_data_file_path, index=False)
+    cleaned_path = Path(tmpdir, 'cleaned')
+    chunk_cleaned_path = Path(tmpdir, 'chunk_cleaned')
+    cleaned_path.mkdir()
+    chunk_cleaned_path.mkdir()
+
+    FbrefCleaner(raw_data_file_path, cleaned_path, 'Bundesliga').clean()
+    FbrefCleaner(
+        raw_data_file_path,
+        chunk_cleaned_path,
+        'Bundesliga',
+        chunk_size=chunk_size,
+    ).clean()
+
+    expected = Path(cleaned_path, 'bundesliga_matches.csv').read_text()
+    cleaned = Path(chunk_cleaned_path, 'bundesliga_matches.csv').read_text()
+    assert cleaned == expected
+    assert 'xg' in expected.splitlines()[0].split(',')
+    assert list(chunk_cleaned_path.iterdir()) == [
+        Path(chunk_cleaned_path, 'bundesliga_matches.csv')
+    ]
+
+
+def test_clean_in_chunks_with_unknown_team(tmpdir, raw_matches_df):
+    raw_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    raw_matches_df.loc[0, 'Opponent'] = 'Unknown'
+    raw_matches_df.to_csv(raw_data_file_path, index=False)
+
+    with pytest.raises(ValueError):
+        FbrefCleaner(
+            raw_data_file_path, Path(tmpdir), 'Bundesliga', chunk_size=4
+        ).clean()
+
+    assert list(Path(tmpdir).iterdir()) == [raw_data_file_path]
+
+
+def test_get_column_plan_of_empty_file(tmpdir, raw_matches_df):
+    raw_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    raw_matches_df.iloc[:0].to_csv(raw_data_file_path, index=False)
+
+    columns = FbrefCleaner.get_column_plan(
+        CsvFormat.read_chunks(raw_data_file_path, chunk_size=4)
+    )
+
+    assert columns['xG'] == 'xg'
+    assert columns['shooting  xG'] == 'shooting_xg'
+    assert FbrefCleaner.get_column_plan([]) == {}
+
+
+def test_infer_dtypes():
+    chunks = [
+        pd.DataFrame({'a': [1], 'b': [1], 'c': [1], 'd': ['x']}),
+        pd.DataFrame({'a': [2], 'b': [np.nan], 'c': ['x'], 'd': ['y']}),
+    ]
+
+    dtypes = FbrefCleaner.infer_dtypes(chunks)
+
+    assert dtypes == {
+        'a': 'int64',
+        'b': 'float64',
+        'c': 'object',
+        'd': 'object',
+    }
@@ -2,6 +2,7 @@
 from pathlib import Path
 
 import pytest
+import requests
 
 from settings import TEST_DATA_DIR
 from src.data.fbref_crawler import FbrefCrawler
@@ -239,3 +240,231 @@ def test_convert_file_name_to_href(tmpdir, file_name, expected_href):
     href = crawler.convert_file_name_to_href(file_name)
 
     assert href == expected_href
+
+
+def mock_crawler_pages(requests_mock):
+    pages = {
+        'comps/20/Bundesliga-Stats': 'stats_table',
+        'squads/c7a9f859/Bayer-Leverkusen-Stats': 'leverkusen_filter',
+        'shooting': 'shooting_table',
+        'keeper': 'goalkeeping_table',
+        'passing': 'passing_table',
+        'passing_types': 'passtypes_table',
+        'gca': 'goal_and_shot_creation_table',
+        'defense': 'defensive_actions_table',
+        'possession': 'possession_table',
+        'misc': 'misc_table',
+    }
+    for href, test_file in pages.items():
+        if '/' not in href:
+            href = (
+                f'squads/c7a9f859/2023-2024/matchlogs/all_comps/{href}/'
+                'Bayer-Leverkusen-Match-Logs-All-Competitions'
+            )
+        requests_mock.get(
+            f'https://fbref.com/en/{href}',
+            text=Path(
+                TEST_DATA_DIR, 'test_fbref_crawler', test_file
+            ).read_text(),
+        )
+
+
+def test_crawl_concurrently(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        seconds_to_sleep_between_requests=0.001,
+        max_workers=4,
+    )
+    mock_sleep = mocker.patch('src.data.fbref_crawler.sleep')
+    mock_crawler_pages(requests_mock)
+
+    crawler.crawl()
+
+    assert mock_sleep.call_count == 0
+    assert requests_mock.call_count == 10
+    assert len(list(crawler.html_folder_path.glob('*'))) == 10
+    file_to_check = (
+        crawler.html_folder_path
+        / '_sl4sh_en_sl4sh_squads_sl4sh_c7a9f859_sl4sh_2023-2024_sl4sh_matchlogs_sl4sh_all_comps_sl4sh_passing_sl4sh_Bayer-Leverkusen-Match-Logs-All-Competitions.html'
+    )
+    assert (
+        file_to_check.exists()
+    ), f'File {file_to_check} does not exist in the folder.'
+
+
+def test_crawl_team(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    mock_crawler_pages(requests_mock)
+
+    tasks = crawler.crawl_team('/en/squads/c7a9f859/Bayer-Leverkusen-Stats', 2)
+
+    assert [task.kind for task in tasks] == ['category'] * 8
+    assert {task.season for task in tasks} == {2}
+    assert tasks[0].href == (
+        '/en/squads/c7a9f859/2023-2024/matchlogs/all_comps/shooting/'
+        'Bayer-Leverkusen-Match-Logs-All-Competitions'
+    )
+
+
+def test_crawl_resumes_interrupted_crawl(mocker, tmpdir, requests_mock):
+    frontier_file_path = Path(tmpdir, 'frontier.json')
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        frontier_file_path=frontier_file_path,
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    mock_crawler_pages(requests_mock)
+    misc_url = (
+        'https://fbref.com/en/squads/c7a9f859/2023-2024/matchlogs/all_comps/'
+        'misc/Bayer-Leverkusen-Match-Logs-All-Competitions'
+    )
+    requests_mock.get(misc_url, exc=requests.ConnectionError)
+
+    with pytest.raises(requests.ConnectionError):
+        crawler.crawl()
+
+    assert len(list(crawler.html_folder_path.glob('*'))) == 9
+    requests_mock.reset_mock()
+    mock_crawler_pages(requests_mock)
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        frontier_file_path=frontier_file_path,
+    )
+
+    crawler.crawl()
+
+    assert requests_mock.call_count == 1
+    assert requests_mock.last_request.url == misc_url
+    assert len(list(crawler.html_folder_path.glob('*'))) == 10
+    assert crawler.frontier.pending == {}
+    assert len(crawler.frontier.completed) == 10
+
+
+def test_get_page_skips_saved_pages(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        skip_saved_pages=True,
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    requests_mock.get('https://fbref.com/saved', text='<h1>Saved</h1>')
+    requests_mock.get('https://fbref.com/errored', text='<h1>Fixed</h1>')
+    crawler.save_file('_sl4sh_saved.html', '<h1>Old</h1>')
+    crawler.save_file('_sl4sh_errored.html', '<h1>403 error</h1>')
+
+    assert crawler.get_page('/saved') == '<h1>Old</h1>'
+    assert crawler.get_page('/errored') == '<h1>Fixed</h1>'
+    assert requests_mock.call_count == 1
+
+
+def test_save_page_keeps_not_modified_page(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    requests_mock.get(
+        'https://fbref.com/page', text='<h1>Page</h1>', headers={'ETag': '"1"'}
+    )
+    crawler.save_page('/page')
+    requests_mock.get('https://fbref.com/page', status_code=304)
+    mock_save_file = mocker.spy(crawler, 'save_file')
+
+    html = crawler.save_page('/page')
+
+    assert html == '<h1>Page</h1>'
+    assert requests_mock.last_request.headers['If-None-Match'] == '"1"'
+    assert mock_save_file.call_count == 0
+
+
+def test_save_page_records_error_status(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    requests_mock.get(
+        'https://fbref.com/page', text='<h1>Server Error</h1>', status_code=500
+    )
+
+    crawler.save_page('/page')
+
+    assert crawler.find_errored_pages() == ['_sl4sh_page.html']
+
+
+def test_get_page_skips_fresh_past_seasons(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        past_seasons_max_age=60,
+    )
+    mocker.patch('src.data.fbref_crawler.sleep')
+    requests_mock.get('https://fbref.com/page', text='<h1>Page</h1>')
+    crawler.save_page('/page')
+
+    crawler.get_page('/page', season=1)
+    crawler.get_page('/page', season=0)
+
+    assert requests_mock.call_count == 2
+
+
+def test_find_errored_pages_scans_unknown_pages(tmpdir):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+    )
+    crawler.save_file('ok.html', '<html><h1>Bayer Leverkusen</h1></html>')
+    crawler.save_file('errored.html', '<html><h1 id="x">403 error</h1></html>')
+    crawler.save_file('empty.html', '')
+
+    errored_pages = crawler.find_errored_pages()
+
+    assert sorted(errored_pages) == ['empty.html', 'errored.html']
+    ok_page_size = Path(crawler.html_folder_path, 'ok.html').stat().st_size
+    assert crawler.manifest.is_errored('ok.html', ok_page_size) is False
+
+
+def test_find_errored_pages_uses_manifest(mocker, tmpdir):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+    )
+    crawler.save_file('ok.html', '<h1>Ok</h1>')
+    crawler.manifest.record('ok.html', size=11, errored=False)
+    mock_read_bytes = mocker.patch('pathlib.Path.read_bytes')
+
+    assert crawler.find_errored_pages() == []
+    assert mock_read_bytes.call_count == 0
+
+
+def test_recrawl_errored_pages_gives_up(mocker, tmpdir, requests_mock):
+    crawler = FbrefCrawler(
+        competition_stats_href='/en/comps/20/Bundesliga-Stats',
+        html_folder_path=Path(tmpdir, '.pages'),
+        seconds_to_sleep_between_requests=1,
+    )
+    mock_sleep = mocker.patch('src.data.fbref_crawler.sleep')
+    requests_mock.get(
+        'https://fbref.com/page', text='<h1>403 error</h1>', status_code=403
+    )
+    crawler.save_file('_sl4sh_page.html', '<h1>403 error</h1>')
+
+    still_errored_pages = crawler.recrawl_errored_pages(max_attempts=3)
+
+    assert still_errored_pages == ['_sl4sh_page.html']
+    assert requests_mock.call_count == 3
+    # One sleep after each request and a growing back off between attempts.
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [
+        1,
+        2,
+        1,
+        4,
+        1,
+    ]
@@ -1,7 +1,12 @@
 """Tests for the FbrefProcessor class."""
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pytest
 
 from src.data.fbref_processor import FbrefProcessor
+from src.data.features import FeatureSpec
 
 
 def test_convert_obj_columns_to_int():
@@ -52,6 +57,61 @@ def test_create_rolling_average_columns():
     assert df['feat_gf_rolling_avg'].tolist() == [6.0]
 
 
+def test_create_form_feature_columns_of_multiple_teams():
+    df = pd.DataFrame(
+        {
+            'team': ['Bayern', 'Arsenal'] * 4,
+            'date': [
+                '2021-06-14',
+                '2021-06-14',
+                '2021-03-14',
+                '2021-03-14',
+                '2021-05-14',
+                '2021-05-14',
+                '2021-04-14',
+                '2021-04-14',
+            ],
+            'gf': [4, 40, 1, 10, 3, 30, 2, 20],
+        }
+    )
+
+    df = FbrefProcessor.create_form_feature_columns(df)
+
+    # The matches of Arsenal are not part of the averages of Bayern.
+    assert df['team'].tolist() == ['Arsenal', 'Bayern']
+    assert df['date'].tolist() == ['2021-06-14', '2021-06-14']
+    assert df['feat_gf_rolling_avg'].tolist() == [20.0, 2.0]
+
+
+def test_create_form_feature_columns_with_feature_spec():
+    df = pd.DataFrame(
+        {
+            'team': ['Arsenal', 'Arsenal', 'Arsenal'],
+            'date': ['2021-03-14', '2021-04-14', '2021-05-14'],
+            'gf': [1, 3, 5],
+        }
+    )
+
+    df = FbrefProcessor.create_form_feature_columns(
+        df, FeatureSpec(windows=(1, 2), halflives=(1,))
+    )
+
+    # The first match has no features and is dropped.
+    assert df.columns.tolist() == [
+        'team',
+        'date',
+        'gf',
+        'feat_gf_rolling_1_avg',
+        'feat_gf_rolling_2_avg',
+        'feat_gf_ewm_1_avg',
+    ]
+    assert df['feat_gf_rolling_1_avg'].tolist() == [1.0, 3.0]
+    assert df['feat_gf_rolling_2_avg'].isna().tolist() == [True, False]
+    assert df['feat_gf_rolling_2_avg'].iloc[1] == 2.0
+    # (0.5 * 1 + 3) / (0.5 + 1)
+    assert df['feat_gf_ewm_1_avg'].tolist() == [1.0, 3.5 / 1.5]
+
+
 def test_mark_information_columns():
     # dataframe with date, team, opponent, venue
     df = pd.DataFrame(
@@ -140,3 +200,109 @@ def test_add_match_id_column():
         '2021-05-14_Manchester_Levski',
         '2021-06-14_Bayer Munich_Arsenal',
     ]
+
+
+def test_add_match_id_column_with_datetimes():
+    df = pd.DataFrame(
+        {
+            'date': pd.to_datetime(['2021-03-14', '2021-04-14']),
+            'team': ['Arsenal', 'Oxford'],
+            'opponent': ['Brentford', 'Leverkusen'],
+            'venue': ['Home', 'Away'],
+        }
+    )
+
+    df = FbrefProcessor.add_match_id_column(df)
+
+    assert df['match_id'].tolist() == [
+        '2021-03-14_Arsenal_Brentford',
+        '2021-04-14_Leverkusen_Oxford',
+    ]
+
+
+def make_cleaned_matches(played_days: int) -> pd.DataFrame:
+    """Make up cleaned matches of 4 teams, with the next match of each."""
+    rng = np.random.default_rng(0)
+    teams = ['Bochum', 'Koln', 'Mainz 05', 'Union Berlin']
+    rows = []
+    for day in range(30):
+        for i, team in enumerate(teams):
+            # Every team plays on every other day, on different days.
+            if (day + i) % 2:
+                continue
+            is_played = day < played_days
+            rows.append(
+                {
+                    'date': f'2023-09-{day + 1:02}',
+                    'time': '15:30',
+                    'team': team,
+                    'opponent': teams[(i + day) % 4 or 1],
+                    'venue': 'Home' if day % 4 else 'Away',
+                    'result': rng.choice(['W', 'D', 'L']) if is_played else -1,
+                    'gf': rng.integers(0, 4) if is_played else -1,
+                    'xg': rng.random() * 3 if is_played else -1,
+                    'shooting_standard_sh': rng.integers(5, 20)
+                    if is_played and day != 7
+                    else np.nan,
+                }
+            )
+    df = pd.DataFrame(rows)
+    # The cleaner only keeps the next match of each team.
+    is_next_match = df['result'] != -1
+    is_next_match |= ~df.duplicated(['team', 'result'])
+    return df[is_next_match]
+
+
+@pytest.mark.parametrize('played_days', [[12, 20, 23], [0, 20], [20, 20]])
+def test_process_incrementally_is_same_as_process(tmpdir, played_days):
+    feature_spec = FeatureSpec(windows=(2, 4), halflives=(3,))
+    cleaned_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    Path(tmpdir, 'processed').mkdir()
+    Path(tmpdir, 'incremental').mkdir()
+    processor = FbrefProcessor(
+        cleaned_data_file_path,
+        Path(tmpdir, 'incremental'),
+        feature_spec=feature_spec,
+        state_folder_path=Path(tmpdir, 'state'),
+    )
+
+    for days in played_days:
+        make_cleaned_matches(days).to_csv(cleaned_data_file_path, index=False)
+        processor.process()
+    FbrefProcessor(
+        cleaned_data_file_path,
+        Path(tmpdir, 'processed'),
+        feature_spec=feature_spec,
+    ).process()
+
+    expected_df = pd.read_csv(
+        Path(tmpdir, 'processed', 'bundesliga_matches.csv')
+    )
+    df = pd.read_csv(Path(tmpdir, 'incremental', 'bundesliga_matches.csv'))
+    assert len(df) > 0
+    pd.testing.assert_frame_equal(df, expected_df, rtol=1e-12)
+
+
+def test_process_incrementally_after_matches_changed(tmpdir):
+    cleaned_data_file_path = Path(tmpdir, 'bundesliga_matches.csv')
+    processed_data_file_path = Path(
+        tmpdir, 'processed', 'bundesliga_matches.csv'
+    )
+    processed_data_file_path.parent.mkdir()
+    processor = FbrefProcessor(
+        cleaned_data_file_path,
+        processed_data_file_path.parent,
+        state_folder_path=Path(tmpdir, 'state'),
+    )
+    make_cleaned_matches(20).to_csv(cleaned_data_file_path, index=False)
+    processor.process()
+
+    # Drop a match that was processed.
+    make_cleaned_matches(25).iloc[1:].to_csv(
+        cleaned_data_file_path, index=False
+    )
+    processor.process()
+    df = pd.read_csv(processed_data_file_path)
+    processor.process(full_rebuild=True)
+
+    pd.testing.assert_frame_equal(df, pd.read_csv(processed_data_file_path))
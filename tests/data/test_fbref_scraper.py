@@ -1,10 +1,14 @@
 """Tests for the FbrefScraper class."""
+import shutil
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 
 from settings import TEST_DATA_DIR
-from src.data.fbref_scraper import FbrefScraper
+from src.data.fbref_scraper import CategoryPageKey, FbrefScraper
+from src.data.page_store import CompressedPageStore
 
 
 def test_scrape(tmpdir):
@@ -27,6 +31,26 @@ def test_scrape(tmpdir):
     assert output_file == expected_output_file
 
 
+def test_scrape_concurrently(tmpdir):
+    raw_data_folder_path = Path(tmpdir, '.data')
+    scraper = FbrefScraper(
+        html_folder_path=Path(TEST_DATA_DIR, 'test_fbref_scraper'),
+        raw_data_folder_path=raw_data_folder_path,
+        competition='Bundesliga',
+        max_workers=2,
+    )
+
+    scraper.scrape()
+
+    output_file = Path(
+        raw_data_folder_path, 'bundesliga_matches.csv'
+    ).read_text()
+    expected_output_file = Path(
+        TEST_DATA_DIR, 'test_fbref_scraper', 'bundesliga_matches.csv'
+    ).read_text()
+    assert output_file == expected_output_file
+
+
 def test_get_latest_season():
     scraper = FbrefScraper(
         html_folder_path=Path(TEST_DATA_DIR, 'test_fbref_scraper'),
@@ -73,3 +97,193 @@ def test_get_team_name(file_name, expected_team_name):
     team_name = scraper.get_team_name(file_name)
 
     assert team_name == expected_team_name
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_scrape_compressed_pages(tmpdir, max_workers):
+    html_folder_path = Path(TEST_DATA_DIR, 'test_fbref_scraper')
+    page_store = CompressedPageStore(Path(tmpdir, '.pages'))
+    for page in html_folder_path.glob('*.html'):
+        page_store.write(page.name, page.read_text())
+    raw_data_folder_path = Path(tmpdir, '.data')
+    scraper = FbrefScraper(
+        html_folder_path=page_store.folder_path,
+        raw_data_folder_path=raw_data_folder_path,
+        competition='Bundesliga',
+        max_workers=max_workers,
+    )
+
+    scraper.scrape()
+
+    output_file = Path(
+        raw_data_folder_path, 'bundesliga_matches.csv'
+    ).read_text()
+    expected_output_file = Path(
+        html_folder_path, 'bundesliga_matches.csv'
+    ).read_text()
+    assert output_file == expected_output_file
+
+
+def test_get_category_pages():
+    category_pages = FbrefScraper.get_category_pages(
+        [
+            '_sl4sh_en_sl4sh_comps_sl4sh_20_sl4sh_Bundesliga-Stats.html',
+            '_sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_Wolfsburg-Stats.html',
+            (
+                '_sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_'
+                'matchlogs_sl4sh_all_comps_sl4sh_passing_types_sl4sh_'
+                'Wolfsburg-Match-Logs-All-Competitions.html'
+            ),
+        ]
+    )
+
+    assert category_pages == {
+        CategoryPageKey('4eaa11d7', '2021-2022', 'passing_types'): (
+            '_sl4sh_en_sl4sh_squads_sl4sh_4eaa11d7_sl4sh_2021-2022_sl4sh_'
+            'matchlogs_sl4sh_all_comps_sl4sh_passing_types_sl4sh_'
+            'Wolfsburg-Match-Logs-All-Competitions.html'
+        )
+    }
+
+
+def test_get_category_dataframe_missing_page(tmpdir):
+    html_folder_path = Path(TEST_DATA_DIR, 'test_fbref_scraper')
+    scraper = FbrefScraper(
+        html_folder_path=html_folder_path,
+        raw_data_folder_path=Path(tmpdir, '.data'),
+        competition='Bundesliga',
+    )
+    del scraper.category_pages[
+        CategoryPageKey('c7a9f859', '2023-2024', 'shooting')
+    ]
+
+    with pytest.raises(FileNotFoundError, match='No shooting page'):
+        scraper.get_category_dataframe(
+            '_sl4sh_en_sl4sh_squads_sl4sh_c7a9f859_sl4sh_'
+            'Bayer-Leverkusen-Stats.html',
+            'shooting',
+            'Shooting',
+        )
+
+
+def test_scrape_only_changed_pages(tmpdir, mocker):
+    html_folder_path = Path(tmpdir, '.pages')
+    shutil.copytree(Path(TEST_DATA_DIR, 'test_fbref_scraper'), html_folder_path)
+    raw_data_folder_path = Path(tmpdir, '.data')
+    cache_folder_path = Path(tmpdir, '.cache')
+    expected_output_file = Path(
+        html_folder_path, 'bundesliga_matches.csv'
+    ).read_text()
+
+    def scrape(full_rebuild=False):
+        scraper = FbrefScraper(
+            html_folder_path=html_folder_path,
+            raw_data_folder_path=raw_data_folder_path,
+            competition='Bundesliga',
+            cache_folder_path=cache_folder_path,
+        )
+        spy = mocker.spy(scraper, 'get_team_matches_df')
+        scraper.scrape(full_rebuild=full_rebuild)
+        output_file = Path(
+            raw_data_folder_path, 'bundesliga_matches.csv'
+        ).read_text()
+        assert output_file == expected_output_file
+        return spy.call_count
+
+    assert scrape() == 1
+    # Nothing changed, the cached dataframe is used.
+    assert scrape() == 0
+    assert scrape(full_rebuild=True) == 1
+    # A changed category page is scraped again.
+    shooting_page = next(html_folder_path.glob('*_shooting_*.html'))
+    shooting_page.write_text(shooting_page.read_text() + '\n')
+    assert scrape() == 1
+    assert scrape() == 0
+
+
+def test_join_category_dataframes():
+    team_df = pd.DataFrame(
+        {
+            'Date': ['2023-09-01', '2023-08-01', '2023-08-15'],
+            'Time': ['20:30', np.nan, '15:30'],
+            'Team': 'Wolfsburg',
+        }
+    )
+    category_dfs = [
+        pd.DataFrame(
+            {
+                'Date': ['2023-08-01', '2023-11-01', '2023-09-01'],
+                'Time': [np.nan, '11:00', '20:30'],
+                'shooting Gls': [1, 2, 3],
+            }
+        ),
+        pd.DataFrame(
+            {
+                'Date': ['2023-12-15', '2023-08-15'],
+                'Time': ['10:00', '15:30'],
+                'keeper GA': [1, 0],
+            }
+        ),
+    ]
+    expected_df = team_df
+    for category_df in category_dfs:
+        expected_df = expected_df.merge(
+            category_df, on=['Date', 'Time'], how='outer'
+        )
+
+    joined_df = FbrefScraper.join_category_dataframes(team_df, category_dfs)
+
+    pd.testing.assert_frame_equal(joined_df, expected_df)
+
+
+def test_join_category_dataframes_with_same_matches():
+    team_df = pd.DataFrame(
+        {
+            'Date': ['2023-08-26', '2023-08-12', '2023-09-02'],
+            'Time': ['18:30', '15:30', np.nan],
+            'GF': [1, 2, 3],
+            'Team': 'Wolfsburg',
+        }
+    )
+    # The category tables end with a row of totals.
+    category_dfs = [
+        pd.DataFrame(
+            {
+                'Date': ['2023-08-12', '2023-08-26', np.nan],
+                'Time': ['15:30', '18:30', np.nan],
+                f'{category} Gls': [1, 2, 3],
+            }
+        )
+        for category in ['shooting', 'passing', 'misc']
+    ]
+    expected_df = team_df
+    for category_df in category_dfs:
+        expected_df = expected_df.merge(
+            category_df, on=['Date', 'Time'], how='outer'
+        )
+
+    joined_df = FbrefScraper.join_category_dataframes(team_df, category_dfs)
+
+    pd.testing.assert_frame_equal(joined_df, expected_df)
+
+
+def test_join_category_dataframes_duplicate_matches():
+    team_df = pd.DataFrame(
+        {'Date': ['2023-09-01', '2023-09-01'], 'Time': [np.nan, np.nan]}
+    )
+    category_dfs = [
+        pd.DataFrame(
+            {
+                'Date': ['2023-09-01', '2023-09-01'],
+                'Time': [np.nan, np.nan],
+                'shooting Gls': [1, 2],
+            }
+        )
+    ]
+
+    joined_df = FbrefScraper.join_category_dataframes(team_df, category_dfs)
+
+    pd.testing.assert_frame_equal(
+        joined_df,
+        team_df.merge(category_dfs[0], on=['Date', 'Time'], how='outer'),
+    )
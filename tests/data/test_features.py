@@ -0,0 +1,186 @@
+"""Tests for the form features."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.features import FeatureSpec, FormFeatureBuilder
+
+
+@pytest.fixture
+def matches_df():
+    rng = np.random.default_rng(0)
+    teams = np.repeat(['Arsenal', 'Bayern', 'Chelsea'], [2, 5, 9])
+    df = pd.DataFrame(
+        {
+            'team': teams,
+            'date': np.concatenate(
+                [pd.date_range('2021-01-01', periods=n) for n in (2, 5, 9)]
+            ),
+            'gf': rng.integers(0, 5, len(teams)).astype(float),
+            'shooting_standard_sh': rng.random(len(teams)) * 20,
+        }
+    )
+    df.loc[[4, 9, 10], 'gf'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('min_periods', [None, 1])
+def test_rolling_averages_are_same_as_grouped_rolling(
+    matches_df, min_periods
+):
+    columns = ['gf', 'shooting_standard_sh']
+    # No team has played 20 matches.
+    feature_spec = FeatureSpec(
+        windows=(1, 3, 5, 20), min_periods=min_periods
+    )
+
+    features_df = FormFeatureBuilder.create_features(
+        matches_df, columns, feature_spec, 'feat_'
+    )
+
+    for window in feature_spec.windows:
+        expected_df = (
+            matches_df[columns]
+            .groupby(matches_df['team'])
+            .rolling(
+                window,
+                closed='left',
+                min_periods=feature_spec.get_rolling_min_periods(window),
+            )
+            .mean()
+            .reset_index(level=0, drop=True)
+        )
+        expected_df.columns = [
+            FormFeatureBuilder.get_rolling_column_name('feat_', column, window)
+            for column in columns
+        ]
+        pd.testing.assert_frame_equal(
+            features_df[expected_df.columns], expected_df, check_exact=True
+        )
+
+
+def test_rolling_column_names():
+    # The averages over the default window keep their old names.
+    assert (
+        FormFeatureBuilder.get_rolling_column_name('feat_', 'gf', 3)
+        == 'feat_gf_rolling_avg'
+    )
+    assert (
+        FormFeatureBuilder.get_rolling_column_name('feat_', 'gf', 5)
+        == 'feat_gf_rolling_5_avg'
+    )
+
+
+def test_ewm_averages_are_same_as_grouped_ewm(matches_df):
+    columns = ['gf', 'shooting_standard_sh']
+    feature_spec = FeatureSpec(windows=(), halflives=(0.5, 2.5))
+
+    features_df = FormFeatureBuilder.create_features(
+        matches_df, columns, feature_spec, 'feat_'
+    )
+
+    for halflife in feature_spec.halflives:
+        # The average of a match is the one after the previous match.
+        expected_df = (
+            matches_df[columns]
+            .groupby(matches_df['team'])
+            .ewm(halflife=halflife)
+            .mean()
+            .reset_index(level=0, drop=True)
+            .groupby(matches_df['team'])
+            .shift()
+        )
+        expected_df.columns = [
+            f'feat_{column}_ewm_{halflife:g}_avg' for column in columns
+        ]
+        pd.testing.assert_frame_equal(
+            features_df[expected_df.columns], expected_df, rtol=1e-12
+        )
+
+
+@pytest.mark.parametrize('split_date', ['2021-01-01', '2021-01-04'])
+def test_update_features_is_same_as_create_features(matches_df, split_date):
+    columns = ['gf', 'shooting_standard_sh']
+    feature_spec = FeatureSpec(windows=(2, 3), halflives=(1.5,))
+    is_new_match = matches_df['date'] > split_date
+
+    _, state = FormFeatureBuilder.update_features(
+        matches_df[~is_new_match], columns, feature_spec, 'feat_'
+    )
+    features_df, next_state = FormFeatureBuilder.update_features(
+        matches_df[is_new_match], columns, feature_spec, 'feat_', state
+    )
+
+    expected_df, expected_state = FormFeatureBuilder.update_features(
+        matches_df, columns, feature_spec, 'feat_'
+    )
+    pd.testing.assert_frame_equal(
+        features_df, expected_df[is_new_match], rtol=1e-12
+    )
+    pd.testing.assert_frame_equal(
+        next_state.recent_matches, expected_state.recent_matches
+    )
+    # Arsenal has no new matches after 2021-01-04, Chelsea has 3 recent
+    # matches.
+    assert next_state.recent_matches['team'].tolist() == [
+        'Arsenal',
+        'Arsenal',
+        'Bayern',
+        'Bayern',
+        'Bayern',
+        'Chelsea',
+        'Chelsea',
+        'Chelsea',
+    ]
+    pd.testing.assert_frame_equal(next_state.counts, expected_state.counts)
+    pd.testing.assert_frame_equal(
+        next_state.weighted_sums[1.5],
+        expected_state.weighted_sums[1.5],
+        rtol=1e-12,
+    )
+    pd.testing.assert_frame_equal(
+        next_state.weights[1.5], expected_state.weights[1.5]
+    )
+
+
+def test_create_features_of_families(matches_df):
+    features_df = FormFeatureBuilder.create_features(
+        matches_df,
+        ['gf', 'shooting_standard_sh'],
+        FeatureSpec(windows=(2,), halflives=(3,), families=('shooting',)),
+        'feat_',
+    )
+
+    assert features_df.columns.tolist() == [
+        'feat_shooting_standard_sh_rolling_2_avg',
+        'feat_shooting_standard_sh_ewm_3_avg',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('column', 'family'),
+    [
+        ('gf', 'match'),
+        ('pen_gf', 'match'),
+        ('shooting_standard_sh', 'shooting'),
+        ('passing_total_cmp', 'passing'),
+        ('passing_types_pass_types_live', 'passing_types'),
+    ],
+)
+def test_get_family(column, family):
+    assert FormFeatureBuilder.get_family(column) == family
+
+
+@pytest.mark.parametrize(
+    'feature_spec',
+    [
+        FeatureSpec(windows=(), halflives=()),
+        FeatureSpec(windows=(0,)),
+        FeatureSpec(halflives=(-1,)),
+        FeatureSpec(min_periods=0),
+        FeatureSpec(families=('shots',)),
+    ],
+)
+def test_validate_invalid_feature_spec(feature_spec):
+    with pytest.raises(ValueError):
+        feature_spec.validate()
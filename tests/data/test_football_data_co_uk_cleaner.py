@@ -0,0 +1,197 @@
+"""Tests for the FootballDataCoUkCleaner class."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.data.football_data_co_uk_cleaner import FootballDataCoUkCleaner
+
+notes = """Notes for Football Data
+
+Key to results data:
+
+Div = League Division
+Date = Match Date (dd/mm/yy)
+Time = Time of match kick off
+HomeTeam = Home Team
+AwayTeam = Away Team
+FTHG and HG = Full Time Home Team Goals
+FTR and Res = Full Time Result (H=Home Win, D=Draw, A=Away Win)
+
+Match Statistics (where available)
+HS = Home Team Shots
+
+Key to 1X2 (match) betting odds data:
+
+B365H = Bet365 home win odds
+LBH = Ladbrokes home win odds
+PSH and PH = Pinnacle home win odds
+Bb1X2 = Number of BetBrain bookmakers used to calculate match odds averages
+
+Key to total goals betting odds:
+
+B365>2.5 = Bet365 over 2.5 goals
+
+Closing odds (last odds before match starts)
+
+As above but with an additional "C" character following the bookmaker
+"""
+
+
+@pytest.fixture
+def raw_data_folder_path(tmpdir) -> Path:
+    raw_data_folder_path = Path(tmpdir, 'raw')
+    raw_data_folder_path.mkdir()
+    Path(raw_data_folder_path, 'notes.txt').write_text(notes)
+    Path(raw_data_folder_path, 'bundesliga_1_odds_1718.csv').write_text(
+        'Div,Date,HomeTeam,AwayTeam,FTHG,FTR,HS,B365H,LBH,B365>2.5\n'
+        'D1,18/08/17,Bayern Munich,Leverkusen,3,H,,1.25,1.3,1.5\n'
+    )
+    Path(raw_data_folder_path, 'bundesliga_1_odds_2324.csv').write_text(
+        'Div,Date,Time,HomeTeam,AwayTeam,FTHG,FTR,HS,B365H,B365CH,Extra\n'
+        'D1,18/08/2023,19:30,Werder Bremen,Bayern Munich,0,A,9,8.5,9.0,x\n'
+        'D1,19/08/2023,15:30,Augsburg,Mgladbach,4,D,14,2.1,2.05,y\n'
+    )
+    return raw_data_folder_path
+
+
+def test_read_notes_keys(raw_data_folder_path):
+    keys = FootballDataCoUkCleaner.read_notes_keys(
+        Path(raw_data_folder_path, 'notes.txt')
+    )
+
+    assert list(keys) == [
+        'Div',
+        'Date',
+        'Time',
+        'HomeTeam',
+        'AwayTeam',
+        'FTHG',
+        'HG',
+        'FTR',
+        'Res',
+        'HS',
+        'B365H',
+        'LBH',
+        'PSH',
+        'PH',
+        'Bb1X2',
+        'B365>2.5',
+    ]
+    assert keys['HS'] == 'Match Statistics (where available)'
+    assert keys['B365H'] == 'Key to 1X2 (match) betting odds data'
+
+
+def test_get_column_dtypes(raw_data_folder_path):
+    keys = FootballDataCoUkCleaner.read_notes_keys(
+        Path(raw_data_folder_path, 'notes.txt')
+    )
+
+    dtypes = FootballDataCoUkCleaner.get_column_dtypes(keys)
+
+    assert dtypes == {
+        'Date': 'str',
+        'HomeTeam': 'str',
+        'AwayTeam': 'str',
+        'FTHG': None,
+        'HG': None,
+        'FTR': 'str',
+        'Res': 'str',
+        'HS': None,
+        'B365H': 'float32',
+        'B365CH': 'float32',
+        'PSH': 'float32',
+        'PSCH': 'float32',
+        'PH': 'float32',
+        'PCH': 'float32',
+        'B365>2.5': 'float32',
+        'B365C>2.5': 'float32',
+    }
+
+
+def test_parse_dates():
+    dates = FootballDataCoUkCleaner.parse_dates(
+        pd.Series(['18/08/17', '02/09/17'])
+    )
+    long_dates = FootballDataCoUkCleaner.parse_dates(
+        pd.Series(['18/08/2017', '02/09/2017'])
+    )
+
+    expected_dates = pd.Series(pd.to_datetime(['2017-08-18', '2017-09-02']))
+    pd.testing.assert_series_equal(dates, expected_dates)
+    pd.testing.assert_series_equal(long_dates, expected_dates)
+
+
+def test_get_odds_df(raw_data_folder_path):
+    cleaner = FootballDataCoUkCleaner(
+        raw_data_folder_path,
+        Path(raw_data_folder_path, 'cleaned'),
+        'Bundesliga 1',
+    )
+
+    odds_df = cleaner.get_odds_df()
+
+    assert odds_df.columns.tolist() == [
+        'Date',
+        'HomeTeam',
+        'AwayTeam',
+        'FTHG',
+        'FTR',
+        'HS',
+        'B365H',
+        'B365>2.5',
+        'B365CH',
+    ]
+    assert odds_df['Date'].tolist() == list(
+        pd.to_datetime(['2017-08-18', '2023-08-18', '2023-08-19'])
+    )
+    assert odds_df['B365H'].dtype == 'float32'
+    odds = odds_df['B365H'].astype('float64').round(2)
+    assert odds.tolist() == [1.25, 8.5, 2.1]
+    assert odds_df['HS'].isna().tolist() == [True, False, False]
+
+
+def test_get_odds_df_without_notes(raw_data_folder_path):
+    Path(raw_data_folder_path, 'notes.txt').unlink()
+    cleaner = FootballDataCoUkCleaner(
+        raw_data_folder_path,
+        Path(raw_data_folder_path, 'cleaned'),
+        'Bundesliga 1',
+    )
+
+    odds_df = cleaner.get_odds_df()
+
+    assert len(odds_df) == 3
+    assert {'Div', 'LBH', 'Time', 'Extra'} <= set(odds_df.columns)
+
+
+def test_normalize_dates_of_strings_and_datetimes():
+    df = pd.DataFrame({'date': ['18/08/17', '24/08/2018']})
+
+    df = FootballDataCoUkCleaner.normalize_dates(df)
+    again_df = FootballDataCoUkCleaner.normalize_dates(df)
+
+    expected_dates = pd.Series(
+        pd.to_datetime(['2017-08-18', '2018-08-24']), name='date'
+    )
+    pd.testing.assert_series_equal(df['date'], expected_dates)
+    pd.testing.assert_series_equal(again_df['date'], expected_dates)
+
+
+def test_normalize_team_names():
+    df = pd.DataFrame(
+        {
+            'team': ["M'gladbach", 'FC Koln', 'Bochum'],
+            'opponent': ['Bielefeld', 'Leverkusen', 'Unknown'],
+        }
+    )
+
+    # The registry of the repository is used by default.
+    df = FootballDataCoUkCleaner.normalize_team_names(df)
+
+    assert df['team'].tolist() == ['Monchengladbach', 'Koln', 'Bochum']
+    assert df['opponent'].tolist() == [
+        'Arminia',
+        'Bayer Leverkusen',
+        'Unknown',
+    ]
@@ -53,3 +53,137 @@ def test_scrape(mocker, tmpdir, requests_mock):
         open(Path(raw_data_folder_path, 'bundesliga_1_odds_2223.csv')).read()
         == 'odds csv file 2'
     )
+
+
+def test_save_odds_skips_up_to_date_seasons(mocker, tmpdir, requests_mock):
+    raw_data_folder_path = Path(tmpdir, '.data')
+    scraper = FootballDataCoUkScraper(
+        odds_href='germanym.php',
+        raw_data_folder_path=raw_data_folder_path,
+        competition='Bundesliga 1',
+        past_seasons_max_age=60,
+    )
+    mocker.patch('src.data.football_data_co_uk_scraper.sleep')
+    requests_mock.get(
+        'https://www.football-data.co.uk/germanym.php',
+        text=open(
+            Path(TEST_DATA_DIR, 'test_football_data_co_uk_scraper', 'odds_page')
+        ).read(),
+    )
+    for season, test_file in [('2324', '1'), ('2223', '2'), ('2122', '3')]:
+        requests_mock.get(
+            f'https://www.football-data.co.uk/mmz4281/{season}/D1.csv',
+            text=Path(
+                TEST_DATA_DIR, 'test_football_data_co_uk_scraper', test_file
+            ).read_text(),
+            headers={'ETag': f'"{season}"'},
+        )
+    scraper.save_odds()
+    requests_mock.reset_mock()
+    requests_mock.get(
+        'https://www.football-data.co.uk/mmz4281/2324/D1.csv', status_code=304
+    )
+
+    scraper.save_odds()
+
+    # The odds page and the current season only.
+    assert requests_mock.call_count == 2
+    assert requests_mock.last_request.headers['If-None-Match'] == '"2324"'
+    assert (
+        Path(raw_data_folder_path, 'bundesliga_1_odds_2324.csv').read_text()
+        == 'odds csv file 1'
+    )
+
+
+def test_save_season_odds_keeps_file_on_error(tmpdir, requests_mock):
+    raw_data_folder_path = Path(tmpdir, '.data')
+    scraper = FootballDataCoUkScraper(
+        odds_href='germanym.php',
+        raw_data_folder_path=raw_data_folder_path,
+        competition='Bundesliga 1',
+    )
+    odds_path = Path(raw_data_folder_path, 'bundesliga_1_odds_2324.csv')
+    odds_path.write_text('odds csv file 1')
+    requests_mock.get(
+        'https://www.football-data.co.uk/mmz4281/2324/D1.csv',
+        status_code=503,
+        text='Service Unavailable',
+    )
+
+    scraper.save_season_odds('mmz4281/2324/D1.csv')
+
+    assert odds_path.read_text() == 'odds csv file 1'
+
+
+def make_season_csv(teams: list[str], matches: int = None) -> str:
+    """Make up the odds csv file of a season, by default a complete one."""
+    rows = [
+        f'D1,{home},{away},2.1'
+        for home in teams
+        for away in teams
+        if home != away
+    ]
+    return '\n'.join(['Div,HomeTeam,AwayTeam,B365H', *rows[:matches]])
+
+
+def test_is_complete_season(tmpdir):
+    odds_path = Path(tmpdir, 'bundesliga_1_odds_2223.csv')
+    teams = ['Bochum', 'Koln', 'Mainz 05', 'Union Berlin']
+
+    assert not FootballDataCoUkScraper.is_complete_season(odds_path)
+    odds_path.write_text(make_season_csv(teams))
+    assert FootballDataCoUkScraper.is_complete_season(odds_path)
+    odds_path.write_text(make_season_csv(teams, matches=11))
+    assert not FootballDataCoUkScraper.is_complete_season(odds_path)
+    odds_path.write_text('odds csv file 2')
+    assert not FootballDataCoUkScraper.is_complete_season(odds_path)
+
+
+def test_save_odds_skips_complete_seasons_and_fetches_in_parallel(
+    mocker, tmpdir, requests_mock
+):
+    raw_data_folder_path = Path(tmpdir, '.data')
+    scraper = FootballDataCoUkScraper(
+        odds_href='germanym.php',
+        raw_data_folder_path=raw_data_folder_path,
+        competition='Bundesliga 1',
+        seconds_to_sleep_between_requests=0.01,
+        max_workers=3,
+    )
+    mock_sleep = mocker.patch('src.data.football_data_co_uk_scraper.sleep')
+    teams = ['Bochum', 'Koln', 'Mainz 05']
+    # A past season that was saved complete and one that was saved while it
+    # was still being played.
+    Path(raw_data_folder_path, 'bundesliga_1_odds_2223.csv').write_text(
+        make_season_csv(teams)
+    )
+    Path(raw_data_folder_path, 'bundesliga_1_odds_2122.csv').write_text(
+        make_season_csv(teams, matches=4)
+    )
+    requests_mock.get(
+        'https://www.football-data.co.uk/germanym.php',
+        text=open(
+            Path(TEST_DATA_DIR, 'test_football_data_co_uk_scraper', 'odds_page')
+        ).read(),
+    )
+    for season in ['2324', '2223', '2122']:
+        requests_mock.get(
+            f'https://www.football-data.co.uk/mmz4281/{season}/D1.csv',
+            text=make_season_csv(teams),
+        )
+
+    scraper.save_odds()
+
+    requested_urls = sorted(
+        request.url for request in requests_mock.request_history
+    )
+    assert requested_urls == [
+        'https://www.football-data.co.uk/germanym.php',
+        'https://www.football-data.co.uk/mmz4281/2122/D1.csv',
+        'https://www.football-data.co.uk/mmz4281/2324/D1.csv',
+    ]
+    assert FootballDataCoUkScraper.is_complete_season(
+        Path(raw_data_folder_path, 'bundesliga_1_odds_2122.csv')
+    )
+    # The parallel requests wait for the rate limiter instead of sleeping.
+    mock_sleep.assert_not_called()
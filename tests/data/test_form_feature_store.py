@@ -0,0 +1,79 @@
+"""Tests for the FormFeatureStore class."""
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.features import FeatureSpec, FormFeatureBuilder
+from src.data.form_feature_store import FormFeatureStore
+
+dtypes = {'team': 'object', 'date': 'object', 'gf': 'int64'}
+
+
+def save_matches(folder_path: Path, feature_spec: FeatureSpec) -> None:
+    matches_df = pd.DataFrame(
+        {
+            'team': ['Bochum', 'Bochum', 'Koln'],
+            'date': ['2023-09-01', '2023-09-08', '2023-09-01'],
+            'gf': [1, 2, 3],
+        }
+    )
+    _, state = FormFeatureBuilder.update_features(
+        matches_df, ['gf'], feature_spec, 'feat_'
+    )
+    store = FormFeatureStore(folder_path, feature_spec, dtypes)
+    store.save(matches_df, state, {'Bochum': 2, 'Koln': 1})
+
+
+def test_load(tmpdir):
+    feature_spec = FeatureSpec(windows=(1,), halflives=(2.5,))
+    save_matches(Path(tmpdir), feature_spec)
+
+    store = FormFeatureStore(Path(tmpdir), feature_spec, dtypes)
+    matches_df, state = store.load()
+
+    assert store.match_counts == {'Bochum': 2, 'Koln': 1}
+    assert matches_df['gf'].tolist() == [1, 2, 3]
+    assert state.recent_matches['date'].tolist() == ['2023-09-08', '2023-09-01']
+    assert list(state.weighted_sums) == [2.5]
+
+
+def test_save_new_matches(tmpdir):
+    feature_spec = FeatureSpec()
+    save_matches(Path(tmpdir), feature_spec)
+    store = FormFeatureStore(Path(tmpdir), feature_spec, dtypes)
+    matches_df, state = store.load()
+    new_matches_df = pd.DataFrame(
+        {'team': ['Koln'], 'date': ['2023-09-08'], 'gf': [4]}
+    )
+
+    store.save(new_matches_df, state, {'Bochum': 2, 'Koln': 2})
+    matches_df, _ = FormFeatureStore(Path(tmpdir), feature_spec, dtypes).load()
+
+    assert matches_df['gf'].tolist() == [1, 2, 3, 4]
+    assert sorted(path.name for path in Path(tmpdir).glob('*.pkl')) == [
+        'matches_0.pkl',
+        'matches_1.pkl',
+        'state_1.pkl',
+    ]
+
+
+def test_clear(tmpdir):
+    feature_spec = FeatureSpec()
+    save_matches(Path(tmpdir), FeatureSpec(windows=(5,)))
+    store = FormFeatureStore(Path(tmpdir), feature_spec, dtypes)
+
+    store.clear()
+
+    assert list(Path(tmpdir).glob('*.pkl')) == []
+    assert FormFeatureStore(Path(tmpdir), feature_spec, dtypes).load() is None
+
+
+def test_load_with_other_feature_spec_or_dtypes(tmpdir):
+    save_matches(Path(tmpdir), FeatureSpec())
+
+    store = FormFeatureStore(Path(tmpdir), FeatureSpec(windows=(5,)), dtypes)
+    other_dtypes = {**dtypes, 'gf': 'float64'}
+    other_store = FormFeatureStore(Path(tmpdir), FeatureSpec(), other_dtypes)
+
+    assert store.load() is None
+    assert other_store.load() is None
@@ -0,0 +1,88 @@
+"""Tests for the HtmlTableExtractor class."""
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from settings import TEST_DATA_DIR
+from src.data.fbref import categories
+from src.data.html_table_extractor import HtmlTableExtractor
+
+TABLE = """
+<table id="stats">
+    <caption>Shooting <span>2023-2024</span> Table</caption>
+    <thead>
+        <tr><th colspan="2">For Team</th><th>Standard</th></tr>
+        <tr><th>Date</th><th>Time</th><th>Gls</th></tr>
+    </thead>
+    <tbody>
+        <tr><th>2023-08-18</th><td>20:30</td><td>1,234</td></tr>
+        <tr><th rowspan="2">2023-08-26</th><td>15:30</td><td>2</td></tr>
+        <tr><td>18:30</td><td>3</td></tr>
+    </tbody>
+</table>
+"""
+
+
+@pytest.mark.parametrize(
+    'caption', ['Scores & Fixtures', *categories.values()]
+)
+def test_read_table_is_same_as_read_html(caption):
+    html_folder_path = Path(TEST_DATA_DIR, 'test_fbref_scraper')
+    pages = [
+        page.read_text()
+        for page in sorted(html_folder_path.glob('*.html'))
+        if HtmlTableExtractor.find_table(page.read_text(), match=caption)
+        is not None
+    ]
+
+    assert len(pages) > 0
+    for html in pages:
+        pd.testing.assert_frame_equal(
+            HtmlTableExtractor.read_table(html, match=caption),
+            pd.read_html(StringIO(html), match=caption)[0],
+        )
+
+
+def test_read_table():
+    other_table = '<table><tr><td>Shooting</td></tr></table>'
+    html = f'<html><body>{other_table}{TABLE}</body></html>'
+
+    df = HtmlTableExtractor.read_table(html, match='^Shooting')
+
+    pd.testing.assert_frame_equal(df, pd.read_html(StringIO(TABLE))[0])
+    assert list(df.columns) == [
+        ('For Team', 'Date'),
+        ('For Team', 'Time'),
+        ('Standard', 'Gls'),
+    ]
+    assert df[('For Team', 'Date')].tolist() == [
+        '2023-08-18',
+        '2023-08-26',
+        '2023-08-26',
+    ]
+    assert df[('Standard', 'Gls')].tolist() == [1234, 2, 3]
+
+
+def test_read_table_by_id():
+    html = f'<html><body>{TABLE}</body></html>'
+
+    df = HtmlTableExtractor.read_table(html, table_id='stats')
+
+    assert len(df) == 3
+
+
+def test_read_table_in_comment():
+    html = f'<html><body><div><!--{TABLE}--></div></body></html>'
+
+    df = HtmlTableExtractor.read_table(html, match='Shooting')
+
+    pd.testing.assert_frame_equal(df, pd.read_html(StringIO(TABLE))[0])
+
+
+def test_read_table_not_found():
+    html = f'<html><body>{TABLE}</body></html>'
+
+    with pytest.raises(ValueError):
+        HtmlTableExtractor.read_table(html, match='Passing')
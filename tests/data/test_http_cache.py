@@ -0,0 +1,83 @@
+"""Tests for the HttpCache class."""
+from pathlib import Path
+
+import requests
+
+from src.data.http_cache import HttpCache
+from src.data.save_schedule import SaveSchedule
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = 'https://fbref.com/page'
+    return response
+
+
+def test_get_conditional_headers():
+    cache = HttpCache()
+    cache.store(
+        'page.html',
+        make_response(
+            200,
+            {
+                'ETag': '"abc"',
+                'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT',
+            },
+        ),
+    )
+
+    assert cache.get_conditional_headers('page.html') == {
+        'If-None-Match': '"abc"',
+        'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+    }
+    assert cache.get_conditional_headers('other.html') == {}
+
+
+def test_errored_response_removes_entry():
+    cache = HttpCache()
+    cache.store('page.html', make_response(200, {'ETag': '"abc"'}))
+
+    cache.store('page.html', make_response(429))
+
+    assert cache.get_conditional_headers('page.html') == {}
+
+
+def test_is_fresh(mocker):
+    mock_time = mocker.patch('src.data.http_cache.time', return_value=1000)
+    cache = HttpCache()
+    cache.store('page.html', make_response(200))
+    mock_time.return_value = 1100
+
+    assert cache.is_fresh('page.html', max_age=200)
+    assert not cache.is_fresh('page.html', max_age=50)
+    assert not cache.is_fresh('page.html', max_age=None)
+    assert not cache.is_fresh('other.html', max_age=200)
+
+    cache.store('page.html', make_response(304))
+
+    assert cache.is_fresh('page.html', max_age=50)
+
+
+def test_save_and_load(tmpdir):
+    file_path = Path(tmpdir, 'cache', 'http_cache.json')
+    cache = HttpCache(file_path)
+    cache.store('page.html', make_response(200, {'ETag': '"abc"'}))
+    cache.save()
+
+    loaded_cache = HttpCache(file_path)
+
+    assert loaded_cache.get_conditional_headers('page.html') == {
+        'If-None-Match': '"abc"'
+    }
+
+
+def test_store_saves_on_schedule(tmpdir):
+    file_path = Path(tmpdir, 'http_cache.json')
+    cache = HttpCache(file_path, SaveSchedule(max_changes=2, max_seconds=60))
+
+    cache.store('a.html', make_response(200, {'ETag': '"a"'}))
+    assert not file_path.exists()
+    cache.store('b.html', make_response(200, {'ETag': '"b"'}))
+    assert len(HttpCache(file_path).entries) == 2
@@ -0,0 +1,48 @@
+"""Tests for the HTTP session factory."""
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from src.data.http_client import RETRY_STATUSES, create_session
+
+
+def test_create_session():
+    session = create_session(
+        request_headers={'User-Agent': 'test'},
+        pool_size=4,
+        max_retries=3,
+        backoff_factor=1,
+    )
+
+    adapter = session.get_adapter('https://fbref.com')
+    assert session.headers['User-Agent'] == 'test'
+    assert 'gzip' in session.headers['Accept-Encoding']
+    assert adapter._pool_maxsize == 4
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.backoff_factor == 1
+    assert adapter.max_retries.respect_retry_after_header
+    assert set(adapter.max_retries.status_forcelist) == set(RETRY_STATUSES)
+
+
+def test_session_retries_errored_responses():
+    statuses = [503, 429, 200]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(statuses.pop(0))
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            self.wfile.write(b'page')
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    session = create_session(backoff_factor=0)
+
+    response = session.get(f'http://127.0.0.1:{server.server_port}/')
+    server.shutdown()
+
+    assert response.status_code == 200
+    assert response.text == 'page'
+    assert statuses == []
@@ -0,0 +1,117 @@
+"""Tests for the MatchKeyBuilder class."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.match_key import MatchKeyBuilder
+
+
+@pytest.fixture
+def matches_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'date': ['2021-08-13', '2021-08-13', '2021-08-21', None],
+            'team': ['Brentford', 'Arsenal', 'Arsenal', 'Chelsea'],
+            'opponent': ['Arsenal', 'Brentford', 'Chelsea', 'Arsenal'],
+            'venue': ['Home', 'Away', 'Home', 'Away'],
+        },
+        index=[3, 5, 7, 9],
+    )
+
+
+def test_get_match_ids(matches_df):
+    match_ids = MatchKeyBuilder.get_match_ids(matches_df)
+
+    expected_match_ids = pd.Series(
+        [
+            '2021-08-13_Brentford_Arsenal',
+            '2021-08-13_Brentford_Arsenal',
+            '2021-08-21_Arsenal_Chelsea',
+            np.nan,
+        ],
+        index=[3, 5, 7, 9],
+    )
+    pd.testing.assert_series_equal(match_ids, expected_match_ids)
+
+
+def test_get_match_ids_is_same_as_row_by_row(matches_df):
+    matches_df = matches_df.dropna().assign(
+        date=lambda df: pd.to_datetime(df['date'])
+    )
+
+    match_ids = MatchKeyBuilder.get_match_ids(matches_df)
+
+    expected_match_ids = matches_df.assign(
+        date=matches_df['date'].dt.strftime('%Y-%m-%d')
+    ).apply(
+        lambda row: f'{row["date"]}_{row["team"]}_{row["opponent"]}'
+        if row['venue'] == 'Home'
+        else f'{row["date"]}_{row["opponent"]}_{row["team"]}',
+        axis=1,
+    )
+    assert match_ids.tolist() == expected_match_ids.tolist()
+
+
+def test_get_match_ids_without_venue(matches_df):
+    match_ids = MatchKeyBuilder.get_match_ids(
+        matches_df.drop(columns='venue')
+    )
+
+    assert match_ids.tolist()[:3] == [
+        '2021-08-13_Brentford_Arsenal',
+        '2021-08-13_Arsenal_Brentford',
+        '2021-08-21_Arsenal_Chelsea',
+    ]
+
+
+def test_get_match_ids_of_no_matches(matches_df):
+    match_ids = MatchKeyBuilder.get_match_ids(matches_df.iloc[:0])
+
+    assert match_ids.tolist() == []
+
+
+def test_create_team_ids():
+    team_ids = MatchKeyBuilder.create_team_ids(
+        pd.Series(['Chelsea', 'Arsenal', None]),
+        pd.Series(['Brentford', 'Chelsea']),
+    )
+
+    assert team_ids == {'Arsenal': 0, 'Brentford': 1, 'Chelsea': 2}
+
+
+def test_get_match_keys(matches_df):
+    team_ids = MatchKeyBuilder.create_team_ids(
+        matches_df['team'], matches_df['opponent']
+    )
+
+    match_keys = MatchKeyBuilder.get_match_keys(matches_df, team_ids)
+
+    assert match_keys.index.tolist() == [3, 5, 7, 9]
+    # Both rows of the same match have the same key.
+    assert match_keys[3] == match_keys[5]
+    assert len(set(match_keys[[5, 7]])) == 2
+    assert match_keys[9] == -1
+    # The date and the teams can be read back from the key.
+    days = match_keys[7] >> 32
+    assert np.datetime64(int(days), 'D') == np.datetime64('2021-08-21')
+    assert (match_keys[7] >> 16) & 0xFFFF == team_ids['Arsenal']
+    assert match_keys[7] & 0xFFFF == team_ids['Chelsea']
+
+
+def test_get_match_keys_of_unknown_team(matches_df):
+    team_ids = {'Arsenal': 0, 'Brentford': 1}
+
+    match_keys = MatchKeyBuilder.get_match_keys(matches_df, team_ids)
+
+    assert (match_keys[[3, 5]] >= 0).all()
+    assert match_keys[7] == -1
+
+
+def test_get_match_keys_of_strings_and_datetimes(matches_df):
+    team_ids = MatchKeyBuilder.create_team_ids(matches_df['team'])
+    datetimes_df = matches_df.assign(date=pd.to_datetime(matches_df['date']))
+
+    pd.testing.assert_series_equal(
+        MatchKeyBuilder.get_match_keys(matches_df, team_ids),
+        MatchKeyBuilder.get_match_keys(datetimes_df, team_ids),
+    )
@@ -0,0 +1,56 @@
+"""Tests for the PageManifest class."""
+from pathlib import Path
+
+from src.data.page_manifest import PageManifest
+from src.data.save_schedule import SaveSchedule
+
+
+def test_is_errored():
+    manifest = PageManifest()
+    manifest.record('ok.html', size=100, errored=False, status_code=200)
+    manifest.record('errored.html', size=50, errored=True, status_code=403)
+
+    assert manifest.is_errored('ok.html', 100) is False
+    assert manifest.is_errored('errored.html', 50) is True
+    # The file was changed after it was recorded.
+    assert manifest.is_errored('ok.html', 120) is None
+    assert manifest.is_errored('unknown.html', 100) is None
+
+
+def test_save_and_load(tmpdir):
+    file_path = Path(tmpdir, 'cache', 'manifest.json')
+    manifest = PageManifest(file_path)
+    manifest.record('errored.html', size=50, errored=True, status_code=403)
+    manifest.save()
+
+    loaded_manifest = PageManifest(file_path)
+
+    assert loaded_manifest.entries == {
+        'errored.html': {'status_code': 403, 'size': 50, 'errored': True}
+    }
+
+
+def test_record_saves_on_schedule(tmpdir):
+    file_path = Path(tmpdir, 'manifest.json')
+    manifest = PageManifest(
+        file_path, SaveSchedule(max_changes=2, max_seconds=60)
+    )
+
+    manifest.record('first.html', size=100, errored=False)
+    assert not file_path.exists()
+    manifest.record('second.html', size=100, errored=False)
+    assert len(PageManifest(file_path).entries) == 2
+
+
+def test_save_skips_unchanged_manifest(tmpdir):
+    file_path = Path(tmpdir, 'manifest.json')
+    manifest = PageManifest(file_path)
+
+    manifest.save()
+    assert not file_path.exists()
+    manifest.record('first.html', size=100, errored=False)
+    manifest.save()
+    file_path.write_text('{}')
+    manifest.save()
+
+    assert file_path.read_text() == '{}'
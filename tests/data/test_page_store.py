@@ -0,0 +1,113 @@
+"""Tests for the page stores."""
+import json
+from pathlib import Path
+
+import pytest
+
+from src.data.page_store import (
+    CompressedPageStore,
+    PageStore,
+    open_page_store,
+)
+
+
+def test_page_store(tmpdir):
+    store = PageStore(Path(tmpdir, '.pages'))
+
+    store.write('page.html', '<h1>Page</h1>')
+
+    assert store.list_pages() == ['page.html']
+    assert store.exists('page.html')
+    assert not store.exists('other.html')
+    assert store.read('page.html') == '<h1>Page</h1>'
+    assert store.size('page.html') == 13
+
+
+@pytest.mark.parametrize('compression', ['gzip'])
+def test_compressed_page_store(tmpdir, compression):
+    folder_path = Path(tmpdir, '.pages')
+    store = CompressedPageStore(folder_path, compression=compression)
+
+    store.write('a.html', '<h1>403 error</h1>')
+    store.write('b.html', '<h1>403 error</h1>')
+    store.write('c.html', '<h1>Page</h1>' * 100)
+
+    assert store.list_pages() == ['a.html', 'b.html', 'c.html']
+    assert store.read('b.html') == '<h1>403 error</h1>'
+    assert store.read_bytes('c.html') == b'<h1>Page</h1>' * 100
+    assert store.size('c.html') == 1300
+    # Identical pages are stored once.
+    blobs = list(Path(folder_path, 'blobs').glob('*/*'))
+    assert len(blobs) == 2
+    assert sum(blob.stat().st_size for blob in blobs) < 1300
+    with pytest.raises(FileNotFoundError):
+        store.read('d.html')
+
+
+def test_compressed_page_store_loads_index(tmpdir):
+    folder_path = Path(tmpdir, '.pages')
+    CompressedPageStore(folder_path).write('a.html', 'a')
+
+    store = CompressedPageStore(folder_path)
+
+    assert store.list_pages() == ['a.html']
+    assert store.read('a.html') == 'a'
+
+
+def test_compressed_page_store_flush(tmpdir):
+    folder_path = Path(tmpdir, '.pages')
+    store = CompressedPageStore(folder_path)
+    store.write('a.html', 'a')
+    store.write('b.html', 'b')
+
+    store.flush()
+
+    assert json.loads(store.index_file_path.read_text()).keys() == {
+        'a.html',
+        'b.html',
+    }
+    assert not store.journal_file_path.exists()
+
+
+def test_compressed_page_store_skips_incomplete_journal_entry(tmpdir):
+    folder_path = Path(tmpdir, '.pages')
+    CompressedPageStore(folder_path).write('a.html', 'a')
+    # The crawl was interrupted while writing the next entry.
+    with open(Path(folder_path, 'index.log'), 'a') as f:
+        f.write('{"name": "b.ht')
+
+    store = CompressedPageStore(folder_path)
+
+    assert store.list_pages() == ['a.html']
+    assert not store.journal_file_path.exists()
+
+
+def test_compressed_page_store_rejects_unknown_compression(tmpdir):
+    with pytest.raises(ValueError):
+        CompressedPageStore(Path(tmpdir), compression='bz2')
+
+
+def test_compressed_page_store_requires_zstandard_for_zstd(tmpdir, mocker):
+    mocker.patch('src.data.page_store.find_spec', return_value=None)
+
+    with pytest.raises(ValueError, match='zstandard'):
+        CompressedPageStore(Path(tmpdir), compression='zstd')
+
+
+def test_open_page_store(tmpdir):
+    compressed_folder_path = Path(tmpdir, 'compressed')
+    plain_folder_path = Path(tmpdir, 'plain')
+    PageStore(plain_folder_path).write('a.html', 'a')
+
+    assert isinstance(
+        open_page_store(compressed_folder_path, compress=True),
+        CompressedPageStore,
+    )
+    # Existing compressed pages are detected.
+    assert isinstance(
+        open_page_store(compressed_folder_path), CompressedPageStore
+    )
+    # Existing plain pages are not compressed.
+    assert not isinstance(
+        open_page_store(plain_folder_path, compress=True), CompressedPageStore
+    )
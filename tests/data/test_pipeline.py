@@ -0,0 +1,53 @@
+"""Tests for the pipeline helpers."""
+import pandas as pd
+import pytest
+
+from src.data.fbref_cleaner import FbrefCleaner
+from src.data.pipeline import Pipeline, copy_frame
+
+
+@pytest.mark.parametrize('copy_on_write', [False, True])
+def test_copy_frame(copy_on_write):
+    df = pd.DataFrame({'a': [1, 2], 'b': [3, 4]})
+
+    with pd.option_context('mode.copy_on_write', copy_on_write):
+        copied_df = copy_frame(df)
+        copied_df.loc[0, 'a'] = 10
+        copied_df.drop(columns='b', inplace=True)
+
+    assert df['a'].tolist() == [1, 2]
+    assert df.columns.tolist() == ['a', 'b']
+
+
+def test_pipeline():
+    df = pd.DataFrame({'notes': [1, 2], 'gf': ['1 (3)', '2'], 'ga': ['0', '1']})
+
+    with Pipeline('test') as pipeline:
+        assert pd.options.mode.copy_on_write
+        cleaned_df = pipeline.run_step(FbrefCleaner.drop_irrelevant_columns, df)
+        cleaned_df = pipeline.run_step(
+            FbrefCleaner.parse_goals_columns, cleaned_df
+        )
+        pipeline.run_step(FbrefCleaner.parse_goals_columns, df)
+
+    assert not pd.options.mode.copy_on_write
+    assert df.columns.tolist() == ['notes', 'gf', 'ga']
+    assert df['gf'].tolist() == ['1 (3)', '2']
+    assert cleaned_df.columns.tolist() == ['gf', 'ga', 'pen_gf', 'pen_ga']
+    assert cleaned_df['pen_gf'].tolist() == [3, -1]
+    assert list(pipeline.reports) == [
+        'drop_irrelevant_columns',
+        'parse_goals_columns',
+    ]
+    assert pipeline.reports['parse_goals_columns'].calls == 2
+    assert 'drop_irrelevant_columns' in pipeline.format_report()
+
+
+def test_pipeline_without_resource(mocker):
+    mocker.patch('src.data.pipeline.resource', None)
+
+    with Pipeline('test') as pipeline:
+        pipeline.run_step(FbrefCleaner.drop_irrelevant_columns, pd.DataFrame())
+
+    assert pipeline.reports['drop_irrelevant_columns'].peak_rss_mib is None
+    assert 'drop_irrelevant_columns' in pipeline.format_report()
@@ -0,0 +1,40 @@
+"""Tests for the RateLimiter class."""
+import pytest
+
+from src.data.rate_limiter import RateLimiter
+
+
+def test_acquire_within_capacity(mocker):
+    mock_sleep = mocker.patch('src.data.rate_limiter.sleep')
+    rate_limiter = RateLimiter(requests_per_second=1, capacity=3)
+
+    for _ in range(3):
+        rate_limiter.acquire()
+
+    assert mock_sleep.call_count == 0
+
+
+def test_acquire_waits_for_token(mocker):
+    clock = mocker.patch('src.data.rate_limiter.monotonic', return_value=0.0)
+    # Move the clock forward instead of actually sleeping.
+    mock_sleep = mocker.patch(
+        'src.data.rate_limiter.sleep',
+        side_effect=lambda seconds: setattr(
+            clock, 'return_value', clock.return_value + seconds
+        ),
+    )
+    rate_limiter = RateLimiter(requests_per_second=2, capacity=1)
+
+    rate_limiter.acquire()
+    rate_limiter.acquire()
+
+    assert mock_sleep.call_count == 1
+    assert mock_sleep.call_args.args[0] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize(
+    'requests_per_second,capacity', [(0, 1), (-1, 1), (1, 0)]
+)
+def test_invalid_arguments(requests_per_second, capacity):
+    with pytest.raises(ValueError):
+        RateLimiter(requests_per_second=requests_per_second, capacity=capacity)
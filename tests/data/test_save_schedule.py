@@ -0,0 +1,32 @@
+"""Tests for the SaveSchedule class."""
+import pytest
+
+from src.data.save_schedule import SaveSchedule
+
+
+def test_add_change_after_max_changes():
+    save_schedule = SaveSchedule(max_changes=3, max_seconds=60)
+
+    assert [save_schedule.add_change() for _ in range(3)] == [
+        False,
+        False,
+        True,
+    ]
+    save_schedule.reset()
+    assert save_schedule.add_change() is False
+
+
+def test_add_change_after_max_seconds(mocker):
+    clock = mocker.patch('src.data.save_schedule.monotonic', return_value=0.0)
+    save_schedule = SaveSchedule(max_changes=100, max_seconds=30)
+
+    assert save_schedule.add_change() is False
+    clock.return_value = 29.0
+    assert save_schedule.add_change() is False
+    clock.return_value = 30.0
+    assert save_schedule.add_change() is True
+
+
+def test_max_changes_must_be_positive():
+    with pytest.raises(ValueError, match='max_changes'):
+        SaveSchedule(max_changes=0)
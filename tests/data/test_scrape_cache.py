@@ -0,0 +1,47 @@
+"""Tests for the ScrapeCache class."""
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.scrape_cache import ScrapeCache
+
+
+def test_scrape_cache(tmpdir):
+    folder_path = Path(tmpdir, '.cache')
+    df = pd.DataFrame({'Date': ['2023-08-18'], 'GF': [3]})
+    scrape_cache = ScrapeCache(folder_path)
+
+    scrape_cache.store('a-Stats.html', 'fingerprint', df)
+    scrape_cache.save()
+    scrape_cache = ScrapeCache(folder_path)
+
+    pd.testing.assert_frame_equal(
+        scrape_cache.get('a-Stats.html', 'fingerprint'), df
+    )
+    assert scrape_cache.get('a-Stats.html', 'changed') is None
+    assert scrape_cache.get('b-Stats.html', 'fingerprint') is None
+
+
+def test_scrape_cache_prune(tmpdir):
+    folder_path = Path(tmpdir, '.cache')
+    df = pd.DataFrame({'GF': [3]})
+    scrape_cache = ScrapeCache(folder_path)
+    scrape_cache.store('a-Stats.html', 'fingerprint', df)
+    scrape_cache.store('b-Stats.html', 'fingerprint', df)
+
+    scrape_cache.prune(['b-Stats.html'])
+
+    assert list(scrape_cache.entries) == ['b-Stats.html']
+    assert len(list(folder_path.glob('*.pkl'))) == 1
+
+
+def test_scrape_cache_ignores_other_versions(tmpdir, mocker):
+    folder_path = Path(tmpdir, '.cache')
+    scrape_cache = ScrapeCache(folder_path)
+    scrape_cache.store('a-Stats.html', 'fingerprint', pd.DataFrame())
+    scrape_cache.save()
+    mocker.patch.object(ScrapeCache, 'version', ScrapeCache.version + 1)
+
+    scrape_cache = ScrapeCache(folder_path)
+
+    assert scrape_cache.get('a-Stats.html', 'fingerprint') is None
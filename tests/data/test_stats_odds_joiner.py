@@ -0,0 +1,187 @@
+"""Tests for the StatsOddsJoiner class."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from settings import TEAM_REGISTRY_FILE
+from src.data.stats_odds_joiner import StatsOddsJoiner
+from src.data.team_registry import TeamRegistry
+
+
+@pytest.fixture
+def matches_df() -> pd.DataFrame:
+    # Each match is seen from both teams.
+    matches = [
+        ('2023-08-18', 'Werder Bremen', 'Bayern Munich'),
+        ('2023-08-19', 'Augsburg', 'Monchengladbach'),
+        # Postponed in the odds.
+        ('2023-08-20', 'Bochum', 'Stuttgart'),
+        # Named Köln in the odds.
+        ('2023-08-20', 'Koln', 'Dortmund'),
+        # Not played yet.
+        ('2023-09-30', 'Bayern Munich', 'Augsburg'),
+    ]
+    rows = []
+    for i, (date, home_team, away_team) in enumerate(matches):
+        rows.append((date, home_team, away_team, 'Home', i))
+        rows.append((date, away_team, home_team, 'Away', i))
+    df = pd.DataFrame(
+        rows,
+        columns=['info_date', 'info_team', 'info_opponent', 'info_venue', 'x'],
+    )
+    return df.assign(feat_team_code=np.arange(len(df)))
+
+
+@pytest.fixture
+def odds_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'date': [
+                '2023-08-18',
+                '2023-08-19',
+                '2023-08-19',
+                '2023-08-20',
+                '2023-09-27',
+                '2023-09-28',
+            ],
+            'team': [
+                'Werder Bremen',
+                'Augsburg',
+                'Wolfsburg',
+                'Köln',
+                'Bochum',
+                'Dortmund',
+            ],
+            'opponent': [
+                'Bayern Munich',
+                'Monchengladbach',
+                'Mainz 05',
+                'Dortmund',
+                'Stuttgart',
+                'Koln',
+            ],
+            'match_id': 'id',
+            'b365h': [8.5, 2.1, 1.9, 3.4, 1.8, 1.3],
+        }
+    )
+
+
+def test_join(tmpdir, matches_df, odds_df):
+    matches_df.to_csv(Path(tmpdir, 'bundesliga_matches.csv'), index=False)
+    odds_df.to_csv(Path(tmpdir, 'bundesliga_1_odds.csv'), index=False)
+    joiner = StatsOddsJoiner(
+        Path(tmpdir, 'bundesliga_matches.csv'),
+        Path(tmpdir, 'bundesliga_1_odds.csv'),
+        Path(tmpdir),
+        Path(tmpdir, 'reports', 'mismatches.csv'),
+    )
+
+    mismatches_df = joiner.join()
+
+    joined_df = pd.read_csv(Path(tmpdir, 'bundesliga_matches_odds.csv'))
+    assert joined_df.columns.tolist() == [
+        *matches_df.columns,
+        'odds_b365h',
+    ]
+    pd.testing.assert_frame_equal(
+        joined_df[matches_df.columns], matches_df
+    )
+    # Both rows of a match get its odds.
+    assert joined_df['odds_b365h'].fillna(0).tolist() == [
+        8.5,
+        8.5,
+        2.1,
+        2.1,
+        *[0] * 6,
+    ]
+    assert mismatches_df.to_dict('records') == pd.read_csv(
+        Path(tmpdir, 'reports', 'mismatches.csv'),
+        parse_dates=['date', 'other_date'],
+    ).to_dict('records')
+
+
+def test_get_mismatches(matches_df, odds_df):
+    match_keys, odds_match_keys = StatsOddsJoiner.get_match_keys(
+        matches_df, odds_df
+    )
+
+    mismatches_df = StatsOddsJoiner.get_mismatches(
+        matches_df, odds_df, match_keys, odds_match_keys
+    )
+
+    assert mismatches_df.columns.tolist() == list(
+        StatsOddsJoiner.mismatch_columns
+    )
+    assert mismatches_df.drop(columns='other_date').to_dict('records') == [
+        {
+            'source': source,
+            'date': pd.Timestamp(date),
+            'home_team': home_team,
+            'away_team': away_team,
+            'reason': reason,
+        }
+        for source, date, home_team, away_team, reason in [
+            ('matches', '2023-08-20', 'Bochum', 'Stuttgart', 'different date'),
+            ('matches', '2023-08-20', 'Koln', 'Dortmund', 'missing'),
+            (
+                'matches',
+                '2023-09-30',
+                'Bayern Munich',
+                'Augsburg',
+                'outside dates',
+            ),
+            ('odds', '2023-08-19', 'Wolfsburg', 'Mainz 05', 'unknown team'),
+            ('odds', '2023-08-20', 'Köln', 'Dortmund', 'unknown team'),
+            ('odds', '2023-09-27', 'Bochum', 'Stuttgart', 'different date'),
+            ('odds', '2023-09-28', 'Dortmund', 'Koln', 'missing'),
+        ]
+    ]
+    assert mismatches_df['other_date'].tolist()[0] == pd.Timestamp(
+        '2023-09-27'
+    )
+    assert mismatches_df['other_date'].tolist()[5] == pd.Timestamp(
+        '2023-08-20'
+    )
+    assert mismatches_df['other_date'].isna().sum() == 5
+    assert 'unknown team' in StatsOddsJoiner.format_mismatch_summary(
+        mismatches_df
+    )
+
+
+def test_join_odds_with_team_registry(matches_df, odds_df):
+    match_keys, odds_match_keys = StatsOddsJoiner.get_match_keys(
+        matches_df, odds_df, TeamRegistry(Path(TEAM_REGISTRY_FILE))
+    )
+
+    joined_df = StatsOddsJoiner.join_odds(
+        matches_df, odds_df, match_keys, odds_match_keys
+    )
+
+    # Köln in the odds is Koln in the matches.
+    assert joined_df['odds_b365h'].tolist()[6:8] == [3.4, 3.4]
+
+
+def test_join_odds_uses_last_duplicate(matches_df, odds_df):
+    odds_df = pd.concat([odds_df, odds_df.iloc[[0]].assign(b365h=9.0)])
+    match_keys, odds_match_keys = StatsOddsJoiner.get_match_keys(
+        matches_df, odds_df
+    )
+
+    joined_df = StatsOddsJoiner.join_odds(
+        matches_df, odds_df, match_keys, odds_match_keys
+    )
+
+    assert joined_df['odds_b365h'].tolist()[:4] == [9.0, 9.0, 2.1, 2.1]
+
+
+def test_format_mismatch_summary_without_mismatches():
+    mismatches_df = pd.DataFrame(
+        columns=list(StatsOddsJoiner.mismatch_columns)
+    )
+
+    assert (
+        StatsOddsJoiner.format_mismatch_summary(mismatches_df)
+        == 'No mismatches.'
+    )
@@ -0,0 +1,117 @@
+"""Tests for the TeamRegistry class."""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.match_key import MatchKeyBuilder
+from src.data.team_registry import TeamRegistry
+
+
+@pytest.fixture
+def team_registry(tmpdir) -> TeamRegistry:
+    file_path = Path(tmpdir, 'team_registry.json')
+    file_path.write_text(
+        json.dumps(
+            {
+                'Bundesliga': {
+                    'Koln': ['Köln', 'FC Koln'],
+                    'Bochum': [],
+                },
+                '2. Bundesliga': {
+                    'Hamburger SV': ['Hamburg'],
+                    'Koln': ['1. FC Köln'],
+                },
+            }
+        ),
+        encoding='utf-8',
+    )
+    return TeamRegistry(file_path)
+
+
+def test_encode(team_registry):
+    ids = team_registry.encode(
+        pd.Series(['FC Koln', 'Bochum', None, 'Hamburg', 'Unknown', 'Köln'])
+    )
+
+    # The ids are in the alphabetical order of the teams of all leagues.
+    assert ids.tolist() == [2, 0, -1, 1, -1, 2]
+
+
+def test_normalize(team_registry):
+    names = pd.Series(
+        ['1. FC Köln', 'Bochum', np.nan, 'Unknown'], index=[3, 5, 7, 9]
+    )
+
+    normalized_names = team_registry.normalize(names.astype('category'))
+
+    pd.testing.assert_series_equal(
+        normalized_names,
+        pd.Series(['Koln', 'Bochum', np.nan, 'Unknown'], index=[3, 5, 7, 9]),
+    )
+
+
+def test_normalize_is_same_as_mapping(team_registry):
+    rng = np.random.default_rng(0)
+    names = pd.Series(
+        rng.choice(['Köln', 'FC Koln', 'Hamburg', 'Bochum', 'Unknown'], 100)
+    )
+    mapping = {'Köln': 'Koln', 'FC Koln': 'Koln', 'Hamburg': 'Hamburger SV'}
+
+    normalized_names = team_registry.normalize(names)
+
+    pd.testing.assert_series_equal(
+        normalized_names, names.map(mapping).fillna(names)
+    )
+
+
+def test_add_team_and_save(team_registry):
+    team_registry.add_team('Bundesliga', 'Bochum', ['VfL Bochum'])
+    team_registry.add_team('Premier League', 'Arsenal')
+    team_registry.save()
+
+    loaded_registry = TeamRegistry(team_registry.file_path)
+
+    assert loaded_registry.leagues == team_registry.leagues
+    assert loaded_registry.teams.tolist() == [
+        'Arsenal',
+        'Bochum',
+        'Hamburger SV',
+        'Koln',
+    ]
+    assert loaded_registry.encode(pd.Series(['VfL Bochum'])).tolist() == [1]
+
+
+def test_name_of_two_teams(team_registry):
+    with pytest.raises(ValueError):
+        team_registry.add_team('2. Bundesliga', 'Hamburger SV', ['FC Koln'])
+
+
+def test_create_team_ids(team_registry):
+    matches_df = pd.DataFrame(
+        {'date': ['2023-08-18'], 'team': ['Koln'], 'opponent': ['Union Berlin']}
+    )
+    odds_df = matches_df.assign(team='FC Koln')
+
+    team_ids = team_registry.create_team_ids(
+        matches_df['team'], matches_df['opponent'], odds_df['team']
+    )
+
+    assert team_ids['Koln'] == team_ids['FC Koln'] == 2
+    assert team_ids['Union Berlin'] == 3
+    # The names of a team give the same match keys.
+    pd.testing.assert_series_equal(
+        MatchKeyBuilder.get_match_keys(matches_df, team_ids),
+        MatchKeyBuilder.get_match_keys(odds_df, team_ids),
+    )
+
+
+def test_without_file(tmpdir):
+    team_registry = TeamRegistry(Path(tmpdir, 'team_registry.json'))
+
+    names = pd.Series(['Koln'])
+
+    assert team_registry.encode(names).tolist() == [-1]
+    assert team_registry.normalize(names).tolist() == ['Koln']